@@ -0,0 +1,156 @@
+# Check and benchmark: KitronikAggregator minute / hour / day summaries against working them out from every reading
+# Runs on a PC: python3 aggregator_check.py [days]
+# Simulates a reading every 5 seconds (with the odd missing reading) and compares the logged summaries, read back with KitronikLogReader, to the raw readings
+# Also pairs the aggregator with each logger class: the text loggers must log the same summaries, and KitronikBinaryLogger and KitronikDeltaLogger must be refused with a TypeError
+# The log files are written to a temporary folder
+# Exits with an AssertionError if any count, min, mean, max or last value is wrong
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import host_stubs
+host_stubs.install()
+host_stubs.countFiles()
+
+from host_stubs import files
+from PicoAirQuality import KitronikDataLogger
+from PicoAirQualityLogging import KitronikAggregator, KitronikBinaryLogger, KitronikDeltaLogger, KitronikJournalLogger, KitronikRingLogger, KitronikSegmentedLogger
+from PicoAirQualityReader import KitronikLogReader, timestamp
+
+DAYS = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+INTERVAL = 5
+START = timestamp(2025, 3, 1, 6, 30, 2)    # Not on a whole minute, so the first periods are only partly filled
+CHANNELS = [("Temperature", 2), ("Pressure", 0), ("Humidity", 2), ("IAQ", 0), ("eCO2", 0)]
+TIERS = [(60, "minutes.txt"), (3600, "hours.txt"), (86400, "days.txt")]
+
+os.chdir(tempfile.mkdtemp())
+
+generator = random.Random(18)
+readings = []
+temperature = 2150
+for n in range(DAYS * 86400 // INTERVAL):
+    temperature = temperature + generator.randrange(-3, 4)
+    reading = [temperature / 100, 101325 + generator.randrange(-50, 50), generator.randrange(3000, 6000) / 100, generator.randrange(0, 500), generator.randrange(400, 2000)]
+    if (generator.random() < 0.01):
+        reading[generator.randrange(5)] = None
+    readings.append((START + (n * INTERVAL), reading))
+
+loggers = []
+for period, name in TIERS:
+    log = KitronikDataLogger(name, "semicolon")
+    log.MAX_FILE_SIZE = 10000000
+    log.setFlushPolicy(entries=60)
+    loggers.append((period, log))
+aggregator = KitronikAggregator(CHANNELS, loggers)
+
+start = time.perf_counter()
+for t, reading in readings:
+    aggregator.addReading(*reading, timestamp=t)
+elapsed = time.perf_counter() - start
+aggregator.flush()
+print("%d readings over %d days: %.1f us per reading (PC time)" % (len(readings), DAYS, elapsed * 1e6 / len(readings)))
+
+# What every finished period should hold, worked out from all the readings at once
+def expectedSummaries(period):
+    groups = {}
+    for t, reading in readings:
+        groups.setdefault(t - (t % period), []).append(reading)
+    lastStart = readings[-1][0] - (readings[-1][0] % period)
+    summaries = []
+    for periodStart in sorted(groups):
+        if (periodStart == lastStart):
+            continue    # Still going - not logged yet
+        group = groups[periodStart]
+        values = [periodStart, len(group)]
+        for i in range(len(CHANNELS)):
+            channel = [reading[i] for reading in group if reading[i] is not None]
+            values.append((min(channel), sum(channel) / len(channel), max(channel), channel[-1]) if channel else None)
+        summaries.append(values)
+    return summaries
+
+for (period, name), (period, log) in zip(TIERS, loggers):
+    reader = KitronikLogReader(name, "semicolon")
+    columns = ["Count"] + [channel + statistic for channel, places in CHANNELS for statistic in (" Min", " Mean", " Max", " Last")]
+    logged = list(reader.readRecords(columns))
+    expected = expectedSummaries(period)
+    assert len(logged) == len(expected), (name, len(logged), len(expected))
+    for record, values in zip(logged, expected):
+        assert record[0] == values[0] and record[1] == values[1], (name, record[:2], values[:2])
+        for i, (channel, places) in enumerate(CHANNELS):
+            got = record[2 + (4 * i):6 + (4 * i)]
+            if (values[2 + i] is None):
+                assert got == ("-", "-", "-", "-")
+                continue
+            low, mean, high, last = values[2 + i]
+            assert (got[0], got[2], got[3]) == (low, high, last), (name, channel, got, values[2 + i])
+            assert abs(got[1] - mean) <= (0.5 / (10 ** places)) + 1e-9, (name, channel, got[1], mean)
+    size = log.checkFileSize()
+    print("%-12s %6d summaries  %8d bytes" % (name, len(logged), size))
+
+# A raw log of every reading, for comparison
+raw = KitronikDataLogger("raw.txt", "semicolon")
+raw.MAX_FILE_SIZE = 100000000
+raw.nameColumnHeadings("Date", "Time", *[name for name, places in CHANNELS])
+raw.setFlushPolicy(entries=1000)
+for t, reading in readings:
+    g = time.gmtime(t)
+    raw.storeDataEntry("%02d/%02d/%04d" % (g[2], g[1], g[0]), "%02d:%02d:%02d" % (g[3], g[4], g[5]), *["-" if value is None else value for value in reading])
+raw.flush()
+print("%-12s %6d readings   %8d bytes" % ("raw.txt", len(readings), raw.checkFileSize()))
+
+# Reading back the daily temperature range: from the day summaries, or from every reading
+for name, column in (("days.txt", "Temperature Max"), ("raw.txt", "Temperature")):
+    host_stubs.resetFileCounters()
+    list(KitronikLogReader(name, "semicolon").readRecords([column]))
+    print("Daily maximum temperatures from %-9s %9d bytes read" % (name + ":", files["bytesRead"]))
+
+# Each text logger logs the same summaries, and the loggers which only store numbers are refused with a TypeError
+def summaryLines(file):
+    f = open(file, "r")
+    lines = [line.rstrip("\r\n") for line in f if line[2:3] == "/"]
+    f.close()
+    return lines
+
+expectedLines = None
+for name, makeLogger in (("KitronikDataLogger", lambda: KitronikDataLogger("pair.txt", "semicolon")),
+                         ("KitronikRingLogger", lambda: KitronikRingLogger("pair.ring", "semicolon", slots=500, slotSize=192)),
+                         ("KitronikSegmentedLogger", lambda: KitronikSegmentedLogger("pair", "semicolon", segmentSize=20000)),
+                         ("KitronikJournalLogger", lambda: KitronikJournalLogger("pair_journal", "semicolon"))):
+    log = makeLogger()
+    pairing = KitronikAggregator(CHANNELS, [(60, log)])
+    for t, reading in readings[:1440]:
+        pairing.addReading(*reading, timestamp=t)
+    pairing.flush()
+    if (type(log) is KitronikDataLogger):
+        lines = summaryLines("pair.txt")
+    else:
+        log.exportData(name + ".txt")
+        lines = summaryLines(name + ".txt")
+    if (expectedLines is None):
+        expectedLines = lines
+        assert len(lines) == 119, len(lines)
+    assert lines == expectedLines, name
+    print("%-24s %d minute summaries" % (name + ":", len(lines)))
+for name, log in (("KitronikBinaryLogger", KitronikBinaryLogger("pair.bin", "semicolon")), ("KitronikDeltaLogger", KitronikDeltaLogger("pair.dlt", "semicolon"))):
+    try:
+        KitronikAggregator(CHANNELS, [(60, log)])
+        assert False, name
+    except TypeError as error:
+        print("%-24s TypeError: %s" % (name + ":", error))
+
+# The running totals take the same memory whatever the number of readings
+tracemalloc.start()
+aggregator = KitronikAggregator(CHANNELS, [(60, KitronikDataLogger("a.txt")), (3600, KitronikDataLogger("b.txt"))])
+for t, reading in readings[:1000]:
+    aggregator.addReading(*reading, timestamp=t)
+first = tracemalloc.take_snapshot()
+for t, reading in readings[1000:5000]:
+    aggregator.addReading(*reading, timestamp=t)
+# (Memory held by the PC's own file objects, opened by the stand-in open() in host_stubs.py, is left out)
+growth = tracemalloc.take_snapshot().compare_to(first, "filename")
+assert sum(stat.size_diff for stat in growth if stat.traceback[0].filename not in (host_stubs.__file__, tracemalloc.__file__)) < 2000
+tracemalloc.stop()
+print("PASS")
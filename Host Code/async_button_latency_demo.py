@@ -0,0 +1,75 @@
+# Demo: how quickly a button press is noticed while a BME688 measurement is in progress, blocking vs asyncio
+# Runs on a PC with simulated hardware from host_stubs.py (in real time, so it takes a few seconds): python3 async_button_latency_demo.py
+import asyncio
+import random
+import threading
+import time
+
+import host_stubs
+host_stubs.install()
+host_stubs.clock.useRealTime()
+
+from PicoAirQuality import KitronikBME688, KitronikOLED, KitronikButton, KitronikBuzzer
+from PicoAirQualityAsync import KitronikBME688Async, KitronikOLEDAsync, KitronikButtonAsync, KitronikBuzzerAsync
+
+TRIALS = 5
+random.seed(5366)
+
+bme688 = KitronikBME688()
+bme688.setupGasSensor()
+oled = KitronikOLED()
+buttons = KitronikButton()
+buzzer = KitronikBuzzer()
+
+# Press button A from another thread after a delay, recording when it happened
+def pressLater(delay, presses):
+    def press():
+        presses.append(time.perf_counter())
+        buttons.buttonA.value(1)
+    threading.Timer(delay, press).start()
+
+# A typical blocking main loop: measure, update the screen, then check the button
+def blockingTrial(delay):
+    presses = []
+    buttons.buttonA.value(0)
+    pressLater(delay, presses)
+    while True:
+        bme688.measureData()
+        oled.clear()
+        oled.displayText("T: " + str(bme688.readTemperature()), 1)
+        oled.show()
+        if buttons.buttonA.value():
+            return time.perf_counter() - presses[0]
+
+# The same work split into tasks on one event loop
+async def asyncTrial(delay):
+    presses = []
+    buttons.buttonA.value(0)
+    bme688Async = KitronikBME688Async(bme688)
+    oledAsync = KitronikOLEDAsync(oled)
+    buttonsAsync = KitronikButtonAsync(buttons)
+    buzzerAsync = KitronikBuzzerAsync(buzzer)
+
+    async def measureAndDisplay():
+        while True:
+            await bme688Async.measure()
+            oledAsync.clear()
+            oledAsync.displayText("T: " + str(bme688Async.readTemperature()), 1)
+            await oledAsync.show()
+
+    worker = asyncio.create_task(measureAndDisplay())
+    await asyncio.sleep(0.05)    # Let the first measurement start
+    pressLater(delay, presses)
+    await buttonsAsync.waitForButtonA()
+    latency = time.perf_counter() - presses[0]
+    await buzzerAsync.tone(1000, 10)    # React to the button
+    worker.cancel()
+    return latency
+
+def report(name, latencies):
+    print("%-10s mean %6.1f ms   max %6.1f ms" % (name, 1000 * sum(latencies) / len(latencies), 1000 * max(latencies)))
+
+print("Button press latency while measuring (%d presses at random times, measurement takes ~%d ms):" % (TRIALS, bme688.calcMeasurementDuration()))
+delays = [random.uniform(0.05, 0.2) for _ in range(TRIALS)]
+report("blocking", [blockingTrial(delay) for delay in delays])
+report("asyncio", [asyncio.run(asyncTrial(delay)) for delay in delays])
@@ -0,0 +1,97 @@
+# Convert a KitronikBinaryLogger file (from PicoAirQualityLogging.py) back to a text log, on a PC (CPython 3)
+# Usage: python3 binary_log_decoder.py data_log.bin [data_log.csv]
+# The output has the same layout as a KitronikDataLogger file: project info, column headings, then one line per record using the logger's separator
+# Timestamps are written as "YYYY-MM-DD HH:MM:SS" (the Pico's time.time() is seconds since the start of the epoch year stored in the file)
+# The file is read a block of records at a time, so any size of log can be converted
+# readLog() can also be used from other scripts to get the records as tuples of numbers
+import datetime
+import struct
+import sys
+
+MAGIC = b"KBL1"
+HEADER_FORMAT = "<4sHHBBH"
+BLOCK_RECORDS = 1024
+
+# Read the header from an open binary log file
+# Returns a dictionary: epochYear, recordSize, separator, projectInfo (list of lines), columns (list of (name, type code, decimal places)), recordFormat
+def readHeader(f):
+    fixed = f.read(struct.calcsize(HEADER_FORMAT))
+    if (len(fixed) != struct.calcsize(HEADER_FORMAT)):
+        raise ValueError("Not a KitronikBinaryLogger file (too short)")
+    magic, epochYear, recordSize, columnCount, separator, infoLength = struct.unpack(HEADER_FORMAT, fixed)
+    if (magic != MAGIC):
+        raise ValueError("Not a KitronikBinaryLogger file")
+    info = f.read(infoLength).decode()
+    columns = []
+    for column in range(columnCount):
+        nameLength = f.read(1)[0]
+        name = f.read(nameLength).decode()
+        code, decimals = struct.unpack("<BB", f.read(2))
+        columns.append((name, chr(code), decimals))
+    recordFormat = "<I" + "".join(code for name, code, decimals in columns)
+    if (struct.calcsize(recordFormat) != recordSize):
+        raise ValueError("Record size in the header does not match the columns")
+    projectInfo = [line for line in info.split("\r\n")[:-1]] if info else []
+    return {"epochYear": epochYear, "recordSize": recordSize, "separator": chr(separator), "projectInfo": projectInfo, "columns": columns, "recordFormat": recordFormat}
+
+# Generator: yields (header, record) for each record, where record is (timestamp, value1, value2...) with the values scaled back to their real units
+# A partly written record at the end of the file (eg: from a power cut) is ignored
+def readLog(fileName):
+    f = open(fileName, "rb")
+    try:
+        header = readHeader(f)
+        record = struct.Struct(header["recordFormat"])
+        scales = [(10 ** decimals) if (code not in "fd") else 1 for name, code, decimals in header["columns"]]
+        while True:
+            block = f.read(record.size * BLOCK_RECORDS)
+            whole = len(block) - (len(block) % record.size)
+            for values in record.iter_unpack(block[:whole]):
+                yield header, (values[0],) + tuple(value / scale if scale != 1 else value for value, scale in zip(values[1:], scales))
+            if (len(block) < record.size * BLOCK_RECORDS):
+                break
+    finally:
+        f.close()
+
+def formatTimestamp(epochYear, timestamp):
+    return (datetime.datetime(epochYear, 1, 1) + datetime.timedelta(seconds=timestamp)).strftime("%Y-%m-%d %H:%M:%S")
+
+def formatValue(value, decimals):
+    if isinstance(value, float) and (decimals > 0):
+        return "%.*f" % (decimals, value)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+# Write the log as text, one line at a time
+def convert(fileName, outputName):
+    out = open(outputName, "w", newline="")
+    records = 0
+    header = None
+    for header, record in readLog(fileName):
+        if (records == 0):
+            writeHeadings(out, header)
+        separator = header["separator"]
+        line = formatTimestamp(header["epochYear"], record[0]) + separator
+        for value, (name, code, decimals) in zip(record[1:], header["columns"]):
+            line = line + formatValue(value, decimals) + separator
+        out.write(line + "\r\n")
+        records = records + 1
+    if (records == 0):
+        f = open(fileName, "rb")
+        writeHeadings(out, readHeader(f))
+        f.close()
+    out.close()
+    return records
+
+def writeHeadings(out, header):
+    for line in header["projectInfo"]:
+        out.write(line + "\r\n")
+    separator = header["separator"]
+    out.write("Timestamp" + separator + "".join(name + separator for name, code, decimals in header["columns"]) + "\r\n")
+
+if __name__ == "__main__":
+    if (len(sys.argv) < 2):
+        print("Usage: python3 binary_log_decoder.py data_log.bin [data_log.csv]")
+        sys.exit(1)
+    outputName = sys.argv[2] if (len(sys.argv) > 2) else sys.argv[1].rsplit(".", 1)[0] + ".csv"
+    print("%d records written to %s" % (convert(sys.argv[1], outputName), outputName))
@@ -0,0 +1,112 @@
+# Benchmark: bytes per entry, entries kept in a full log and time to store an entry, KitronikDataLogger (text) vs KitronikBinaryLogger
+# Runs on a PC: python3 binary_logger_benchmark.py
+# The log files are written to a temporary folder
+# Exits with an AssertionError if binary_log_decoder.py does not read back the values which were stored
+import os
+import tempfile
+import time
+
+import host_stubs
+host_stubs.install()
+host_stubs.countFiles()
+
+from host_stubs import files
+from PicoAirQuality import KitronikDataLogger
+from PicoAirQualityLogging import KitronikBinaryLogger
+import binary_log_decoder
+
+ENTRIES = 2000
+
+os.chdir(tempfile.mkdtemp())
+
+# A reading as the main loop has it: temperature, pressure, humidity, IAQ and eCO2
+def reading(n):
+    return (20 + (n % 500) / 100, 101325 - (n % 40), 40 + (n % 900) / 100, n % 500, 400 + (n % 300))
+
+def projectInfo(log):
+    log.writeProjectInfo("Kitronik Data Logger - Pico Smart Air Quality Board - www.kitronik.co.uk", "Name: User Name", "Subject: Binary log")
+
+# The text log stores the date and time as text, the same as the Pico example code
+def storeText(log, n):
+    temperature, pressure, humidity, iaq, eco2 = reading(n)
+    log.storeDataEntry("01/01/2025", "12:%02d:%02d" % ((n // 60) % 60, n % 60), "%.2f" % temperature, str(pressure), "%.2f" % humidity, str(iaq), str(eco2))
+
+def storeBinary(log, n):
+    log.storeDataEntry(*reading(n))
+
+def run(name, log, store):
+    host_stubs.resetFileCounters()
+    start = time.perf_counter()
+    for n in range(ENTRIES):
+        store(log, n)
+    log.flush()
+    elapsed = time.perf_counter() - start
+    perEntry = files["bytesWritten"] / ENTRIES
+    print("%-22s %5.1f bytes per entry  %6d entries in %d bytes  %6.1f us per entry (PC time)" % (name, perEntry, log.MAX_FILE_SIZE // perEntry, log.MAX_FILE_SIZE, elapsed * 1e6 / ENTRIES))
+    return perEntry
+
+text = KitronikDataLogger("data_log.txt", "semicolon")
+projectInfo(text)
+text.nameColumnHeadings("Date", "Time", "Temperature", "Pressure", "Humidity", "IAQ", "eCO2")
+textBytes = run("KitronikDataLogger", text, storeText)
+
+binary = KitronikBinaryLogger("data_log.bin", "semicolon")
+projectInfo(binary)
+binary.nameColumnHeadings("Temperature", "Pressure", "Humidity", "IAQ", "eCO2")
+binaryBytes = run("KitronikBinaryLogger", binary, storeBinary)
+print("The binary log keeps %.1fx as many entries in the same space" % (textBytes / binaryBytes))
+
+# The decoder reads back every value which was stored, to the number of decimal places kept
+records = [record for header, record in binary_log_decoder.readLog("data_log.bin")]
+assert len(records) == ENTRIES
+for n, record in enumerate(records):
+    assert record[1:] == tuple(round(value, 2) for value in reading(n)), (n, record)
+
+# The converted file has the same layout as a text log
+binary_log_decoder.convert("data_log.bin", "data_log.csv")
+f = open("data_log.csv", "rb")
+lines = f.read().decode().split("\r\n")
+f.close()
+assert lines[:4] == ["Kitronik Data Logger - Pico Smart Air Quality Board - www.kitronik.co.uk", "Name: User Name", "Subject: Binary log", "Timestamp;Temperature;Pressure;Humidity;IAQ;eCO2;"]
+assert lines[4].split(";")[1:] == ["20.00", "101325", "40.00", "0", "400", ""]
+assert len(lines) == ENTRIES + 5
+
+# Opening the log again with the same columns adds to the file, different columns start a new file
+reopened = KitronikBinaryLogger("data_log.bin", "semicolon")
+projectInfo(reopened)
+reopened.nameColumnHeadings("Temperature", "Pressure", "Humidity", "IAQ", "eCO2")
+assert not os.path.exists("data_log.bin.old")
+reopened.nameColumnHeadings("Temperature", "Pressure", "Humidity", "IAQ", "eCO2", "Light:H0")
+assert os.path.exists("data_log.bin.old")
+
+# Removing entries keeps the header and whole records
+binary.MAX_FILE_SIZE = binary.headerSize + 100 * binary.recordSize
+binary.nameColumnHeadings("Temperature", "Pressure", "Humidity", "IAQ", "eCO2")
+for n in range(150):
+    storeBinary(binary, n)
+records = [record for header, record in binary_log_decoder.readLog("data_log.bin")]
+assert len(records) <= 100 and records[-1][1:] == tuple(round(value, 2) for value in reading(149))
+
+# And when a record is longer than the 512 byte blocks the file is copied in (many columns)
+wide = KitronikBinaryLogger("wide_log.bin", "semicolon")
+wide.nameColumnHeadings(*["Sensor%d" % column for column in range(200)])
+assert wide.recordSize > 512
+wide.MAX_FILE_SIZE = wide.headerSize + 10 * wide.recordSize
+for n in range(25):
+    wide.storeDataEntry(*[n + (column / 100) for column in range(200)])
+records = [record for header, record in binary_log_decoder.readLog("wide_log.bin")]
+assert len(records) == 10 and [record[1] for record in records] == list(range(25 - len(records), 25)) and abs(records[-1][200] - 25.99) < 0.01
+print("Removing entries from a log with %d byte records keeps the newest %d" % (wide.recordSize, len(records)))
+
+# Readings at the top of the ranges the library gives: IAQ 500 and its eCO2 (about 100857 ppm, more with the humidity and temperature adjustments) are stored as they are,
+# and values outside a column type's range are stored as the nearest end of it rather than stopping the logging
+top = KitronikBinaryLogger("top_log.bin", "semicolon")
+top.nameColumnHeadings("Temperature", "Pressure", "Humidity", "Gas", "IAQ", "eCO2")
+top.storeDataEntry(23.4, 101325, 45, 3000000, 500, 100857)
+top.storeDataEntry(23.4, 101325, 45, 3000000, 500, 3000000)
+top.storeDataEntry(-400, 101325, 45, 3000000, 70000, 70000)
+top.flush()
+records = [record for header, record in binary_log_decoder.readLog("top_log.bin")]
+assert [record[1:] for record in records] == [(23.4, 101325, 45, 3000000, 500, 100857), (23.4, 101325, 45, 3000000, 500, 3000000), (-327.68, 101325, 45, 3000000, 65535, 70000)], records
+print("Top of the IAQ and eCO2 ranges stored, out of range values kept to the column type's range")
+print("PASS")
@@ -0,0 +1,62 @@
+# Check and benchmark: bme688_compensation.py against the compensation on the Pico (KitronikBME688)
+# Runs on a PC with the simulated bus from host_stubs.py: python3 bme688_batch_check.py [readings]
+# Builds the calibration from the cache file saved by KitronikBME688, then compares every result over random raw readings across the full ADC ranges
+# Exits with an AssertionError if any result is different
+import os
+import random
+import sys
+import tempfile
+import time
+
+import host_stubs
+host_stubs.install()
+
+from PicoAirQuality import KitronikBME688
+import bme688_compensation
+
+READINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+DEVICE_READINGS = 20_000
+
+# The calibration record, as saved on the Pico
+cacheFile = os.path.join(tempfile.mkdtemp(), "bme688_calibration.bin")
+bme688 = KitronikBME688(calibrationCache=cacheFile)
+bme688.init()
+cal = bme688_compensation.readCalibrationCache(cacheFile)
+for key, value in cal.items():
+    assert getattr(bme688, key) == value, key
+
+# Random readings over the full ADC ranges: 20-bit temperature & pressure, 16-bit humidity, 10-bit gas and 4-bit gas range
+# The temperature is kept within -40 to 85 degC (the BME688 operating range), as outside that the pressure calculation has no meaning
+generator = random.Random(688)
+tRaw = [generator.randrange(320000, 680000) for _ in range(READINGS)]
+pRaw = [generator.randrange(0, 1 << 20) for _ in range(READINGS)]
+hRaw = [generator.randrange(0, 1 << 16) for _ in range(READINGS)]
+gResRaw = [generator.randrange(0, 1 << 10) for _ in range(READINGS)]
+gasRange = [generator.randrange(0, 16) for _ in range(READINGS)]
+
+# The scalar functions match KitronikBME688 on the Pico
+bme688.ambTempFlag = True
+for i in range(DEVICE_READINGS):
+    bme688.calcTemperature(tRaw[i])
+    bme688.intCalcPressure(pRaw[i])
+    bme688.intCalcHumidity(hRaw[i], bme688.tRead)
+    bme688.intCalcgRes(gResRaw[i], gasRange[i])
+    expected = (bme688.newAmbTemp, bme688.pRead, bme688.hRead, bme688.gRes)
+    assert bme688_compensation.compensate(cal, tRaw[i], pRaw[i], hRaw[i], gResRaw[i], gasRange[i]) == expected, i
+print("Scalar functions match KitronikBME688 for %d readings" % DEVICE_READINGS)
+
+start = time.perf_counter()
+scalar = bme688_compensation.compensateBatch(cal, tRaw, pRaw, hRaw, gResRaw, gasRange, useNumpy=False)
+scalarTime = time.perf_counter() - start
+print("Plain Python: %d readings in %.3f s (%.2f us per reading)" % (READINGS, scalarTime, scalarTime * 1e6 / READINGS))
+
+if bme688_compensation.numpy is None:
+    print("NumPy is not installed - batch path not checked")
+else:
+    start = time.perf_counter()
+    batch = bme688_compensation.compensateBatch(cal, tRaw, pRaw, hRaw, gResRaw, gasRange)
+    batchTime = time.perf_counter() - start
+    for name, expected, result in zip(("temperature", "pressure", "humidity", "gas resistance"), scalar, batch):
+        assert result.tolist() == expected, "NumPy %s is different" % name
+    print("NumPy:        %d readings in %.3f s (%.2f us per reading), %.0fx faster, bit-identical" % (READINGS, batchTime, batchTime * 1e6 / READINGS, scalarTime / batchTime))
+print("PASS")
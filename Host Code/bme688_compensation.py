@@ -0,0 +1,167 @@
+# BME688 compensation calculations as plain functions, for processing recorded raw ADC readings on a PC (CPython 3)
+# Gives exactly the same integer results as KitronikBME688 on the Pico, without needing the sensor or the I2C bus
+# The calibration comes from a saved calibration record: the calibration cache file written by KitronikBME688(calibrationCache="...")
+# compensateBatch() works on whole arrays of readings at once using NumPy if it is installed (and plain Python lists if it is not)
+#
+# Example:
+#   import bme688_compensation as comp
+#   cal = comp.readCalibrationCache("bme688_calibration.bin")
+#   temperature, pressure, humidity, gasRes = comp.compensateBatch(cal, tRaw, pRaw, hRaw, gResRaw, gasRange)
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CALIBRATION_LENGTH = 40
+
+# Simple 16-bit checksum (Fletcher-16), the same as KitronikBME688.calibrationChecksum()
+def calibrationChecksum(data):
+    sum1 = 0
+    sum2 = 0
+    for byte in data:
+        sum1 = (sum1 + byte) % 255
+        sum2 = (sum2 + sum1) % 255
+    return (sum2 << 8) | sum1
+
+# Decode the calibration parameters from the 40 byte raw calibration data (registers 0x8A - 0xA0, 0xE1 - 0xEE & 0x00 - 0x02)
+# Returns a dictionary of the PAR_* values, named as in KitronikBME688
+def decodeCalibration(data):
+    if (len(data) != CALIBRATION_LENGTH):
+        raise ValueError("Calibration data must be %d bytes" % CALIBRATION_LENGTH)
+    cal = {}
+    (cal["PAR_T2"], cal["PAR_T3"], unused,
+     cal["PAR_P1"], cal["PAR_P2"], cal["PAR_P3"], unused,
+     cal["PAR_P4"], cal["PAR_P5"], cal["PAR_P7"], cal["PAR_P6"], unused, unused,
+     cal["PAR_P8"], cal["PAR_P9"], cal["PAR_P10"]) = struct.unpack_from("<hbBHhbBhhbbBBhhb", data, 0)
+    (parH2_MSB, parH1_LSB_parH2_LSB, parH1_MSB,
+     cal["PAR_H3"], cal["PAR_H4"], cal["PAR_H5"], cal["PAR_H6"], cal["PAR_H7"]) = struct.unpack_from("<BBBbbbbb", data, 23)
+    cal["PAR_H1"] = (parH1_MSB << 4) | (parH1_LSB_parH2_LSB & 0x0F)
+    cal["PAR_H2"] = (parH2_MSB << 4) | (parH1_LSB_parH2_LSB >> 4)
+    cal["PAR_T1"] = struct.unpack_from("<h", data, 31)[0]
+    (cal["PAR_G2"], cal["PAR_G1"], cal["PAR_G3"]) = struct.unpack_from(">hbB", data, 33)
+    cal["RES_HEAT_VAL"] = struct.unpack_from("<b", data, 37)[0]
+    cal["RES_HEAT_RANGE"] = (data[39] >> 4) & 0x03
+    return cal
+
+# Read a calibration cache file: chip ID (1 byte), data length (1 byte), checksum (2 bytes), raw calibration data (40 bytes)
+# Raises ValueError if the file is not a valid calibration record
+def readCalibrationCache(fileName):
+    f = open(fileName, "rb")
+    record = f.read()
+    f.close()
+    if (len(record) != 4 + CALIBRATION_LENGTH):
+        raise ValueError("%s is not a BME688 calibration record" % fileName)
+    chipID, length, checksum = struct.unpack_from("<BBH", record, 0)
+    data = record[4:]
+    if (length != CALIBRATION_LENGTH) or (checksum != calibrationChecksum(data)):
+        raise ValueError("%s is corrupted" % fileName)
+    return decodeCalibration(data)
+
+# Temperature: rawADC to 1/100 degC - returns (temperature, tFine), tFine is needed for the pressure calculation
+def compensateTemperature(cal, tRaw):
+    var1 = (tRaw >> 3) - (cal["PAR_T1"] << 1)
+    var2 = (var1 * cal["PAR_T2"]) >> 11
+    var3 = ((((var1 >> 1) * (var1 >> 1)) >> 12) * (cal["PAR_T3"] << 4)) >> 14
+    tFine = var2 + var3
+    return ((tFine * 5) + 128) >> 8, tFine
+
+# Pressure: rawADC to Pascals
+def compensatePressure(cal, pRaw, tFine):
+    var1 = (tFine >> 1) - 64000
+    var2 = ((((var1 >> 2) * (var1 >> 2)) >> 11) * cal["PAR_P6"]) >> 2
+    var2 = var2 + ((var1 * cal["PAR_P5"]) << 1)
+    var2 = (var2 >> 2) + (cal["PAR_P4"] << 16)
+    var1 = (((((var1 >> 2) * (var1 >> 2)) >> 13) * (cal["PAR_P3"] << 5)) >> 3) + ((cal["PAR_P2"] * var1) >> 1)
+    var1 = var1 >> 18
+    var1 = ((32768 + var1) * cal["PAR_P1"]) >> 15
+    pressure = ((1048576 - pRaw) - (var2 >> 12)) * 3125
+    if (pressure >= (1 << 30)):
+        pressure = (pressure // var1) << 1
+    else:
+        pressure = (pressure << 1) // var1
+    var1 = (cal["PAR_P9"] * (((pressure >> 3) * (pressure >> 3)) >> 13)) >> 12
+    var2 = ((pressure >> 2) * cal["PAR_P8"]) >> 13
+    var3 = ((pressure >> 8) * (pressure >> 8) * (pressure >> 8) * cal["PAR_P10"]) >> 17
+    return pressure + ((var1 + var2 + var3 + (cal["PAR_P7"] << 7)) >> 4)
+
+# Humidity: rawADC to %, using the temperature in 1/100 degC (only the whole degrees are used, as on the Pico)
+def compensateHumidity(cal, hRaw, temperature):
+    if (temperature < 0):
+        tempScaled = -((-temperature) // 100)
+    else:
+        tempScaled = temperature // 100
+    var1 = hRaw - (cal["PAR_H1"] << 4) - (((tempScaled * cal["PAR_H3"]) // 100) >> 1)
+    var2 = (cal["PAR_H2"] * (((tempScaled * cal["PAR_H4"]) // 100) + (((tempScaled * ((tempScaled * cal["PAR_H5"]) // 100)) >> 6) // 100) + (1 << 14))) >> 10
+    var3 = var1 * var2
+    var4 = ((cal["PAR_H6"] << 7) + ((tempScaled * cal["PAR_H7"]) // 100)) >> 4
+    var5 = ((var3 >> 14) * (var3 >> 14)) >> 10
+    var6 = (var4 * var5) >> 1
+    return ((((var3 + var6) >> 10) * 1000) >> 12) // 1000
+
+# Gas resistance: rawADC & range to Ohms
+def compensateGas(gResRaw, gasRange):
+    return ((10000 * (262144 >> gasRange)) // (4096 + ((gResRaw - 512) * 3))) * 100
+
+# Compensate one set of raw ADC readings
+# Returns (temperature in 1/100 degC, pressure in Pa, humidity in %, gas resistance in Ohms)
+def compensate(cal, tRaw, pRaw, hRaw, gResRaw, gasRange):
+    temperature, tFine = compensateTemperature(cal, tRaw)
+    return (temperature, compensatePressure(cal, pRaw, tFine), compensateHumidity(cal, hRaw, temperature), compensateGas(gResRaw, gasRange))
+
+# Compensate arrays (or lists) of raw ADC readings, all the same length
+# Returns four arrays: temperature in 1/100 degC, pressure in Pa, humidity in %, gas resistance in Ohms
+# With NumPy the calculation is done on whole int64 arrays at once, otherwise one reading at a time into lists
+def compensateBatch(cal, tRaw, pRaw, hRaw, gResRaw, gasRange, useNumpy=True):
+    if useNumpy and (numpy is not None):
+        return compensateArrays(cal, tRaw, pRaw, hRaw, gResRaw, gasRange)
+    results = ([], [], [], [])
+    for reading in zip(tRaw, pRaw, hRaw, gResRaw, gasRange):
+        for column, value in zip(results, compensate(cal, *reading)):
+            column.append(value)
+    return results
+
+# The NumPy version of compensate()
+# NumPy's >> and // round towards minus infinity like Python's, and every intermediate value fits in an int64, so the results are identical
+def compensateArrays(cal, tRaw, pRaw, hRaw, gResRaw, gasRange):
+    tRaw = numpy.asarray(tRaw, dtype=numpy.int64)
+    pRaw = numpy.asarray(pRaw, dtype=numpy.int64)
+    hRaw = numpy.asarray(hRaw, dtype=numpy.int64)
+    gResRaw = numpy.asarray(gResRaw, dtype=numpy.int64)
+    gasRange = numpy.asarray(gasRange, dtype=numpy.int64)
+
+    # Temperature
+    var1 = (tRaw >> 3) - (cal["PAR_T1"] << 1)
+    tFine = ((var1 * cal["PAR_T2"]) >> 11) + (((((var1 >> 1) * (var1 >> 1)) >> 12) * (cal["PAR_T3"] << 4)) >> 14)
+    temperature = ((tFine * 5) + 128) >> 8
+
+    # Pressure
+    var1 = (tFine >> 1) - 64000
+    var1Sq = (var1 >> 2) * (var1 >> 2)
+    var2 = ((var1Sq >> 11) * cal["PAR_P6"]) >> 2
+    var2 = var2 + ((var1 * cal["PAR_P5"]) << 1)
+    var2 = (var2 >> 2) + (cal["PAR_P4"] << 16)
+    var1 = ((((var1Sq >> 13) * (cal["PAR_P3"] << 5)) >> 3) + ((cal["PAR_P2"] * var1) >> 1)) >> 18
+    var1 = ((32768 + var1) * cal["PAR_P1"]) >> 15
+    pressure = ((1048576 - pRaw) - (var2 >> 12)) * 3125
+    pressure = numpy.where(pressure >= (1 << 30), (pressure // var1) << 1, (pressure << 1) // var1)
+    var1 = (cal["PAR_P9"] * (((pressure >> 3) * (pressure >> 3)) >> 13)) >> 12
+    var2 = ((pressure >> 2) * cal["PAR_P8"]) >> 13
+    var3 = ((pressure >> 8) * (pressure >> 8) * (pressure >> 8) * cal["PAR_P10"]) >> 17
+    pressure = pressure + ((var1 + var2 + var3 + (cal["PAR_P7"] << 7)) >> 4)
+
+    # Humidity
+    tempScaled = numpy.where(temperature < 0, -((-temperature) // 100), temperature // 100)
+    var1 = hRaw - (cal["PAR_H1"] << 4) - (((tempScaled * cal["PAR_H3"]) // 100) >> 1)
+    var2 = (cal["PAR_H2"] * (((tempScaled * cal["PAR_H4"]) // 100) + (((tempScaled * ((tempScaled * cal["PAR_H5"]) // 100)) >> 6) // 100) + (1 << 14))) >> 10
+    var3 = var1 * var2
+    var4 = ((cal["PAR_H6"] << 7) + ((tempScaled * cal["PAR_H7"]) // 100)) >> 4
+    var5 = ((var3 >> 14) * (var3 >> 14)) >> 10
+    var6 = (var4 * var5) >> 1
+    humidity = ((((var3 + var6) >> 10) * 1000) >> 12) // 1000
+
+    # Gas resistance
+    gasRes = ((10000 * (262144 >> gasRange)) // (4096 + ((gResRaw - 512) * 3))) * 100
+
+    return temperature, pressure, humidity, gasRes
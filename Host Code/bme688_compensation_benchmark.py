@@ -0,0 +1,95 @@
+# Benchmark: BME688 compensation calculations, the calc functions one at a time vs the precalculated KitronikBME688Compensation.compensate()
+# Runs on a PC with the simulated bus from host_stubs.py: python3 bme688_compensation_benchmark.py [corpus.csv]
+# The corpus is a CSV file of raw ADC readings, one per line: tRaw,pRaw,hRaw,gResRaw,gasRange
+# Without a corpus file, readings are recorded from the simulated BME688 (plus a sweep of extreme values) and saved to a temporary corpus file
+# Exits with an AssertionError if the results are not bit-identical
+import os
+import sys
+import tempfile
+import time
+
+import host_stubs
+host_stubs.install()
+
+from PicoAirQuality import KitronikBME688
+
+RECORDED = 2000
+REPEATS = 5
+
+bme688 = KitronikBME688()
+bme688.setupGasSensor()
+
+def recordCorpus(fileName):
+    corpus = []
+    for _ in range(RECORDED):
+        bme688.measureData()
+        gasRange = bme688.decodeFieldData(bme688.fieldData)
+        corpus.append((bme688.tRaw, bme688.pRaw, bme688.hRaw, bme688.gResRaw, gasRange))
+    # Extreme values: -40 to 85 degC, the full pressure, humidity and gas ADC ranges and every gas range
+    for tRaw in range(300000, 700001, 20000):
+        for pRaw in range(200000, 600001, 100000):
+            for hRaw in (0, 15000, 30000, 45000, 65535):
+                corpus.append((tRaw, pRaw, hRaw, (tRaw // 7) % 1024, tRaw % 16))
+    f = open(fileName, "w")
+    for reading in corpus:
+        f.write("%d,%d,%d,%d,%d\n" % reading)
+    f.close()
+    return corpus
+
+def loadCorpus(fileName):
+    corpus = []
+    for line in open(fileName):
+        if line.strip():
+            corpus.append(tuple(int(value) for value in line.split(",")))
+    return corpus
+
+# The compensation as collect() did it before: four method calls, each reading the PAR_* values from the object
+def legacy(corpus):
+    results = []
+    for tRaw, pRaw, hRaw, gResRaw, gasRange in corpus:
+        bme688.calcTemperature(tRaw)
+        bme688.intCalcPressure(pRaw)
+        bme688.intCalcHumidity(hRaw, bme688.tRead)
+        bme688.intCalcgRes(gResRaw, gasRange)
+        results.append((bme688.newAmbTemp, bme688.pRead, bme688.hRead, bme688.gRes))
+    return results
+
+def precalculated(corpus):
+    compensate = bme688.compensation.compensate
+    results = []
+    for tRaw, pRaw, hRaw, gResRaw, gasRange in corpus:
+        results.append(compensate(tRaw, pRaw, hRaw, gResRaw, gasRange))
+    return results
+
+def best(function, corpus):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        results = function(corpus)
+        times.append(time.perf_counter() - start)
+    return results, min(times)
+
+if len(sys.argv) > 1:
+    corpusFile = sys.argv[1]
+    corpus = loadCorpus(corpusFile)
+else:
+    corpusFile = os.path.join(tempfile.mkdtemp(), "bme688_raw_corpus.csv")
+    corpus = recordCorpus(corpusFile)
+print("Corpus: %d raw readings (%s)" % (len(corpus), corpusFile))
+
+legacyResults, legacyTime = best(legacy, corpus)
+newResults, newTime = best(precalculated, corpus)
+for reading, old, new in zip(corpus, legacyResults, newResults):
+    assert old == new, "Different results for %s: %s vs %s" % (reading, old, new)
+print("calc functions:       %8.2f us per reading" % (legacyTime * 1e6 / len(corpus)))
+print("compensate():         %8.2f us per reading" % (newTime * 1e6 / len(corpus)))
+print("Results bit-identical, %.2fx faster" % (legacyTime / newTime))
+
+# collect() gives the same readings through compensateReadings()
+bme688.ambTempFlag = True
+bme688.measureData()
+gasRange = bme688.decodeFieldData(bme688.fieldData)
+reading = (bme688.newAmbTemp, bme688.pRead, bme688.hRead, bme688.gRes, bme688.t_fine)
+assert legacy([(bme688.tRaw, bme688.pRaw, bme688.hRaw, bme688.gResRaw, gasRange)])[0] == reading[:4]
+assert bme688.t_fine == reading[4]
+print("PASS")
@@ -0,0 +1,99 @@
+# Benchmark: BME688 gas resistance and heater resistance calculations, before and after the lookup tables
+# Runs on a PC with the simulated bus from host_stubs.py: python3 bme688_gas_lut_benchmark.py
+# Exits with an AssertionError if the tables give different results to the original calculations
+import time
+
+import host_stubs
+host_stubs.install()
+
+from host_stubs import MockI2C
+from PicoAirQuality import KitronikBME688
+
+REPEATS = 5
+PROFILE = [(320, 700), (100, 280), (100, 1400), (100, 4200), (200, 700), (200, 700), (200, 700), (320, 700), (320, 700), (320, 700)]
+PROFILE_CYCLES = 200
+
+bme688 = KitronikBME688()
+bme688.init()
+
+# The calculations as they were before (intCalcgRes() is called the same way as the KitronikBME688 method)
+def legacyIntCalcgRes(self, gasADC, gasRange):
+    var1 = 262144 >> gasRange
+    var2 = gasADC - 512
+    var2 = var2 * 3
+    var2 = 4096 + var2
+    calcGasRes = ((10000 * var1) // var2)
+    self.gRes = calcGasRes * 100
+
+def legacyHeaterRes(ambientTemp, targetTemp):
+    var1 = int((ambientTemp * bme688.PAR_G3) // 1000) << 8
+    var2 = (bme688.PAR_G1 + 784) * (((((bme688.PAR_G2 + 154009) * targetTemp * 5) // 100) + 3276800) // 10)
+    var3 = var1 + (var2 >> 1)
+    var4 = (var3 // (bme688.RES_HEAT_RANGE + 4))
+    var5 = (131 * bme688.RES_HEAT_VAL) + 65536
+    resHeatX100 = (((var4 // var5) - 250) * 34)
+    return ((resHeatX100 + 50) // 100)
+
+def best(function):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+# Every gas ADC value and range
+gasReadings = [(gasADC, gasRange) for gasRange in range(16) for gasADC in range(1024)]
+compensation = bme688.compensation
+for gasADC, gasRange in gasReadings:
+    legacyIntCalcgRes(bme688, gasADC, gasRange)
+    expected = bme688.gRes
+    bme688.intCalcgRes(gasADC, gasRange)
+    assert bme688.gRes == expected, (gasADC, gasRange)
+    assert compensation.compensate(500000, 400000, 30000, gasADC, gasRange)[3] == expected, (gasADC, gasRange)
+
+def runLegacyGas():
+    for gasADC, gasRange in gasReadings:
+        legacyIntCalcgRes(bme688, gasADC, gasRange)
+
+def runTableGas():
+    intCalcgRes = KitronikBME688.intCalcgRes
+    for gasADC, gasRange in gasReadings:
+        intCalcgRes(bme688, gasADC, gasRange)
+
+legacyTime = best(runLegacyGas)
+tableTime = best(runTableGas)
+print("Gas resistance:     %.3f us per sample before, %.3f us with the range table (%.2fx)" % (legacyTime * 1e6 / len(gasReadings), tableTime * 1e6 / len(gasReadings), legacyTime / tableTime))
+
+# Heater resistance over -40 to 85 degC ambient (including the float ambient temperature from baselines.txt) and 100 to 400 degC target
+for ambientTemp in list(range(-4000, 8501, 7)) + [2345.67, -123.4]:
+    for targetTemp in (100, 200, 250, 300, 320, 400):
+        assert bme688.intConvertGasTargetTemp(ambientTemp, targetTemp) == legacyHeaterRes(ambientTemp, targetTemp), (ambientTemp, targetTemp)
+assert len(bme688.heaterCache) <= bme688.HEATER_CACHE_SIZE
+
+# Reprogramming a 10 step heater profile every cycle, at a slowly drifting ambient temperature
+ambientTemps = [2300 + (cycle // 20) for cycle in range(PROFILE_CYCLES)]
+
+def runLegacyHeater():
+    for ambientTemp in ambientTemps:
+        for targetTemp, duration in PROFILE:
+            legacyHeaterRes(ambientTemp, targetTemp)
+
+def runCachedHeater():
+    for ambientTemp in ambientTemps:
+        for targetTemp, duration in PROFILE:
+            bme688.intConvertGasTargetTemp(ambientTemp, targetTemp)
+
+bme688.heaterCache.clear()
+legacyTime = best(runLegacyHeater)
+cachedTime = best(runCachedHeater)
+steps = PROFILE_CYCLES * len(PROFILE)
+print("Heater resistance:  %.3f us per step before, %.3f us from the cache (%.2fx)" % (legacyTime * 1e6 / steps, cachedTime * 1e6 / steps, legacyTime / cachedTime))
+
+# The whole profile set up, including the I2C write
+MockI2C.resetCounters()
+start = time.perf_counter()
+for cycle in range(20):
+    bme688.setupHeaterProfile(PROFILE)
+print("setupHeaterProfile(): %.1f us per call on the PC, %d I2C transactions per call" % ((time.perf_counter() - start) * 1e6 / 20, MockI2C.transactions / 20))
+print("PASS")
@@ -0,0 +1,55 @@
+# Check: BME688 measurements do not busy-wait on the I2C bus
+# Runs on a PC with the simulated bus from host_stubs.py: python3 bme688_nonblocking_check.py
+# Exits with an AssertionError if a measurement polls the BME688 while it is still converting
+import host_stubs
+host_stubs.install()
+
+from host_stubs import MockI2C, clock
+from PicoAirQuality import KitronikBME688
+
+bme688 = KitronikBME688()
+bme688.setupGasSensor()
+
+# How the old measureData() waited: reading MEAS_STATUS_0 in a tight loop until the New Data bit was set
+def legacyStatusPolls(bme688):
+    oSampleTP = bme688.getUInt8(bme688.CTRL_MEAS)
+    bme688.i2c.writeto_mem(bme688.CHIP_ADDRESS, bme688.CTRL_MEAS, str((0x01 | oSampleTP)))
+    polls = 1
+    while ((bme688.getUInt8(bme688.MEAS_STATUS_0) & 0x80) >> 7 != 1):
+        polls = polls + 1
+    bme688.readFieldData()
+    return polls
+
+MockI2C.resetCounters()
+print("Busy-wait (before): %d status reads per measurement" % legacyStatusPolls(bme688))
+
+# measureData() sleeps for the expected conversion time, then reads the results once
+bme688.calcMeasurementDuration()
+MockI2C.resetCounters()
+clock.sleepCalls = 0
+start = clock.now_us()
+bme688.measureData()
+elapsedMs = (clock.now_us() - start) / 1000
+print("measureData(): %d I2C transactions, %d sleep calls, %.1f ms" % (MockI2C.transactions, clock.sleepCalls, elapsedMs))
+assert MockI2C.transactions == 3, "Expected: read CTRL_MEAS, write CTRL_MEAS, one burst read of the results"
+assert clock.sleepCalls == 1, "Results should be ready after the first (expected duration) sleep"
+
+# startMeasurement() / poll() / collect(): no bus traffic while the measurement is in progress
+MockI2C.resetCounters()
+duration = bme688.startMeasurement()
+assert duration == bme688.measDuration
+startTransactions = MockI2C.transactions
+otherWork = 0
+while not bme688.poll():
+    if otherWork > 10000:
+        raise AssertionError("Measurement never finished")
+    assert MockI2C.transactions == startTransactions, "poll() used the bus before the expected conversion time"
+    otherWork = otherWork + 1
+    clock.sleep_us(1000)    # 1ms of other work in the main loop (buttons, screen, LEDs...)
+assert bme688.collect()
+assert not bme688.collect(), "Results can only be collected once"
+print("startMeasurement(): expected %d ms, %d ms of other work done while measuring, %d I2C transactions in total" % (duration, otherWork, MockI2C.transactions))
+assert otherWork >= duration - 1
+assert MockI2C.transactions == 3
+print("Temperature %.2f C, Pressure %d Pa, Humidity %d %%, Gas %d Ohms" % (bme688.readTemperature(), bme688.readPressure(), bme688.readHumidity(), bme688.readGasRes()))
+print("PASS")
@@ -0,0 +1,86 @@
+# Check and benchmark: BME688 parallel mode heater profiles compared with stepping the heater temperature in forced mode
+# Runs on a PC with the simulated bus from host_stubs.py: python3 bme688_parallel_check.py
+# Exits with an AssertionError if a parallel mode field is missed, repeated or out of order
+import host_stubs
+host_stubs.install()
+
+from host_stubs import MockI2C, clock
+from PicoAirQuality import KitronikBME688
+
+# A 10 step profile: (target temperature in degrees C, step length in ms)
+PROFILE = [(320, 700), (100, 280), (100, 1400), (100, 4200), (200, 700), (200, 700), (200, 700), (320, 700), (320, 700), (320, 700)]
+FINGERPRINTS = 5
+# The same temperatures with the 180ms heater time used in forced mode, to compare the reading rate
+SWEEP = [(targetTemp, 180) for targetTemp, duration in PROFILE]
+SWEEP_READINGS = 50
+
+bme688 = KitronikBME688()
+bme688.setupGasSensor()
+
+# Forced mode: reprogram heater step 0 and take a reading for every temperature in the profile
+MockI2C.resetCounters()
+start = clock.now_us()
+forced = []
+while len(forced) < SWEEP_READINGS:
+    targetTemp, duration = SWEEP[len(forced) % len(SWEEP)]
+    bme688.setupGasSensor(targetTemp, duration)
+    bme688.measureData()
+    forced.append(bme688.readGasRes())
+forcedMs = (clock.now_us() - start) / 1000
+print("Forced mode sweep:   %d gas readings  %7.1f ms  %.1f I2C transactions per reading" % (len(forced), forcedMs, MockI2C.transactions / len(forced)))
+
+# Parallel mode: the BME688 runs through the temperatures by itself, the Pico reads the three data fields in one burst
+bme688.setupHeaterProfile(SWEEP, 180)
+bme688.startParallelMode()
+MockI2C.resetCounters()
+start = clock.now_us()
+swept = []
+while len(swept) < SWEEP_READINGS:
+    clock.sleep_us(bme688.profileDurations[0] * 1000)
+    swept.extend(bme688.readParallelData())
+parallelMs = (clock.now_us() - start) / 1000
+assert bme688.missedFields == 0
+assert [gasIndex for gasIndex, gasRes in swept] == [i % len(SWEEP) for i in range(len(swept))]
+print("Parallel mode sweep: %d gas readings  %7.1f ms  %.1f I2C transactions per reading" % (len(swept), parallelMs, MockI2C.transactions / len(swept)))
+print("  %.1f gas readings per second (forced mode: %.1f)" % (len(swept) * 1000 / parallelMs, len(forced) * 1000 / forcedMs))
+
+# Fingerprints from a profile with different step lengths
+MockI2C.resetCounters()
+bme688.setupHeaterProfile(PROFILE)
+assert len(bme688.profileDurations) == 10
+print("Profile step lengths (ms):", bme688.profileDurations, " whole profile %d ms" % bme688.profileCycleTime)
+setupTransactions = MockI2C.transactions
+bme688.startParallelMode()
+
+MockI2C.resetCounters()
+start = clock.now_us()
+readings = []
+fingerprints = []
+expectedIndex = 0
+while len(fingerprints) < FINGERPRINTS:
+    clock.sleep_us(100_000)    # Read every 100ms: the shortest step is longer than this, so no more than one field can be waiting
+    for gasIndex, gasRes in bme688.readParallelData():
+        assert gasIndex == expectedIndex, "Expected gas index %d, got %d" % (expectedIndex, gasIndex)
+        expectedIndex = (expectedIndex + 1) % len(PROFILE)
+        readings.append(gasRes)
+    fingerprint = bme688.readGasFingerprint()
+    if fingerprint is not None:
+        assert len(fingerprint) == len(PROFILE)
+        fingerprints.append(fingerprint)
+parallelMs = (clock.now_us() - start) / 1000
+assert bme688.missedFields == 0, "Fields were overwritten before they were read"
+print("Profile:             %d gas readings, %d complete fingerprints in %.1f ms (%d I2C transactions for the profile set up)" % (len(readings), len(fingerprints), parallelMs, setupTransactions))
+print("  Temperature %.2f C, Pressure %d Pa, Humidity %d %%" % (bme688.readTemperature(), bme688.readPressure(), bme688.readHumidity()))
+
+# Reading too slowly loses fields - this is counted rather than silently ignored
+clock.sleep_us(bme688.profileCycleTime * 1000)
+bme688.readParallelData()
+print("  Reading once per profile: %d fields missed" % bme688.missedFields)
+assert bme688.missedFields > 0
+
+# Going back to forced mode restores the setupGasSensor() settings
+bme688.stopParallelMode()
+assert not bme688.parallelMode and bme688.gasInit
+bme688.measureData()
+assert bme688.readGasRes() > 0
+print("PASS")
@@ -0,0 +1,44 @@
+# Benchmark: I2C traffic needed to read one BME688 sample, register-by-register vs burst read
+# Runs on a PC with the simulated bus from host_stubs.py: python3 bme688_read_benchmark.py
+import host_stubs
+host_stubs.install()
+
+from host_stubs import MockI2C
+from PicoAirQuality import KitronikBME688
+
+SAMPLES = 100
+BUS_FREQ = 100_000
+
+# The data read-out as it was done before: one readfrom_mem() per register
+def legacyReadout(bme688):
+    heaterStable = (bme688.getUInt8(bme688.GAS_RES_LSB_0) & 0x10) >> 4
+    bme688.tRaw = (bme688.getUInt8(bme688.TEMP_MSB_0) << 12) | (bme688.getUInt8(bme688.TEMP_LSB_0) << 4) | (bme688.getUInt8(bme688.TEMP_XLSB_0) >> 4)
+    bme688.pRaw = (bme688.getUInt8(bme688.PRESS_MSB_0) << 12) | (bme688.getUInt8(bme688.PRESS_LSB_0) << 4) | (bme688.getUInt8(bme688.PRESS_XLSB_0) >> 4)
+    bme688.hRaw = (bme688.getUInt8(bme688.HUMID_MSB_0) << 8) | (bme688.getUInt8(bme688.HUMID_LSB_0) >> 4)
+    bme688.gResRaw = (bme688.getUInt8(bme688.GAS_RES_MSB_0) << 2) | bme688.getUInt8(bme688.GAS_RES_LSB_0) >> 6
+    return bme688.getUInt8(bme688.GAS_RES_LSB_0) & 0x0F
+
+def burstReadout(bme688):
+    return bme688.decodeFieldData(bme688.readFieldData())
+
+def run(name, readout, bme688):
+    MockI2C.resetCounters()
+    results = []
+    for _ in range(SAMPLES):
+        gasRange = readout(bme688)
+        results.append((bme688.tRaw, bme688.pRaw, bme688.hRaw, bme688.gResRaw, gasRange))
+    transactions = MockI2C.transactions / SAMPLES
+    moved = MockI2C.bytesMoved / SAMPLES
+    busUs = MockI2C.busyUs / SAMPLES
+    print("%-20s %6.1f transactions  %6.1f bytes  %8.1f us bus time per sample" % (name, transactions, moved, busUs))
+    return results, busUs
+
+bme688 = KitronikBME688()
+bme688.setupGasSensor()
+bme688.measureData()    # Leave a completed measurement in the data registers
+
+print("BME688 data read-out, %d samples at %d Hz" % (SAMPLES, BUS_FREQ))
+legacyResults, legacyUs = run("register-by-register", legacyReadout, bme688)
+burstResults, burstUs = run("burst read", burstReadout, bme688)
+assert legacyResults == burstResults, "Burst read decoded different values"
+print("Decoded values identical, bus time reduced %.1fx" % (legacyUs / burstUs))
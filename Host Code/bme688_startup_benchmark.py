@@ -0,0 +1,59 @@
+# Benchmark: KitronikBME688 construction with and without the calibration cache (cold vs warm boot)
+# Runs on a PC with the simulated bus from host_stubs.py: python3 bme688_startup_benchmark.py
+import os
+import tempfile
+
+import host_stubs
+host_stubs.install()
+
+from host_stubs import MockI2C, MockBME688, clock
+from PicoAirQuality import KitronikBME688
+
+CACHE_FILE = os.path.join(tempfile.mkdtemp(), "bme688_calibration.bin")
+
+# The calibration registers as they were read before, one readfrom_mem() each
+LEGACY_REGISTERS = (0xEA, 0xE9, 0x8B, 0x8A, 0x8C, 0x8F, 0x8E, 0x91, 0x90, 0x92, 0x95, 0x94, 0x97, 0x96, 0x99, 0x98, 0x9D, 0x9C,
+                    0x9F, 0x9E, 0xA0, 0xE2, 0xE3, 0xE1, 0xE4, 0xE5, 0xE6, 0xE7, 0xE8, 0xED, 0xEB, 0xEC, 0xEE, 0x02, 0x00)
+
+def timeLegacy(name, bme688):
+    MockI2C.resetCounters()
+    start = clock.now_us()
+    for register in LEGACY_REGISTERS:
+        bme688.getUInt8(register)
+    print("%-36s %3d transactions  %3d bytes  %7.1f us" % (name, MockI2C.transactions, MockI2C.bytesMoved, clock.now_us() - start))
+
+# Time only the calibration load (the rest of construction - soft reset, OLED setup, first reading - is the same in every case)
+def timeCalibration(name, bme688):
+    MockI2C.resetCounters()
+    start = clock.now_us()
+    bme688.loadCalibration()
+    print("%-36s %3d transactions  %3d bytes  %7.1f us" % (name, MockI2C.transactions, MockI2C.bytesMoved, clock.now_us() - start))
+    for key, value in MockBME688.CALIBRATION.items():
+        assert getattr(bme688, key) == value, key
+
+def timeConstruction(name, calibrationCache):
+    MockI2C.resetCounters()
+    start = clock.now_us()
+    bme688 = KitronikBME688(calibrationCache=calibrationCache)
+    bme688.init()
+    print("%-36s %3d transactions  %3d bytes  %7.1f ms" % (name, MockI2C.transactions, MockI2C.bytesMoved, (clock.now_us() - start) / 1000))
+    return bme688
+
+print("Calibration load:")
+bme688 = KitronikBME688()
+timeLegacy("  register-by-register (before)", bme688)
+timeCalibration("  no cache, burst read", bme688)
+bme688.calibrationCache = CACHE_FILE
+timeCalibration("  cold (burst read, write cache)", bme688)
+timeCalibration("  warm (from cache)", bme688)
+
+print("Construction and initialisation (includes the 1s soft reset wait and OLED setup):")
+timeConstruction("  cold", None)
+timeConstruction("  warm", CACHE_FILE)
+
+# A corrupted cache must be ignored and rewritten
+with open(CACHE_FILE, "r+b") as f:
+    f.seek(10)
+    f.write(b"\xFF")
+bme688.calibrationCache = CACHE_FILE
+timeCalibration("Corrupted cache (falls back to I2C)", bme688)
@@ -0,0 +1,123 @@
+# Check and benchmark: KitronikChart (PicoAirQualityChart.py) showing the last 24 hours of three BME688 readings, one every 10 seconds, on the OLED screen
+# Runs on a PC: python3 chart_check.py
+# The readings are made up: slow daily changes plus sensor noise, with a gap (the board switched off for two hours) and a spike which makes the chart rescale
+# Counts the chart columns drawn for each draw() and the RAM the chart keeps, against keeping every reading in the span
+# Exits with an AssertionError if the chart drawn a bit at a time is ever different to the same chart drawn from scratch, or the screen is different to what should be showing
+# The log file is written to a temporary folder
+import math
+import os
+import random
+import tempfile
+import time
+
+import host_stubs
+host_stubs.install()
+
+from host_stubs import MockI2C, oled as display
+from PicoAirQuality import KitronikOLED
+from PicoAirQualityChart import KitronikChart
+from PicoAirQualityLogging import KitronikDeltaLogger
+from PicoAirQualityReader import KitronikLogReader, timestamp
+
+SERIES = (("Temperature", "solid", None, None), ("Humidity", "dotted", 0, 100), ("IAQ", "solid", None, None))
+DAY = 86400
+INTERVAL = 10
+
+def readings(days, seed):
+    generator = random.Random(seed)
+    start = timestamp(2025, 6, 1)
+    iaq = 50
+    for n in range((days * DAY) // INTERVAL):
+        t = start + (n * INTERVAL)
+        if (DAY + 3600 <= (t - start) < DAY + (3 * 3600)):
+            continue    # Switched off
+        day = math.sin(2 * math.pi * ((t - start) / DAY))
+        iaq = min(500, max(0, iaq + generator.randrange(-2, 3)))
+        if ((t - start) == DAY + (10 * 3600)):
+            iaq = 400    # Someone painting the room
+        yield t, (round(21 + (3 * day) + generator.gauss(0, 0.02), 2), round(45 - (8 * day) + generator.gauss(0, 0.1), 2), iaq)
+
+def newChart(oled):
+    chart = KitronikChart(oled, span=DAY, tick=6 * 3600)
+    for name, style, low, high in SERIES:
+        chart.addSeries(name, style, low, high)
+    return chart
+
+def chartPixels(chart):
+    return [[chart.frame.pixel(x, y) for x in range(chart.width)] for y in range(chart.height)]
+
+# The same readings drawn from scratch, to the same ranges
+def fromScratch(values, ranges):
+    chart = newChart(KitronikOLED())
+    for t, reading in values:
+        chart.addReading(*reading, timestamp=t)
+    chart.lows, chart.highs, chart.scales = [list(r) for r in ranges]
+    chart.checkRanges = False
+    chart.draw()
+    return chart
+
+# Draw after every minute of readings, as a program showing the chart would
+MockI2C.reset()
+oled = KitronikOLED()
+oled.setRefreshMode("dirty")
+oled.init()
+oled.displayText("Last 24 hours", 1)
+chart = newChart(oled)
+values = list(readings(3, 25))
+draws = 0
+fullRedraws = 0
+recent = []
+for n, (t, reading) in enumerate(values):
+    chart.addReading(*reading, timestamp=t)
+    recent.append((t, reading))
+    if (t % 60 == 0):
+        drawn = chart.columnsDrawn
+        chart.draw()
+        ranges = (list(chart.lows), list(chart.highs), list(chart.scales))
+        if (chart.columnsDrawn - drawn >= chart.width):
+            fullRedraws = fullRedraws + 1
+        draws = draws + 1
+        if (draws % 97 == 0):
+            recent = [(rt, r) for rt, r in recent if rt > t - DAY]
+            assert chartPixels(chart) == chartPixels(fromScratch(recent, ranges)), n
+            oled.show()
+            assert display().gddram == oled.buffer
+
+# The lowest and highest values kept for each column are the same as working them out from every reading
+recent = [(rt, r) for rt, r in values if rt // chart.secondsPerColumn > chart.newest - chart.width]
+for column in range(chart.newest - chart.width + 1, chart.newest + 1):
+    inColumn = [r for rt, r in recent if rt // chart.secondsPerColumn == column]
+    slot = column % chart.width
+    for s in range(len(SERIES)):
+        if inColumn:
+            assert abs(chart.mins[s][slot] - min(r[s] for r in inColumn)) < 0.01 and abs(chart.maxs[s][slot] - max(r[s] for r in inColumn)) < 0.01
+        else:
+            assert chart.columns[slot] != column or chart.mins[s][slot] > chart.maxs[s][slot]
+
+ram = len(chart.frame.fbBuffer) + chart.columns.itemsize * len(chart.columns) + sum(a.itemsize * len(a) for a in chart.mins + chart.maxs)
+everyReading = (DAY // INTERVAL) * (len(SERIES) + 1) * 4
+print("%d readings, draw() every minute (%d draws), %d seconds per column:" % (len(values), draws, chart.secondsPerColumn))
+print("    Columns drawn per draw(): %.2f (a whole chart is %d), whole chart redrawn %d times" % (chart.columnsDrawn / draws, chart.width, fullRedraws))
+print("    RAM kept by the chart: %d bytes, against %d bytes to keep every reading in 24 hours as 4 byte numbers" % (ram, everyReading))
+assert chart.columnsDrawn / draws < 4 and ram * 20 < everyReading
+
+# Loading the chart from a log gives the same chart as adding the readings as they happen
+os.chdir(tempfile.mkdtemp())
+now = [0]
+time.time = lambda: now[0]
+log = KitronikDeltaLogger("chart_log.dlt", "semicolon")
+log.MAX_FILE_SIZE = 100000000
+log.setFlushPolicy(entries=100)
+log.nameColumnHeadings(("Temperature", 2), ("Humidity", 2), ("IAQ", 0))
+for t, reading in values:
+    now[0] = t
+    log.storeDataEntry(*reading)
+log.flush()
+loaded = newChart(KitronikOLED())
+loaded.loadLog(KitronikLogReader("chart_log.dlt"), end=values[-1][0])
+loaded.lows, loaded.highs, loaded.scales = list(chart.lows), list(chart.highs), list(chart.scales)
+loaded.checkRanges = False
+loaded.draw()
+assert chartPixels(loaded) == chartPixels(chart)
+print("Chart loaded from a KitronikDeltaLogger log with loadLog() matches the chart drawn as the readings came in")
+print("PASS")
@@ -0,0 +1,157 @@
+# Check and benchmark: file size and time to store an entry, KitronikDataLogger (text) vs KitronikBinaryLogger vs KitronikDeltaLogger
+# Runs on a PC: python3 delta_logger_benchmark.py [recorded_log.txt]
+# With a recorded log (a KitronikDataLogger text log copied off the Pico, with "Date" and "Time" columns and Temperature, Pressure, Humidity, IAQ and eCO2), its readings are logged again in each format
+# Without one, a day of readings (one every 10 seconds) is made up: slow daily changes plus sensor noise, like a room's BME688 readings - the sizes for real readings will be different
+# The log files are written to a temporary folder
+# Exits with an AssertionError if KitronikLogReader does not read back the values which were stored
+import os
+import math
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import host_stubs
+host_stubs.install()
+host_stubs.countFiles()
+
+from host_stubs import files
+from PicoAirQuality import KitronikDataLogger
+from PicoAirQualityLogging import KitronikBinaryLogger, KitronikDeltaLogger
+from PicoAirQualityReader import KitronikLogReader, timestamp
+
+COLUMNS = [("Temperature", 2), ("Pressure", 0), ("Humidity", 2), ("IAQ", 0), ("eCO2", 0)]
+NAMES = [name for name, places in COLUMNS]
+
+# The readings, as (time, (temperature, pressure, humidity, iaq, eco2))
+if (len(sys.argv) > 1):
+    source = "recorded log " + sys.argv[1]
+    readings = [(record[0], record[1:]) for record in KitronikLogReader(sys.argv[1], "semicolon").readRecords(NAMES) if None not in record]
+    if (len(readings) == 0):
+        sys.exit("No entries with Date, Time, " + ", ".join(NAMES) + " columns in " + sys.argv[1])
+else:
+    source = "made up day (no recorded log given)"
+    generator = random.Random(19)
+    readings = []
+    start = timestamp(2025, 6, 1)
+    iaq = 50
+    for n in range(8640):
+        t = start + (n * 10)
+        day = math.sin(2 * math.pi * (n / 8640))
+        iaq = min(500, max(0, iaq + generator.randrange(-2, 3)))
+        readings.append((t, (round(21 + (3 * day) + generator.gauss(0, 0.02), 2), int(101325 + (150 * day) + generator.gauss(0, 3)), round(45 - (8 * day) + generator.gauss(0, 0.1), 2),
+                             iaq, 500 + (4 * iaq) + generator.randrange(-1, 2))))
+
+os.chdir(tempfile.mkdtemp())
+
+now = [0]
+time.time = lambda: now[0]
+
+def projectInfo(log):
+    log.writeProjectInfo("Kitronik Data Logger - Pico Smart Air Quality Board - www.kitronik.co.uk", "Name: User Name", "Subject: Delta log")
+    log.MAX_FILE_SIZE = 100000000
+    log.setFlushPolicy(entries=100)
+
+# The text log stores the date and time as text, the same as the Pico example code
+def storeText(log, t, values):
+    g = time.gmtime(t)
+    log.storeDataEntry("%02d/%02d/%04d" % (g[2], g[1], g[0]), "%02d:%02d:%02d" % (g[3], g[4], g[5]), *values)
+
+def storeValues(log, t, values):
+    log.storeDataEntry(*values)
+
+def run(log, headings, store):
+    projectInfo(log)
+    log.nameColumnHeadings(*headings)
+    host_stubs.resetFileCounters()
+    start = time.perf_counter()
+    for t, values in readings:
+        now[0] = t
+        store(log, t, values)
+    log.flush()
+    elapsed = time.perf_counter() - start
+    return log.checkFileSize(), elapsed * 1e6 / len(readings)
+
+results = [("KitronikDataLogger", ) + run(KitronikDataLogger("data_log.txt", "semicolon"), ["Date", "Time"] + COLUMNS, storeText),
+           ("KitronikBinaryLogger", ) + run(KitronikBinaryLogger("data_log.bin", "semicolon"), NAMES, storeValues)]
+for interval in (10, 60, 600):
+    log = KitronikDeltaLogger("delta_%d.dlt" % interval, "semicolon", keyframeInterval=interval)
+    results.append(("KitronikDeltaLogger, keyframe every %d" % interval, ) + run(log, COLUMNS, storeValues))
+
+print("%d readings from %s" % (len(readings), source))
+textSize = results[0][1]
+for name, size, cost in results:
+    print("%-38s %8d bytes  %5.1f bytes per entry  %5.1fx smaller than text  %5.1f us per entry (PC time)" % (name + ":", size, size / len(readings), textSize / size, cost))
+
+# Everything reads back the same as it was stored
+reader = KitronikLogReader("delta_60.dlt", "semicolon")
+expected = [(t, ) + tuple(values) for t, values in readings]
+assert [record[1:] for record in reader.readRecords(["Timestamp"] + NAMES)] == expected
+assert list(reader.readRecords(NAMES)) == expected
+assert list(KitronikLogReader("delta_10.dlt").readRecords(["eCO2", "Light", "Temperature"])) == [(r[0], r[5], None, r[1]) for r in expected]
+
+# A time range starts at the keyframe before it, rather than the start of the file
+first = readings[len(readings) // 2][0] + 5
+last = first + 3600
+for name in ("data_log.txt", "delta_60.dlt"):
+    host_stubs.resetFileCounters()
+    records = list(KitronikLogReader(name, "semicolon").readRecords(NAMES, first, last))
+    assert records == [r for r in expected if first <= r[0] <= last], name
+    print("An hour from the middle of %-13s %8d bytes read" % (name + ":", files["bytesRead"]))
+summaries = list(reader.readSummaries(["Temperature"], 3600))
+assert len(summaries) == len(set(t - (t % 3600) for t, values in readings))
+
+# A part written last entry (the power was cut while writing) ends the log at the entry before it
+f = open("delta_60.dlt", "r+b")
+size = f.seek(0, 2)
+f.close()
+for cut in range(1, 12):
+    shutil.copy("delta_60.dlt", "cut.dlt")
+    f = open("cut.dlt", "r+b")
+    f.truncate(size - cut)
+    f.close()
+    records = list(KitronikLogReader("cut.dlt").readRecords(NAMES))
+    assert records == expected[:len(records)] and len(records) >= len(expected) - 2
+
+# When the log is full, the oldest entries are removed up to a keyframe, so the rest still read back
+log = KitronikDeltaLogger("full.dlt", "semicolon", keyframeInterval=30)
+projectInfo(log)
+log.MAX_FILE_SIZE = 6000
+log.nameColumnHeadings(*COLUMNS)
+for t, values in readings:
+    now[0] = t
+    log.storeDataEntry(*values)
+log.flush()
+assert log.checkFileSize() <= 6000
+records = list(KitronikLogReader("full.dlt").readRecords(NAMES))
+assert len(records) > 100 and records == expected[len(expected) - len(records):]
+middle = records[len(records) // 2][0] + 5
+assert list(KitronikLogReader("full.dlt").readRecords(NAMES, middle, middle + 600)) == [r for r in records if middle <= r[0] <= middle + 600]
+
+# Buffered entries written after the whole file is erased to make space (no keyframe to cut at) start with a keyframe, so they still read back
+log = KitronikDeltaLogger("erased.dlt", "semicolon", keyframeInterval=600)
+projectInfo(log)
+log.MAX_FILE_SIZE = 1500
+log.nameColumnHeadings(*COLUMNS)
+for t, values in readings[:1000]:
+    now[0] = t
+    log.storeDataEntry(*values)
+log.flush()
+assert log.checkFileSize() <= 1500
+records = list(KitronikLogReader("erased.dlt").readRecords(NAMES))
+assert len(records) >= 100 and records == expected[1000 - len(records):1000]
+
+# The same columns carry on in the same file, different columns start a new one
+log = KitronikDeltaLogger("delta_60.dlt", "semicolon")
+projectInfo(log)
+log.nameColumnHeadings(*COLUMNS)
+now[0] = readings[-1][0] + 10
+log.storeDataEntry(*readings[-1][1])
+log.flush()
+assert list(reader.readRecords(NAMES))[-1] == (now[0], ) + tuple(readings[-1][1])
+log = KitronikDeltaLogger("delta_60.dlt", "semicolon")
+projectInfo(log)
+log.nameColumnHeadings(*COLUMNS[:3])
+assert os.path.exists("delta_60.dlt.old") and os.path.exists("delta_60.dlt.keys.old")
+print("PASS")
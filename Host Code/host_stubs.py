@@ -0,0 +1,797 @@
+# Host-side stand-ins for the MicroPython modules used by PicoAirQuality.py
+# These allow the library to be imported and exercised on a PC (CPython 3) for benchmarking and checking, no Pico required
+# Call install() before importing PicoAirQuality:
+#   import host_stubs
+#   host_stubs.install()
+#   from PicoAirQuality import KitronikBME688
+# The I2C bus is simulated with a BME688 at 0x77 and an SSD1306 OLED at 0x3C, and counts every transaction and byte sent
+# Time is virtual by default: sleep_ms() and I2C transactions advance the clock instantly, so benchmarks report 'Pico time' not PC time
+# Call countFiles() to also count the file system operations (opens, writes, bytes written...) made through open(), os.remove() & os.rename()
+import builtins
+import os
+import sys
+import time
+import types
+
+LIBRARY_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# The virtual clock used by the stubbed time functions
+# In 'real' mode the clock follows the PC clock instead (useful when running alongside CPython asyncio)
+class VirtualClock:
+    def __init__(self):
+        self.us = 0
+        self.real = False
+        self.realStart = time.perf_counter()
+        self.sleepCalls = 0
+        self.sleptUs = 0
+
+    def useRealTime(self, real=True):
+        self.real = real
+        self.realStart = time.perf_counter() - (self.us / 1000000)
+
+    def now_us(self):
+        if self.real:
+            self.us = int((time.perf_counter() - self.realStart) * 1000000)
+        return self.us
+
+    def advance_us(self, us):
+        if not self.real:
+            self.us = self.us + int(us)
+
+    def sleep_us(self, us):
+        self.sleepCalls = self.sleepCalls + 1
+        self.sleptUs = self.sleptUs + int(us)
+        if self.real:
+            time.sleep(us / 1000000)
+        else:
+            self.us = self.us + int(us)
+
+clock = VirtualClock()
+
+# Bus timing estimate: each byte on the wire is 9 clocks (8 data + ACK), plus start/stop/restart conditions
+def busTimeUs(bytesOnWire, conditions, freq):
+    return ((bytesOnWire * 9) + (conditions * 2)) * 1000000 / freq
+
+# Simulated BME688: a 256 byte register map with realistic calibration data and forced/parallel mode conversions
+class MockBME688:
+    # Calibration coefficients written into the register map (typical values for a BME68x part)
+    CALIBRATION = {
+        "PAR_T1": 26125, "PAR_T2": 26370, "PAR_T3": 3,
+        "PAR_P1": 35464, "PAR_P2": -10378, "PAR_P3": 88, "PAR_P4": 7000, "PAR_P5": -30,
+        "PAR_P6": 30, "PAR_P7": 31, "PAR_P8": -252, "PAR_P9": -3000, "PAR_P10": 30,
+        "PAR_H1": 769, "PAR_H2": 1010, "PAR_H3": 0, "PAR_H4": 45, "PAR_H5": 20, "PAR_H6": 120, "PAR_H7": -100,
+        "PAR_G1": -30, "PAR_G2": -5969, "PAR_G3": 18, "RES_HEAT_RANGE": 1, "RES_HEAT_VAL": 46,
+    }
+    OS_CYCLES = (0, 1, 2, 4, 8, 16, 16, 16)
+
+    def __init__(self, seed=1):
+        self.regs = bytearray(256)
+        self.seed = seed
+        self.readyAt = None
+        self.mode = 0
+        self.measurements = 0
+        self.subMeasIndex = 0
+        self.parallelNext = None
+        self.parallelStep = 0
+        self.resetCount = 0
+        self.loadCalibration(self.CALIBRATION)
+        self.regs[0xD0] = 0x61     # Chip ID
+        self.regs[0xF0] = 0x01     # Variant ID (BME688)
+
+    def put16(self, lsbReg, msbReg, value):
+        value = value & 0xFFFF
+        self.regs[lsbReg] = value & 0xFF
+        self.regs[msbReg] = value >> 8
+
+    def loadCalibration(self, c):
+        r = self.regs
+        self.put16(0xE9, 0xEA, c["PAR_T1"])
+        self.put16(0x8A, 0x8B, c["PAR_T2"])
+        r[0x8C] = c["PAR_T3"] & 0xFF
+        self.put16(0x8E, 0x8F, c["PAR_P1"])
+        self.put16(0x90, 0x91, c["PAR_P2"])
+        r[0x92] = c["PAR_P3"] & 0xFF
+        self.put16(0x94, 0x95, c["PAR_P4"])
+        self.put16(0x96, 0x97, c["PAR_P5"])
+        r[0x99] = c["PAR_P6"] & 0xFF
+        r[0x98] = c["PAR_P7"] & 0xFF
+        self.put16(0x9C, 0x9D, c["PAR_P8"])
+        self.put16(0x9E, 0x9F, c["PAR_P9"])
+        r[0xA0] = c["PAR_P10"] & 0xFF
+        r[0xE3] = (c["PAR_H1"] >> 4) & 0xFF
+        r[0xE1] = (c["PAR_H2"] >> 4) & 0xFF
+        r[0xE2] = ((c["PAR_H2"] & 0x0F) << 4) | (c["PAR_H1"] & 0x0F)
+        r[0xE4] = c["PAR_H3"] & 0xFF
+        r[0xE5] = c["PAR_H4"] & 0xFF
+        r[0xE6] = c["PAR_H5"] & 0xFF
+        r[0xE7] = c["PAR_H6"] & 0xFF
+        r[0xE8] = c["PAR_H7"] & 0xFF
+        r[0xED] = c["PAR_G1"] & 0xFF
+        self.put16(0xEC, 0xEB, c["PAR_G2"])
+        r[0xEE] = c["PAR_G3"] & 0xFF
+        r[0x02] = (c["RES_HEAT_RANGE"] & 0x03) << 4
+        r[0x00] = c["RES_HEAT_VAL"] & 0xFF
+
+    # Deterministic pseudo-random walk so that successive measurements look like a real (slowly changing) room
+    def nextRandom(self):
+        self.seed = (self.seed * 1103515245 + 12345) & 0x7FFFFFFF
+        return self.seed
+
+    def rawSample(self, heaterStep):
+        n = self.measurements
+        tRaw = 491000 + ((n * 37) % 900) + (self.nextRandom() % 64)
+        pRaw = 360000 + ((n * 11) % 300) + (self.nextRandom() % 32)
+        hRaw = 21000 + ((n * 13) % 800) + (self.nextRandom() % 16)
+        gRaw = 420 + (heaterStep * 25) + (self.nextRandom() % 200)
+        gRange = 4 + (heaterStep % 4)
+        return tRaw, pRaw, hRaw, gRaw, gRange
+
+    def gasEnabled(self):
+        return (self.regs[0x71] & 0x20) and not (self.regs[0x70] & 0x08)
+
+    def heaterDurationMs(self, step):
+        code = self.regs[0x64 + step]
+        return (code & 0x3F) * (1 << ((code >> 6) * 2))
+
+    def conversionUs(self):
+        osT = (self.regs[0x74] >> 5) & 0x07
+        osP = (self.regs[0x74] >> 2) & 0x07
+        osH = self.regs[0x72] & 0x07
+        cycles = self.OS_CYCLES[osT] + self.OS_CYCLES[osP] + self.OS_CYCLES[osH]
+        return (cycles * 1963) + (477 * 4) + (477 * 5)
+
+    def writeField(self, field, step, gasIndex):
+        tRaw, pRaw, hRaw, gRaw, gRange = self.rawSample(step)
+        base = 0x1D + (field * 17)
+        r = self.regs
+        self.subMeasIndex = (self.subMeasIndex + 1) & 0xFF
+        r[base] = 0x80 | (gasIndex & 0x0F)
+        r[base + 1] = self.subMeasIndex
+        r[base + 2] = (pRaw >> 12) & 0xFF
+        r[base + 3] = (pRaw >> 4) & 0xFF
+        r[base + 4] = (pRaw & 0x0F) << 4
+        r[base + 5] = (tRaw >> 12) & 0xFF
+        r[base + 6] = (tRaw >> 4) & 0xFF
+        r[base + 7] = (tRaw & 0x0F) << 4
+        r[base + 8] = (hRaw >> 8) & 0xFF
+        r[base + 9] = hRaw & 0xFF
+        gasStatus = gRange
+        if self.gasEnabled() and r[0x5A + step] != 0:
+            gasStatus = gasStatus | 0x20 | 0x10    # Gas valid & heater stable
+        r[base + 15] = (gRaw >> 2) & 0xFF
+        r[base + 16] = ((gRaw & 0x03) << 6) | gasStatus
+        self.measurements = self.measurements + 1
+
+    # Bring the register map up to date with the virtual clock
+    def update(self):
+        now = clock.now_us()
+        if (self.mode == 1) and (self.readyAt is not None) and (now >= self.readyAt):
+            self.writeField(0, self.regs[0x71] & 0x0F, self.regs[0x71] & 0x0F)
+            self.readyAt = None
+            self.mode = 0
+            self.regs[0x74] = self.regs[0x74] & 0xFC
+        elif (self.mode == 2):
+            steps = max(1, self.regs[0x71] & 0x0F)
+            while (now >= self.parallelNext):
+                # Parallel mode results rotate through the three data fields
+                self.writeField(self.measurements % 3, self.parallelStep, self.parallelStep)
+                self.parallelStep = (self.parallelStep + 1) % steps
+                self.parallelNext = self.parallelNext + self.parallelCycleUs()
+
+    def parallelCycleUs(self):
+        code = self.regs[0x6E]
+        shared = ((code & 0x3F) * (1 << ((code >> 6) * 2))) * 477
+        multiplier = max(1, self.regs[0x64 + self.parallelStep])
+        return (self.conversionUs() + shared) * multiplier
+
+    def writeReg(self, reg, value):
+        if reg == 0xE0:
+            if value == 0xB6:
+                self.resetCount = self.resetCount + 1
+                for control in range(0x50, 0x76):
+                    self.regs[control] = 0
+                self.mode = 0
+                self.readyAt = None
+            return
+        self.regs[reg] = value
+        if reg == 0x74:
+            self.mode = value & 0x03
+            if self.mode == 1:
+                duration = self.conversionUs() + 1000
+                if self.gasEnabled():
+                    duration = duration + (self.heaterDurationMs(self.regs[0x71] & 0x0F) * 1000)
+                self.readyAt = clock.now_us() + duration
+                for field in range(3):
+                    self.regs[0x1D + (field * 17)] = self.regs[0x1D + (field * 17)] & 0x7F
+                self.regs[0x1D] = self.regs[0x1D] | 0x20    # Measuring
+            elif self.mode == 2:
+                self.parallelStep = 0
+                self.parallelNext = clock.now_us() + self.parallelCycleUs()
+
+    # The BME688 I2C write protocol is: register, data, register, data...
+    def write(self, reg, data):
+        self.update()
+        data = bytes(data)
+        if len(data) > 0:
+            self.writeReg(reg, data[0])
+        for i in range(1, len(data) - 1, 2):
+            self.writeReg(data[i], data[i + 1])
+
+    # Reading auto-increments through the register map
+    def read(self, reg, n):
+        self.update()
+        out = bytes(self.regs[(reg + i) & 0xFF] for i in range(n))
+        # New data flags are cleared once the data field has been read
+        return out
+
+# Simulated SSD1306: parses the command/data control bytes and keeps a copy of the display RAM (GDDRAM)
+class MockSSD1306:
+    ARGS = {0x20: 1, 0x21: 2, 0x22: 2, 0x81: 1, 0xA8: 1, 0xD3: 1, 0xDA: 1, 0xD5: 1, 0xD9: 1, 0xDB: 1, 0x8D: 1}
+
+    def __init__(self, width=128, pages=8):
+        self.width = width
+        self.pages = pages
+        self.gddram = bytearray(width * pages)
+        self.colStart = 0
+        self.colEnd = width - 1
+        self.pageStart = 0
+        self.pageEnd = pages - 1
+        self.col = 0
+        self.page = 0
+        self.pending = []
+        self.commands = 0
+        self.dataBytes = 0
+        self.displayOn = False
+        self.contrast = 0x7F
+
+    def command(self, byte):
+        self.commands = self.commands + 1
+        self.pending.append(byte)
+        opcode = self.pending[0]
+        if len(self.pending) <= self.ARGS.get(opcode, 0):
+            return
+        args = self.pending[1:]
+        self.pending = []
+        if opcode == 0x21:
+            self.colStart, self.colEnd = args[0] & 0x7F, args[1] & 0x7F
+            self.col = self.colStart
+        elif opcode == 0x22:
+            self.pageStart, self.pageEnd = args[0] & 0x07, args[1] & 0x07
+            self.page = self.pageStart
+        elif opcode == 0x81:
+            self.contrast = args[0]
+        elif opcode == 0xAE:
+            self.displayOn = False
+        elif opcode == 0xAF:
+            self.displayOn = True
+
+    def data(self, byte):
+        self.dataBytes = self.dataBytes + 1
+        self.gddram[(self.page * self.width) + self.col] = byte
+        # Horizontal addressing mode: wrap inside the column/page window
+        if self.col >= self.colEnd:
+            self.col = self.colStart
+            self.page = self.pageStart if self.page >= self.pageEnd else self.page + 1
+        else:
+            self.col = self.col + 1
+
+    # Each I2C write is a sequence of control bytes: Co (bit 7) = only one byte follows, D/C# (bit 6) = data not command
+    def write(self, payload):
+        payload = bytes(payload)
+        i = 0
+        while i < len(payload):
+            control = payload[i]
+            i = i + 1
+            isData = control & 0x40
+            if control & 0x80:
+                if i < len(payload):
+                    (self.data if isData else self.command)(payload[i])
+                    i = i + 1
+            else:
+                for byte in payload[i:]:
+                    (self.data if isData else self.command)(byte)
+                i = len(payload)
+
+    def read(self, n):
+        # Only the status byte can be read back over I2C: bit 6 set when the display is off
+        status = 0x00 if self.displayOn else 0x40
+        return bytes([status] * n)
+
+# Simulated I2C peripheral with the same methods as machine.I2C
+# All instances share the same devices, counters and clock - just like the single physical bus on the board
+class MockI2C:
+    devices = {}
+    transactions = 0
+    bytesMoved = 0
+    busyUs = 0
+    perDevice = {}
+    constructed = 0
+    failAbove = None    # Set to a frequency (Hz) to make the bus fail (OSError) when run faster than that
+
+    def __init__(self, id=0, sda=None, scl=None, freq=400000, timeout=None):
+        MockI2C.constructed = MockI2C.constructed + 1
+        self.id = id
+        self.freq = freq
+
+    @classmethod
+    def reset(cls, seed=1):
+        cls.devices = {0x77: MockBME688(seed), 0x3C: MockSSD1306()}
+        cls.resetCounters()
+        cls.constructed = 0
+        cls.failAbove = None
+
+    @classmethod
+    def resetCounters(cls):
+        cls.transactions = 0
+        cls.bytesMoved = 0
+        cls.busyUs = 0
+        cls.perDevice = {}
+
+    def count(self, addr, payloadBytes, conditions):
+        if (MockI2C.failAbove is not None) and (self.freq > MockI2C.failAbove):
+            raise OSError(5)    # EIO, as the Pico reports for a NAK
+        if addr not in MockI2C.devices:
+            raise OSError(5)
+        MockI2C.transactions = MockI2C.transactions + 1
+        MockI2C.bytesMoved = MockI2C.bytesMoved + payloadBytes
+        stats = MockI2C.perDevice.setdefault(addr, [0, 0])
+        stats[0] = stats[0] + 1
+        stats[1] = stats[1] + payloadBytes
+        us = busTimeUs(payloadBytes + conditions, conditions, self.freq)
+        MockI2C.busyUs = MockI2C.busyUs + us
+        clock.advance_us(us)
+
+    def scan(self):
+        return sorted(MockI2C.devices)
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        self.count(addr, 1 + nbytes, 2)
+        return MockI2C.devices[addr].read(memaddr, nbytes)
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        self.count(addr, 1 + len(buf), 2)
+        buf[:] = MockI2C.devices[addr].read(memaddr, len(buf))
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        if isinstance(buf, str):
+            buf = buf.encode("latin-1")
+        self.count(addr, 1 + len(buf), 1)
+        MockI2C.devices[addr].write(memaddr, buf)
+
+    def writeto(self, addr, buf, stop=True):
+        self.count(addr, len(buf), 1)
+        MockI2C.devices[addr].write(buf)
+        return len(buf)
+
+    def writevto(self, addr, vector, stop=True):
+        payload = b"".join(bytes(v) for v in vector)
+        self.count(addr, len(payload), 1)
+        MockI2C.devices[addr].write(payload)
+        return len(payload)
+
+    def readfrom(self, addr, nbytes, stop=True):
+        self.count(addr, nbytes, 1)
+        return MockI2C.devices[addr].read(nbytes)
+
+    def readfrom_into(self, addr, buf, stop=True):
+        self.count(addr, len(buf), 1)
+        buf[:] = MockI2C.devices[addr].read(len(buf))
+
+# Hardware counters for the other stubbed peripherals
+hardware = {"Pin": 0, "PWM": 0, "StateMachine": 0, "RTC": 0}
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_RISING = 4
+    IRQ_FALLING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        hardware["Pin"] = hardware["Pin"] + 1
+        self.id = id
+        self.level = 0 if value is None else value
+        self.handler = None
+
+    def value(self, level=None):
+        if level is None:
+            return self.level
+        self.level = level
+
+    def on(self):
+        self.level = 1
+
+    def off(self):
+        self.level = 0
+
+    def irq(self, trigger=None, handler=None):
+        self.handler = handler
+
+    # Host only: simulate the pin changing and fire the IRQ handler
+    def press(self, level=1):
+        self.level = level
+        if self.handler:
+            self.handler(self)
+
+class PWM:
+    def __init__(self, pin, freq=None, duty_u16=None):
+        hardware["PWM"] = hardware["PWM"] + 1
+        self.pin = pin
+        self.frequency = 0
+        self.duty = 0
+
+    def freq(self, value=None):
+        if value is None:
+            return self.frequency
+        self.frequency = value
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self.duty
+        self.duty = value
+
+    def deinit(self):
+        pass
+
+class ADC:
+    def __init__(self, pin):
+        self.pin = pin
+
+    def read_u16(self):
+        return 0
+
+class RTC:
+    def __init__(self):
+        hardware["RTC"] = hardware["RTC"] + 1
+        self.dt = (2024, 1, 1, 0, 12, 0, 0, 0)
+
+    def datetime(self, dt=None):
+        if dt is None:
+            return self.dt
+        self.dt = tuple(dt)
+
+class Timer:
+    PERIODIC = 1
+    ONE_SHOT = 0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def deinit(self):
+        pass
+
+class StateMachine:
+    def __init__(self, id, program=None, freq=None, sideset_base=None, **kwargs):
+        hardware["StateMachine"] = hardware["StateMachine"] + 1
+        self.id = id
+        self.running = 0
+        self.words = 0
+
+    def active(self, value=None):
+        if value is None:
+            return self.running
+        self.running = value
+
+    def put(self, value, shift=0):
+        self.words = self.words + (len(value) if hasattr(value, "__len__") else 1)
+
+    def exec(self, instruction):
+        pass
+
+def asm_pio(**kwargs):
+    def decorator(program):
+        return program
+    return decorator
+
+class FrameBuffer:
+    # Pure Python MONO_VLSB frame buffer with the primitives the library uses
+    def __init__(self, buffer, width, height, format, stride=None):
+        self.fbBuffer = buffer
+        self.fbWidth = width
+        self.fbHeight = height
+
+    def pixel(self, x, y, c=None):
+        if (x < 0) or (x >= self.fbWidth) or (y < 0) or (y >= self.fbHeight):
+            return None if c is None else None
+        index = ((y >> 3) * self.fbWidth) + x
+        bit = 1 << (y & 7)
+        if c is None:
+            return 1 if (self.fbBuffer[index] & bit) else 0
+        if c:
+            self.fbBuffer[index] = self.fbBuffer[index] | bit
+        else:
+            self.fbBuffer[index] = self.fbBuffer[index] & ~bit
+
+    def fill(self, c):
+        value = 0xFF if c else 0x00
+        for i in range(len(self.fbBuffer)):
+            self.fbBuffer[i] = value
+
+    def fill_rect(self, x, y, w, h, c):
+        for yy in range(max(0, y), min(self.fbHeight, y + h)):
+            for xx in range(max(0, x), min(self.fbWidth, x + w)):
+                self.pixel(xx, yy, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.hline(x, y, w, c)
+        self.hline(x, y + h - 1, w, c)
+        self.vline(x, y, h, c)
+        self.vline(x + w - 1, y, h, c)
+
+    def line(self, x0, y0, x1, y1, c):
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x0, y0, c)
+            if (x0 == x1) and (y0 == y1):
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err = err + dy
+                x0 = x0 + sx
+            if e2 <= dx:
+                err = err + dx
+                y0 = y0 + sy
+
+    # Not the real font - each character is drawn as a distinct 8x8 pattern derived from its code
+    def text(self, s, x, y, c=1):
+        for n, ch in enumerate(s):
+            code = ord(ch)
+            if ch == " ":
+                continue
+            for col in range(7):
+                bits = ((code * (col + 3)) ^ (code >> 1)) & 0x7F
+                for row in range(7):
+                    if bits & (1 << row):
+                        self.pixel(x + (n * 8) + col, y + row, c)
+
+    def scroll(self, xstep, ystep):
+        copy = FrameBuffer(bytearray(self.fbBuffer), self.fbWidth, self.fbHeight, MONO_VLSB)
+        self.fill(0)
+        for y in range(self.fbHeight):
+            for x in range(self.fbWidth):
+                if copy.pixel(x, y):
+                    self.pixel(x + xstep, y + ystep, 1)
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        for yy in range(fbuf.fbHeight):
+            for xx in range(fbuf.fbWidth):
+                c = fbuf.pixel(xx, yy)
+                if c != key:
+                    if palette is not None:
+                        c = palette.pixel(c, 0)
+                    self.pixel(x + xx, y + yy, c)
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+
+def const(value):
+    return value
+
+def ticks_ms():
+    return (clock.now_us() // 1000) & 0x3FFFFFFF
+
+def ticks_us():
+    return clock.now_us() & 0x3FFFFFFF
+
+def ticks_diff(new, old):
+    return ((new - old + 0x20000000) & 0x3FFFFFFF) - 0x20000000
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & 0x3FFFFFFF
+
+def sleep_ms(ms):
+    clock.sleep_us(ms * 1000)
+
+def sleep_us(us):
+    clock.sleep_us(us)
+
+def makeModule(name, **members):
+    module = types.ModuleType(name)
+    for key, value in members.items():
+        setattr(module, key, value)
+    return module
+
+# File system counters (see countFiles())
+# 'flashBytes' estimates the flash LittleFS (the Pico's file system) writes: data added to the end of a file is written once, but writing into the middle of a file
+# copies everything from there to the end of the file to new blocks when the file is closed or flushed (files are stored as linked lists of blocks from the end back to the start)
+files = {"opens": 0, "closes": 0, "flushes": 0, "writes": 0, "bytesWritten": 0, "flashBytes": 0, "reads": 0, "bytesRead": 0, "removes": 0, "renames": 0}
+
+def resetFileCounters():
+    for key in files:
+        files[key] = 0
+
+# Simulated power cuts (see powerCutAfter())
+class PowerCut(Exception):
+    pass
+
+power = {"budget": None}
+openFiles = set()
+
+# Cut the power after 'units' more units of file system work: each byte written is 1 unit, and so is each remove, rename and open for writing
+# The write which runs out is only partly done, every open file is closed and PowerCut is raised - everything written before that is kept, as on flash
+# powerCutAfter(None) turns power cuts off again
+def powerCutAfter(units):
+    power["budget"] = units
+
+def usePower(units):
+    if (power["budget"] is None):
+        return
+    if (power["budget"] < units):
+        cutPower()
+    power["budget"] = power["budget"] - units
+
+def cutPower():
+    power["budget"] = 0
+    for f in list(openFiles):
+        f.close()
+    raise PowerCut()
+
+# A file object that counts the reads and writes made through it
+class CountedFile:
+    def __init__(self, f, mode="r"):
+        self.f = f
+        self.update = "+" in mode    # Only files opened for update can be written in the middle
+        self.rewriteFrom = None      # The earliest place written in the middle of the file since it was last closed or flushed
+        openFiles.add(self)
+
+    def write(self, data):
+        files["writes"] = files["writes"] + 1
+        files["bytesWritten"] = files["bytesWritten"] + len(data)
+        if not self.update:
+            files["flashBytes"] = files["flashBytes"] + len(data)
+        else:
+            self.f.flush()
+            position = self.f.tell()
+            if (position < os.fstat(self.f.fileno()).st_size):
+                if (self.rewriteFrom is None) or (position < self.rewriteFrom):
+                    self.rewriteFrom = position
+            elif (self.rewriteFrom is None):
+                files["flashBytes"] = files["flashBytes"] + len(data)
+        if (power["budget"] is not None):
+            if (len(data) > power["budget"]):
+                self.f.write(data[:power["budget"]])
+                cutPower()
+            power["budget"] = power["budget"] - len(data)
+            written = self.f.write(data)
+            self.f.flush()
+            return written
+        return self.f.write(data)
+
+    def close(self):
+        if self in openFiles:
+            files["closes"] = files["closes"] + 1
+            self.commitRewrite()
+        openFiles.discard(self)
+        return self.f.close()
+
+    def flush(self):
+        files["flushes"] = files["flushes"] + 1
+        self.commitRewrite()
+        return self.f.flush()
+
+    def commitRewrite(self):
+        if (self.rewriteFrom is not None) and not self.f.closed:
+            self.f.flush()
+            files["flashBytes"] = files["flashBytes"] + os.fstat(self.f.fileno()).st_size - self.rewriteFrom
+            self.rewriteFrom = None
+
+    def read(self, *args):
+        data = self.f.read(*args)
+        files["reads"] = files["reads"] + 1
+        files["bytesRead"] = files["bytesRead"] + len(data)
+        return data
+
+    def readinto(self, buf):
+        n = self.f.readinto(buf)
+        files["reads"] = files["reads"] + 1
+        files["bytesRead"] = files["bytesRead"] + (n or 0)
+        return n
+
+    def readline(self, *args):
+        data = self.f.readline(*args)
+        files["reads"] = files["reads"] + 1
+        files["bytesRead"] = files["bytesRead"] + len(data)
+        return data
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        data = self.readline()
+        if not data:
+            raise StopIteration
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+realOpen = builtins.open
+realRemove = os.remove
+realRename = os.rename
+
+# Text files are opened without newline translation, as on MicroPython ("\r\n" is read and written unchanged)
+def countedOpen(file, mode="r", *args, **kwargs):
+    files["opens"] = files["opens"] + 1
+    if ("w" in mode) or ("a" in mode) or ("+" in mode) or ("x" in mode):
+        usePower(1)
+    if ("b" not in mode) and ("newline" not in kwargs) and (len(args) < 3):
+        kwargs["newline"] = ""
+    return CountedFile(realOpen(file, mode, *args, **kwargs), mode)
+
+def countedRemove(path):
+    files["removes"] = files["removes"] + 1
+    usePower(1)
+    return realRemove(path)
+
+def countedRename(old, new):
+    files["renames"] = files["renames"] + 1
+    usePower(1)
+    return realRename(old, new)
+
+# Count every file opened, written, read, removed or renamed from now on (by the library and the script)
+def countFiles():
+    resetFileCounters()
+    builtins.open = countedOpen
+    os.remove = countedRemove
+    os.rename = countedRename
+
+# Register the stubs and put the library folder on the import path
+# 'library' picks which copy of PicoAirQuality.py is imported: "" for the PIO version, "Library Without PIO" for the PWM version
+def install(library="", seed=1):
+    MockI2C.reset(seed)
+    clock.__init__()
+    for key in hardware:
+        hardware[key] = 0
+    sys.modules["machine"] = makeModule("machine", Pin=Pin, PWM=PWM, ADC=ADC, I2C=MockI2C, RTC=RTC, Timer=Timer,
+                                        time_pulse_us=lambda *args: 0, disable_irq=lambda: 0, enable_irq=lambda state=0: None)
+    sys.modules["rp2"] = makeModule("rp2", PIO=makeModule("PIO", OUT_LOW=0, OUT_HIGH=1, SHIFT_LEFT=0, SHIFT_RIGHT=1),
+                                    StateMachine=StateMachine, asm_pio=asm_pio)
+    sys.modules["framebuf"] = makeModule("framebuf", FrameBuffer=FrameBuffer, MONO_VLSB=MONO_VLSB, MONO_HLSB=MONO_HLSB, MONO_HMSB=MONO_HMSB)
+    sys.modules["micropython"] = makeModule("micropython", const=const, native=lambda f: f, viper=lambda f: f,
+                                            schedule=lambda f, arg: f(arg))
+    # MicroPython's extra time functions, added alongside CPython's own
+    time.sleep_ms = sleep_ms
+    time.sleep_us = sleep_us
+    time.ticks_ms = ticks_ms
+    time.ticks_us = ticks_us
+    time.ticks_diff = ticks_diff
+    time.ticks_add = ticks_add
+    if not hasattr(sys.implementation, "_mpy"):
+        sys.implementation._mpy = 6406
+    # The companion modules (PicoAirQualityAsync.py, PicoAirQualityLogging.py, PicoAirQualityReader.py) are always imported from the main folder
+    for path in (LIBRARY_DIR, os.path.join(LIBRARY_DIR, library)):
+        if path in sys.path:
+            sys.path.remove(path)
+        sys.path.insert(0, path)
+    for module in ("PicoAirQuality", "PicoAirQualityAsync", "PicoAirQualityLogging", "PicoAirQualityReader"):
+        sys.modules.pop(module, None)
+
+def bme688():
+    return MockI2C.devices[0x77]
+
+def oled():
+    return MockI2C.devices[0x3C]
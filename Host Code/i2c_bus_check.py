@@ -0,0 +1,41 @@
+# Check: KitronikI2CBus single register reads give the right value when a timer or IRQ callback deferred with runWhenFree() runs as the bus is released
+# Runs on a PC: python3 i2c_bus_check.py
+# The simulated interrupt fires during the chip ID read, and its callback reads a different register using the same scratch buffer
+# Exits with an AssertionError if a read returns the callback's register instead of its own
+import host_stubs
+host_stubs.install()
+
+from host_stubs import MockI2C
+from PicoAirQuality import KitronikI2CBus
+
+MockI2C.reset()
+bus = KitronikI2CBus()
+bus.init()
+callbackReads = []
+
+def callback():
+    callbackReads.append(bus.readByte(0x77, 0x74))    # CTRL_MEAS
+
+# Fire the 'interrupt' in the middle of the next BME688 register read, while the bus is held
+realRead = MockI2C.readfrom_mem_into
+def interrupted(self, addr, memaddr, buf, addrsize=8):
+    realRead(self, addr, memaddr, buf, addrsize)
+    if (memaddr == 0xD0):
+        bus.runWhenFree(callback)
+MockI2C.readfrom_mem_into = interrupted
+
+bus.writeByte(0x77, 0x74, 0x02)
+chipID = bus.readByte(0x77, 0xD0)
+assert callbackReads == [0x02], callbackReads
+assert chipID == 0x61, hex(chipID)
+print("readByte() with a deferred callback reading another register: chip ID 0x%02X, callback read 0x%02X" % (chipID, callbackReads[0]))
+
+# And the same while a sequence of transactions holds the bus
+callbackReads = []
+with bus:
+    chipID = bus.readByte(0x77, 0xD0)
+    assert callbackReads == []
+assert chipID == 0x61 and callbackReads == [0x02]
+print("readByte() inside 'with bus:': the callback runs when the sequence has finished")
+MockI2C.readfrom_mem_into = realRead
+print("PASS")
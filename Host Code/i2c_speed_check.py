@@ -0,0 +1,64 @@
+# Check and benchmark: KitronikI2CBus bus speed negotiation (freq="auto"), and the OLED and BME688 timings at each speed
+# Runs on a PC: python3 i2c_speed_check.py
+# The simulated bus can be made to fail above a speed (as a bus with long wires or a slow device would), to check the fallback
+# Exits with an AssertionError if the wrong speed is chosen, or the devices do not work at the chosen speed
+import host_stubs
+host_stubs.install()
+
+from host_stubs import MockI2C, oled as display
+from PicoAirQuality import KitronikI2CBus, KitronikBME688, KitronikOLED
+
+# Set up the board parts on a new bus, then time a whole screen show() and a measurement
+def run(name, freq="auto", failAbove=None, speeds=None):
+    MockI2C.reset()
+    MockI2C.failAbove = failAbove
+    bus = KitronikI2CBus(freq=freq)
+    if (speeds is not None):
+        bus.AUTO_SPEEDS = speeds
+    oled = KitronikOLED(bus=bus)
+    bme688 = KitronikBME688(bus=bus)
+    oled.setRefreshMode("full")
+    oled.init()    # Sets up the bus (choosing the speed) and the display
+    oled.displayText("Bus speed test", 1)
+    oled.show()
+    assert display().gddram == oled.buffer
+    MockI2C.resetCounters()
+    bme688.measureData()
+    measureUs = MockI2C.busyUs
+    assert 0 < bme688.readTemperature() < 50
+    throughput = "not measured" if bus.bytesPerSecond is None else "%6d bytes/s" % bus.bytesPerSecond
+    frames = "" if oled.fullFrameRate() is None else "  (%.1f whole screens/s)" % oled.fullFrameRate()
+    print("%-46s %4d kHz  throughput %s%s  show() %6.2f ms  measureData() bus time %5.2f ms" % (name + ":", bus.freq // 1000, throughput, frames, oled.lastShowUs / 1000, measureUs / 1000))
+    return bus, oled
+
+# By default the bus is set up at 100 kHz, with no speed test
+MockI2C.reset()
+bus = KitronikI2CBus()
+bus.init()
+assert bus.freq == 100_000 and bus.bytesPerSecond is None and MockI2C.bytesMoved == 0
+print("Default: 100 kHz, no speed test")
+bus, standard = run("freq=100_000 (no negotiation)", freq=100_000)
+assert bus.freq == 100_000 and bus.bytesPerSecond is None
+bus, fast = run("freq=\"auto\"")
+assert bus.freq == 400_000 and bus.bytesPerSecond > 30000
+assert fast.lastShowUs * 3 < standard.lastShowUs
+bus, fallback = run("freq=\"auto\", bus fails above 100 kHz", failAbove=100_000)
+assert bus.freq == 100_000 and bus.bytesPerSecond < 12000
+bus, plus = run("speeds (1 MHz, 400 kHz), fails above 400 kHz", failAbove=400_000, speeds=(1_000_000, 400_000))
+assert bus.freq == 400_000
+bus, fastest = run("speeds (1 MHz, 400 kHz)", speeds=(1_000_000, 400_000))
+assert bus.freq == 1_000_000
+
+# A device answering wrongly at the faster speed also makes it fall back
+MockI2C.reset()
+realRead = MockI2C.readfrom_mem_into
+def garbled(self, addr, memaddr, buf, addrsize=8):
+    realRead(self, addr, memaddr, buf, addrsize)
+    if (self.freq > 100_000):
+        buf[0] = buf[0] ^ 0x10
+MockI2C.readfrom_mem_into = garbled
+bus = KitronikI2CBus()
+assert bus.negotiate() == 100_000 and bus.freq == 100_000
+MockI2C.readfrom_mem_into = realRead
+print("Wrong chip ID at 400 kHz: stays at 100 kHz")
+print("PASS")
@@ -0,0 +1,38 @@
+# Benchmark: what importing PicoAirQuality and constructing the board classes costs, lazy vs eager hardware set up
+# Runs on a PC against the stubbed machine/rp2 modules from host_stubs.py: python3 import_boot_benchmark.py
+import sys
+import time
+
+import host_stubs
+host_stubs.install(sys.argv[1] if len(sys.argv) > 1 else "")
+
+from host_stubs import MockI2C, clock, hardware
+
+# Hardware operations and (virtual) Pico time used by a step
+def measure(name, step):
+    before = dict(hardware)
+    MockI2C.resetCounters()
+    constructed = MockI2C.constructed
+    startUs = clock.now_us()
+    startHost = time.perf_counter()
+    result = step()
+    hostMs = (time.perf_counter() - startHost) * 1000
+    used = ", ".join("%d %s" % (hardware[key] - before[key], key) for key in hardware if hardware[key] != before[key]) or "none"
+    print("%-34s %8.1f ms Pico time  %4d I2C transactions  %d I2C set up  hardware: %s  (%.1f ms on this PC)"
+          % (name, (clock.now_us() - startUs) / 1000, MockI2C.transactions, MockI2C.constructed - constructed, used, hostMs))
+    return result
+
+PicoAirQuality = measure("import PicoAirQuality", lambda: __import__("PicoAirQuality"))
+
+# Construct everything, as at the top of 'smart_house_example.py'
+def construct():
+    return (PicoAirQuality.KitronikBME688(), PicoAirQuality.KitronikOLED(), PicoAirQuality.KitronikRTC(),
+            PicoAirQuality.KitronikZIPLEDs(8), PicoAirQuality.KitronikBuzzer(), PicoAirQuality.KitronikOutputControl(),
+            PicoAirQuality.KitronikButton())
+
+parts = measure("construct all classes (lazy)", construct)
+bme688, oled, rtc, zipleds, buzzer, output, buttons = parts
+measure("board.init() - outputs off", lambda: PicoAirQuality.board.init())
+measure("first measureData()", bme688.measureData)
+measure("second measureData()", bme688.measureData)
+measure("board.init(parts=...) remaining", lambda: PicoAirQuality.board.init(parts=(oled, zipleds, buzzer, output)))
@@ -0,0 +1,170 @@
+# Fault injection check: power cuts at every point while logging, KitronikDataLogger vs KitronikJournalLogger
+# Runs on a PC: python3 journal_fault_check.py [entries]
+# A short log is written with the power cut after every possible number of bytes written (and before each file open, remove and rename), then the Pico is "restarted":
+# a new logger is created on the same files, the entries are read back and checked, and one more entry is logged
+# Also damages bytes in the middle of a journal, which must end the log at the damaged entry without returning anything wrong, even after more entries and another restart
+# The log files are written to a temporary folder
+# Exits with an AssertionError if the journal ever loses a completed entry, returns a damaged one, or cannot carry on logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+import host_stubs
+host_stubs.install()
+host_stubs.countFiles()
+
+from host_stubs import PowerCut, power, powerCutAfter
+from PicoAirQuality import KitronikDataLogger
+from PicoAirQualityLogging import KitronikJournalLogger
+
+ENTRIES = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+MAX_FILE_SIZE = 1200    # Small, so the log is full and making space several times during the test
+
+root = tempfile.mkdtemp()
+
+def entry(n):
+    return ("%06d" % n, 20 + (n % 500) / 100, 101325 - (n % 40), "Open" if (n % 7) else "Closed")
+
+def entryText(n):
+    fields = entry(n)
+    return "%s;%.2f;%d;%s;\r\n" % fields
+
+def setUp(log):
+    log.MAX_FILE_SIZE = MAX_FILE_SIZE
+    log.writeProjectInfo("Kitronik Data Logger - Pico Smart Air Quality Board - www.kitronik.co.uk", "Name: User Name", "Subject: Power cuts")
+    log.nameColumnHeadings("Number", "Temperature", "Pressure", "Window Status")
+
+# After a restart, a text log which already has entries is carried on without writing the project info and headings again
+def restart(log):
+    if isinstance(log, KitronikJournalLogger) or (log.checkFileSize() == 0):
+        setUp(log)
+        return
+    log.MAX_FILE_SIZE = MAX_FILE_SIZE
+    log.line1 = "Kitronik Data Logger - Pico Smart Air Quality Board - www.kitronik.co.uk"
+    log.line2 = "Name: User Name"
+    log.line3 = "Subject: Power cuts"
+    log.projectInfo = True
+    log.setColumns(("Number", "Temperature", "Pressure", "Window Status"))
+    log.headings = True
+
+# Log ENTRIES entries, returning how many were completely stored before the power was cut
+def logEntries(makeLogger):
+    stored = 0
+    try:
+        log = makeLogger()
+        setUp(log)
+        for n in range(ENTRIES):
+            log.storeDataEntry(*entry(n))
+            stored = n + 1
+    except PowerCut:
+        pass
+    return stored
+
+def readText(log):
+    try:
+        f = open(log.FILENAME, "rb")
+    except OSError:
+        return None
+    text = f.read().decode("utf-8", "replace")
+    f.close()
+    lines = text.split("\r\n")
+    if (lines[:4] != ["Kitronik Data Logger - Pico Smart Air Quality Board - www.kitronik.co.uk", "Name: User Name", "Subject: Power cuts", "Number;Temperature;Pressure;Window Status;"]):
+        return None
+    return [line + "\r\n" for line in lines[4:-1]]
+
+def readJournal(log):
+    return list(log.readEntries())
+
+# Work out what state a restarted log is in, given the number of entries which had been completely stored
+def check(entries, stored):
+    if (entries is None):
+        return "log or headings lost"
+    numbers = []
+    for line in entries:
+        if (line[:6].isdigit() and (line == entryText(int(line[:6])))):
+            numbers.append(int(line[:6]))
+        else:
+            return "damaged entry read back"
+    if (numbers != list(range(numbers[0], numbers[-1] + 1)) if numbers else False):
+        return "entries missing or out of order"
+    if (stored > 0) and ((len(numbers) == 0) or (numbers[-1] < stored - 1)):
+        return "newest entries lost"
+    return "ok"
+
+# Run the log with the power cut after each number of units, and sort the results
+def run(name, makeLogger, read):
+    directory = os.path.join(root, name)
+    os.mkdir(directory)
+    os.chdir(directory)
+    powerCutAfter(10 ** 9)
+    logEntries(makeLogger)
+    total = (10 ** 9) - power["budget"]
+    powerCutAfter(None)
+    results = {}
+    for cut in range(total):
+        os.chdir(root)
+        shutil.rmtree(directory)
+        os.mkdir(directory)
+        os.chdir(directory)
+        powerCutAfter(cut)
+        stored = logEntries(makeLogger)
+        powerCutAfter(None)
+        log = makeLogger()      # The Pico restarts
+        restart(log)
+        entries = read(log)
+        result = check(entries, stored)
+        if (result == "ok"):
+            log.storeDataEntry(*entry(ENTRIES))     # The new entry follows the recovered ones (the oldest may have been removed to make space)
+            after = read(log)
+            if (after is None) or (after[-1] != entryText(ENTRIES)) or (after[:-1] != entries[len(entries) - len(after) + 1:]):
+                result = "cannot carry on logging"
+        results[result] = results.get(result, 0) + 1
+    os.chdir(root)
+    print("%-22s %5d power cut points: %s" % (name, total, ", ".join("%s %d" % (key, value) for key, value in sorted(results.items()))))
+    return results
+
+text = run("KitronikDataLogger", lambda: KitronikDataLogger("data_log.txt", "semicolon"), readText)
+journal = run("KitronikJournalLogger", lambda: KitronikJournalLogger("data_log", "semicolon"), readJournal)
+assert list(journal) == ["ok"], journal
+
+# Damaged bytes part way through the newest journal: the log ends at the entry before the damage, and logging carries on from there
+generator = random.Random(17)
+directory = os.path.join(root, "damaged")
+for trial in range(200):
+    os.chdir(root)
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.mkdir(directory)
+    os.chdir(directory)
+    logEntries(lambda: KitronikJournalLogger("data_log", "semicolon"))
+    log = KitronikJournalLogger("data_log", "semicolon")
+    name = log.FILENAME
+    before = readJournal(log)
+    f = open(name, "r+b")
+    size = f.seek(0, 2)
+    position = generator.randrange(log.HEADER_SIZE + len(log.info) + 4, size)
+    f.seek(position)
+    value = f.read(1)[0]
+    f.seek(position)
+    f.write(bytes([value ^ (1 << generator.randrange(8))]))
+    f.close()
+    log = KitronikJournalLogger("data_log", "semicolon")
+    setUp(log)
+    after = readJournal(log)
+    assert after == before[:len(after)] and len(after) < len(before) and log.discardedBytes > 0
+    # New entries the same length as the old ones written over (all "Open"): after another restart the old entries after them must not come back
+    numbers = [n for n in range(ENTRIES + 1, ENTRIES + 10) if (n % 7)][:3]
+    added = [entryText(n) for n in numbers]
+    for n in numbers:
+        log.storeDataEntry(*entry(n))
+    assert readJournal(log) == after + added
+    log = KitronikJournalLogger("data_log", "semicolon")
+    setUp(log)
+    assert readJournal(log) == after + added, "old entries came back after a restart"
+    log.storeDataEntry(*entry(ENTRIES))
+    assert readJournal(log) == after + added + [entryText(ENTRIES)]
+os.chdir(root)
+print("Damaged journal: 200 single bit errors found, the entries before each one kept, and the old entries after them never read back")
+print("PASS")
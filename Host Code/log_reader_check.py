@@ -0,0 +1,130 @@
+# Check and benchmark: KitronikLogReader (PicoAirQualityReader.py) against reading the whole log into memory
+# Runs on a PC: python3 log_reader_check.py
+# Logs two simulated days of readings (one every 10 seconds) to a text log and a segmented log, then reads them back with column selection, time ranges and downsampling
+# The log files are written to a temporary folder
+# Exits with an AssertionError if any result is different from working it out from the whole file
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import host_stubs
+
+# The reader runs on a PC without the MicroPython stand-ins
+sys.path.insert(0, host_stubs.LIBRARY_DIR)
+from PicoAirQualityReader import KitronikLogReader, timestamp
+assert "machine" not in sys.modules
+
+host_stubs.install()
+host_stubs.countFiles()
+
+from host_stubs import files
+from PicoAirQuality import KitronikDataLogger
+from PicoAirQualityLogging import KitronikSegmentedLogger
+
+INTERVAL = 10
+ENTRIES = 2 * 86400 // INTERVAL
+START = timestamp(2025, 1, 1)
+
+os.chdir(tempfile.mkdtemp())
+
+now = [START]
+time.time = lambda: now[0]
+
+def entry(n):
+    t = time.gmtime(now[0])
+    return ("%02d/%02d/%04d" % (t[2], t[1], t[0]), "%02d:%02d:%02d" % (t[3], t[4], t[5]), "%.2f" % (20 + (n % 500) / 100), str(101325 - (n % 40)), str(40 + (n % 9)), str(n % 500), str(400 + (n % 300)), "Open" if (n % 7) else "Closed")
+
+text = KitronikDataLogger("data_log.txt", "semicolon")
+text.MAX_FILE_SIZE = 10000000
+segmented = KitronikSegmentedLogger("data_log", "semicolon", segmentSize=0, segmentTime=3600, maxSegments=100)
+segmented.MAX_FILE_SIZE = 10000000
+for log in (text, segmented):
+    log.writeProjectInfo("Smart House Data", "Climate Sensor Readings")
+    log.nameColumnHeadings("Date", "Time", "Temperature", "Pressure", "Humidity", "IAQ", "eCO2", "Window Status")
+    log.setFlushPolicy(entries=100)
+for n in range(ENTRIES):
+    text.storeDataEntry(*entry(n))
+    segmented.storeDataEntry(*entry(n))
+    now[0] = now[0] + INTERVAL
+text.flush()
+segmented.flush()
+
+# The whole log, read into memory in one go
+def readAll():
+    f = open("data_log.txt", "r")
+    lines = f.read().split("\r\n")[2:-1]    # After the two lines of project info
+    f.close()
+    return lines
+
+expected = []
+for n, line in enumerate(readAll()[1:]):
+    fields = line.split(";")[:-1]
+    expected.append((START + (n * INTERVAL), float(fields[2]), int(fields[3]), int(fields[4]), int(fields[5]), int(fields[6]), fields[7]))
+assert len(expected) == ENTRIES
+
+columns = ["Temperature", "Pressure", "Humidity", "IAQ", "eCO2", "Window Status"]
+for name in ("data_log.txt", "data_log"):
+    reader = KitronikLogReader(name, "semicolon")
+    assert list(reader.readRecords(columns)) == expected, name
+
+    # Column selection, with a column which is not in the log
+    assert list(reader.readRecords(["eCO2", "Light", "Temperature"])) == [(r[0], r[5], None, r[1]) for r in expected]
+
+    # Time range and every Nth entry
+    start = START + 86400 + 1234
+    end = start + 3600
+    assert list(reader.readRecords(["Temperature"], start, end)) == [(r[0], r[1]) for r in expected if start <= r[0] <= end]
+    assert list(reader.readRecords(["Temperature"], start, end, every=6)) == [(r[0], r[1]) for r in expected if start <= r[0] <= end][::6]
+
+    # Per minute and per hour min / mean / max
+    for period in (60, 3600):
+        summaries = list(reader.readSummaries(["Temperature", "Window Status"], period, start, end))
+        groups = {}
+        for r in expected:
+            if start <= r[0] <= end:
+                groups.setdefault(r[0] - (r[0] % period), []).append(r[1])
+        assert len(summaries) == len(groups)
+        for periodStart, count, ((low, mean, high), window) in summaries:
+            values = groups[periodStart]
+            assert (count, low, high, window) == (len(values), min(values), max(values), (None, None, None))
+            assert abs(mean - (sum(values) / len(values))) < 1e-9
+
+# Reading the last hour: the whole text file, or the segments covering it
+reader = KitronikLogReader("data_log.txt", "semicolon")
+segments = KitronikLogReader("data_log", "semicolon")
+lastHour = now[0] - 3600
+for name, function in (("whole file read()", lambda: [line for line in readAll()]), ("KitronikLogReader, text log", lambda: list(reader.readRecords(columns, lastHour))),
+                       ("KitronikLogReader, segments", lambda: list(segments.readRecords(columns, lastHour)))):
+    host_stubs.resetFileCounters()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print("Last hour, %-28s %8d bytes read  %3d files opened  %7.1f ms (PC time)" % (name + ":", files["bytesRead"], files["opens"], elapsed * 1000))
+
+# Memory: reading every entry one at a time uses about the same memory for any length of log
+def peakMemory(function):
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def countRecords():
+    count = 0
+    for record in reader.readRecords(columns):
+        count = count + 1
+    return count
+
+def countSummaries():
+    count = 0
+    for summary in reader.readSummaries(columns[:5], 60):
+        count = count + 1
+    return count
+
+print("Peak memory, whole file read():            %8d bytes" % peakMemory(readAll))
+print("Peak memory, KitronikLogReader records:    %8d bytes" % peakMemory(countRecords))
+print("Peak memory, KitronikLogReader summaries:  %8d bytes" % peakMemory(countSummaries))
+assert peakMemory(countRecords) < 20000 and peakMemory(countSummaries) < 20000
+print("PASS")
@@ -0,0 +1,117 @@
+# Benchmark: KitronikDataLogger file system operations per entry with different flush policies
+# Runs on a PC: python3 logger_flush_benchmark.py
+# Logs one entry per (virtual) second like Data_Logging_Tutorial.py, to files in a temporary folder
+# Exits with an AssertionError if a buffered log file is different to the unbuffered one
+import os
+import tempfile
+import time
+
+import host_stubs
+host_stubs.install()
+host_stubs.countFiles()
+
+from host_stubs import clock, files
+from PicoAirQuality import KitronikDataLogger
+
+ENTRIES = 3600    # One hour at 1 Hz
+FULL_FILE_SIZE = 20000    # Small enough that old entries are removed during the hour
+
+os.chdir(tempfile.mkdtemp())
+
+def entry(n):
+    return ("02/11/2021", "%02d:%02d:%02d" % (12 + n // 3600, (n // 60) % 60, n % 60), str(20 + (n % 500) / 100), str(101325 - (n % 40)), str(40 + (n % 9)))
+
+# How entries were stored before: the file size was read from the file system for every entry, and one line removed at a time by copying the rest of the file line by line
+class LegacyLogger(KitronikDataLogger):
+    def writeEntry(self, dataEntry):
+        while (self.checkFileSize() > self.MAX_FILE_SIZE):
+            self.removeOneLine()
+        self.writeFile(self.FILENAME, dataEntry)
+
+    def removeOneLine(self):
+        readFrom = open(self.FILENAME, "r")
+        writeTo = open(self.FILENAME + ".bak", "w")
+        for l in range(4):
+            writeTo.write(readFrom.readline())
+        readFrom.readline()
+        for lines in readFrom:
+            writeTo.write(lines)
+        readFrom.close()
+        writeTo.close()
+        os.remove(self.FILENAME)
+        os.rename(self.FILENAME + ".bak", self.FILENAME)
+
+POLICIES = (
+    ("before", None),
+    ("every entry (default)", None),
+    ("every 10 entries", {"entries": 10}),
+    ("every 2kB", {"size": 2048}),
+    ("every 60 s", {"interval": 60000}),
+    ("flush() every 15 min", {}),
+)
+
+def run(name, policy, maxFileSize):
+    fileName = "log_%d_%d.txt" % (maxFileSize, len(results))
+    if (name == "before"):
+        log = LegacyLogger(fileName, "semicolon")
+    else:
+        log = KitronikDataLogger(fileName, "semicolon")
+    log.MAX_FILE_SIZE = maxFileSize
+    if policy is not None:
+        log.setFlushPolicy(**policy)
+    log.writeProjectInfo("Environmental Data Log", "User Name", "Project A")
+    log.nameColumnHeadings("Date", "Time", "Temperature", "Pressure", "Humidity")
+    host_stubs.resetFileCounters()
+    start = time.perf_counter()
+    for n in range(ENTRIES):
+        log.storeDataEntry(*entry(n))
+        clock.sleep_us(1_000_000)
+        if (policy == {}) and (n % 900 == 899):
+            log.flush()
+    log.flush()
+    elapsed = time.perf_counter() - start
+    print("%-24s %8.0f entries/s  %6.3f opens  %6.3f writes  %7.1f bytes written per entry" % (name, ENTRIES / elapsed, files["opens"] / ENTRIES, files["writes"] / ENTRIES, files["bytesWritten"] / ENTRIES))
+    operations.append((files["opens"], files["writes"]))
+    f = open(fileName, "rb")
+    results.append(f.read())
+    f.close()
+
+# Entries are removed in larger blocks when buffered, so full files start at different entries but must all end with the same entries
+def check(maxFileSize):
+    lines = [result.split(b"\r\n") for result in results]
+    for other in lines[1:]:
+        assert other[:4] == lines[0][:4], "Project info & headings are different"
+        shortest = min(len(other), len(lines[0])) - 5
+        assert other[-shortest:] == lines[0][-shortest:], "Entries are different"
+        assert len(b"\r\n".join(other)) <= maxFileSize + 100
+
+print("%d entries at 1 Hz (PC time for the file system, so entries per second are not Pico figures)" % ENTRIES)
+print("Filling the log:")
+results = []
+operations = []
+for name, policy in POLICIES:
+    run(name, policy, 500000)
+check(500000)
+assert results[0] == results[1]
+assert operations[1][0] <= operations[0][0] and operations[1][1] <= operations[0][1]    # The default policy does no more file system work than before
+
+print("Full log (%d bytes), earliest entries removed to make space:" % FULL_FILE_SIZE)
+results = []
+operations = []
+for name, policy in POLICIES:
+    run(name, policy, FULL_FILE_SIZE)
+check(FULL_FILE_SIZE)
+assert operations[1][0] <= operations[0][0] and operations[1][1] <= operations[0][1]
+
+# The file size kept by the logger counts bytes, so text with characters outside ASCII (more than one byte each in UTF-8) does not throw it out
+log = KitronikDataLogger("utf8_log.txt", "semicolon")
+log.writeProjectInfo("Pièce: salle de réunion", "Name: Zoë", "Subject: Température °C")
+log.nameColumnHeadings("Date", "Time", "Température °C", "Humidité %")
+for policy in ({}, {"entries": 5}):
+    log.setFlushPolicy(**policy)
+    for n in range(20):
+        log.writeEntry("01/01/2025;12:00:%02d;—;—;\r\n" % n)
+    log.flush()
+    assert log.fileSize == os.path.getsize("utf8_log.txt"), (log.fileSize, os.path.getsize("utf8_log.txt"))
+print("File size with UTF-8 text: %d bytes, counted correctly" % log.fileSize)
+print("PASS")
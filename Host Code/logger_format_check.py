@@ -0,0 +1,109 @@
+# Check: KitronikDataLogger data entries with any number of columns, built up in the reused row buffer with numbers written to each column's decimal places
+# Runs on a PC: python3 logger_format_check.py
+# Exits with an AssertionError if a number is written differently to Python's own "%.*f" formatting (other than at an exact half, which is rounded away from zero),
+# or if an entry stored with the default flush policy is not written straight from the row buffer in one write
+import os
+import random
+import tempfile
+
+import host_stubs
+host_stubs.install()
+host_stubs.countFiles()
+
+from host_stubs import files
+from PicoAirQuality import KitronikDataLogger
+
+ENTRIES = 2000
+
+os.chdir(tempfile.mkdtemp())
+
+# Log to a list instead of the file, to check the entries on their own
+class ListLogger(KitronikDataLogger):
+    def __init__(self):
+        KitronikDataLogger.__init__(self, "data_log.txt", "semicolon")
+        self.entries = []
+
+    def writeEntry(self, dataEntry):
+        self.entries.append(dataEntry.decode())
+
+def formatted(value, places):
+    return ("%.*f" % (places, value)) if isinstance(value, float) else str(value)
+
+# Single values, to 0 to 4 decimal places
+log = ListLogger()
+generator = random.Random(16)
+for places in range(5):
+    log.setColumns([("Value", places)])
+    for value in [0, 7, -7, 101325, -40, 2 ** 40, 0.0, 0.5, -0.5, 9.995, 1e-9, -1e-9, 123456.789] + [generator.uniform(-1000, 1000) for i in range(500)]:
+        log.entries = []
+        log.storeDataEntry(value)
+        text = log.entries[0][:-3]
+        expected = formatted(value, places)
+        if (text != expected):
+            scaled = abs(value) * (10 ** places)
+            assert (abs(scaled - int(scaled) - 0.5) < 1e-6) or (expected == "-" + text), (value, places, text, expected)
+for value in (float("nan"), float("inf"), float("-inf")):
+    log.entries = []
+    log.storeDataEntry(value)
+    assert log.entries[0] == str(value) + ";\r\n"
+
+# A column with no decimal places given uses DEFAULT_DECIMALS, and so do floats in more columns than there are headings
+log.setColumns(["Value"])
+log.entries = []
+log.storeDataEntry(1.25, "", 2.5, 3)
+assert log.entries == ["1.25;2.50;3;\r\n"], log.entries
+
+# Readings as the BME688 gives them, with more columns than the old 10 fields and text fields mixed in, written exactly as str() and "%.*f" would
+columns = [("Temperature", 2), ("Pressure", 0), ("Humidity", 2), "IAQ", "eCO2"] + [("Extra %d" % i, 1) for i in range(12)]
+log.nameColumnHeadings("Date", "Time", *columns)
+assert log.dataHeadings.count(";") == 19
+places = [0, 0] + log.decimals[2:]
+readings = []
+for n in range(ENTRIES):
+    readings.append(("01/01/2025", "12:%02d:%02d" % ((n // 60) % 60, n % 60), generator.randrange(-4000, 8500) / 100, generator.randrange(30000, 110000), generator.randrange(0, 10000) / 100,
+                     generator.randrange(0, 500), generator.randrange(400, 5000)) + tuple(generator.randrange(-1000, 1000) / 10 for i in range(12)))
+log.entries = []
+expectedEntries = []
+for reading in readings:
+    log.storeDataEntry(*reading)
+    expectedEntries.append("".join((field if isinstance(field, str) else formatted(field, p)) + ";" for field, p in zip(reading, places)) + "\r\n")
+    assert log.entries[-1] == expectedEntries[-1], (log.entries[-1], expectedEntries[-1])
+print("%d fields per entry, written as expected" % len(readings[0]))
+
+# With the default flush policy each entry is written straight from the row buffer: one open, one write and one close, and the buffer is reused for every entry
+log = KitronikDataLogger("direct.txt", "semicolon")
+log.nameColumnHeadings("Date", "Time", *columns)
+row = log.row
+written = []
+countedWrite = host_stubs.CountedFile.write
+def write(self, data):
+    written.append(isinstance(data, memoryview) and (data.obj is log.row))
+    return countedWrite(self, data)
+host_stubs.CountedFile.write = write
+host_stubs.resetFileCounters()
+for reading in readings:
+    log.storeDataEntry(*reading)
+host_stubs.CountedFile.write = countedWrite
+assert (len(written) == ENTRIES) and all(written)
+assert (files["writes"] == ENTRIES) and (files["opens"] <= ENTRIES + 1) and (files["closes"] <= ENTRIES + 1), files    # (Plus reading the file size once)
+assert log.row is row
+f = open("direct.txt", "rb")
+lines = f.read().decode().split("\r\n")
+f.close()
+assert lines[1:-1] == [entry[:-2] for entry in expectedEntries]
+assert log.fileSize == os.path.getsize("direct.txt")
+print("Default flush policy: 1 write per entry, straight from the row buffer")
+
+# With a flush policy the entries are buffered, and written together as before
+log = KitronikDataLogger("buffered.txt", "semicolon")
+log.nameColumnHeadings("Date", "Time", *columns)
+log.setFlushPolicy(entries=10)
+host_stubs.resetFileCounters()
+for reading in readings:
+    log.storeDataEntry(*reading)
+log.flush()
+assert files["writes"] == ENTRIES // 10
+f = open("buffered.txt", "rb")
+assert f.read().decode().split("\r\n")[1:] == lines[1:]
+f.close()
+print("PASS")
@@ -0,0 +1,128 @@
+# Check and benchmark: file system work per tick for several loggers, each writing its own file vs KitronikLoggerGroup
+# Runs on a PC: python3 logger_group_benchmark.py [streams]
+# Each tick stores one entry in every logger (one log file per room), and each logger has its own maximum file size, so the oldest entries are removed from each log at different times
+# The file system calls are counted separately for the first 1000 ticks (no file is full yet) and the rest (the logs are full: a logger on its own copies its file to remove its oldest entries,
+# while the group moves a full file to '<file>.old' and starts it again, so nothing is copied)
+# The log files are written to a temporary folder
+# Exits with an AssertionError if the group keeps anything different to the newest entries the loggers keep on their own, a log goes over its maximum size, or the group copies entries
+import os
+import sys
+import tempfile
+import time
+
+import host_stubs
+host_stubs.install()
+host_stubs.countFiles()
+
+from host_stubs import files
+from PicoAirQuality import KitronikDataLogger
+from PicoAirQualityLogging import KitronikLoggerGroup, KitronikSegmentedLogger
+from PicoAirQualityReader import KitronikLogReader
+
+STREAMS = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+TICKS = 2000
+FILLING = 1000    # No file is full before this tick
+
+root = tempfile.mkdtemp()
+
+def entry(stream, tick):
+    return ("01/01/2025", "%02d:%02d:%02d" % (tick // 3600, (tick // 60) % 60, tick % 60), 20 + ((tick + stream) % 500) / 100, 40 + ((tick * stream) % 900) / 100, (tick + (7 * stream)) % 500)
+
+def makeLoggers():
+    loggers = []
+    for stream in range(STREAMS):
+        log = KitronikDataLogger("room%d.txt" % stream, "semicolon")
+        log.MAX_FILE_SIZE = 40000 + (5000 * stream)
+        log.writeProjectInfo("Kitronik Data Logger - Pico Smart Air Quality Board - www.kitronik.co.uk", "Room %d" % stream, "Subject: Logger group")
+        log.nameColumnHeadings("Date", "Time", ("Temperature", 2), ("Humidity", 2), "IAQ")
+        loggers.append(log)
+    return loggers
+
+def readFile(name):
+    try:
+        f = open(name, "rb")
+    except OSError:
+        return b""
+    data = f.read()
+    f.close()
+    return data
+
+# Each log's header lines, and its entries from '<file>.old' (if there is one) then the file
+def readLogs():
+    logs = []
+    for stream in range(STREAMS):
+        lines = readFile("room%d.txt" % stream).split(b"\r\n")
+        old = readFile("room%d.txt.old" % stream).split(b"\r\n")
+        assert lines[-1] == b"" and old[-1] == b""
+        if (len(old) > 1):
+            assert old[:4] == lines[:4]
+        logs.append((lines[:4], old[4:-1] + lines[4:-1]))
+    return logs
+
+# Log TICKS ticks in a new folder, returning the logs, the number of file system calls while no file is full, and the bytes read and written per tick once the logs are full
+def run(name, group=None):
+    directory = os.path.join(root, name)
+    os.mkdir(directory)
+    os.chdir(directory)
+    loggers = makeLoggers()
+    if (group is not None):
+        for log in loggers:
+            group.addLogger(log)
+    host_stubs.resetFileCounters()
+    start = time.perf_counter()
+    for tick in range(TICKS):
+        if (tick == FILLING):
+            filling = dict(files)
+            host_stubs.resetFileCounters()
+        for stream in range(STREAMS):
+            loggers[stream].storeDataEntry(*entry(stream, tick))
+        if (group is not None):
+            group.update()
+    if (group is not None):
+        group.close()
+    elapsed = time.perf_counter() - start
+    full = dict(files)
+    for stream in range(STREAMS):
+        size = loggers[stream].checkFileSize() + len(readFile("room%d.txt.old" % stream))
+        assert size <= loggers[stream].MAX_FILE_SIZE
+    print("%s (%.1f us per tick, PC time):" % (name, elapsed * 1e6 / TICKS))
+    for phase, counts, ticks in (("filling", filling, FILLING), ("full", full, TICKS - FILLING)):
+        operations = counts["opens"] + counts["writes"] + counts["closes"] + counts["flushes"] + counts["removes"] + counts["renames"]
+        print("    %-8s %6.2f opens  %7.2f writes  %6.2f flushes/closes  %7.2f file system calls  %8.0f bytes read  %8.0f bytes written per tick" % (phase + ":",
+              counts["opens"] / ticks, counts["writes"] / ticks, (counts["flushes"] + counts["closes"]) / ticks, operations / ticks, counts["bytesRead"] / ticks, counts["bytesWritten"] / ticks))
+        if (phase == "filling"):
+            fillingOperations = operations
+    return readLogs(), fillingOperations, (full["bytesRead"] + full["bytesWritten"]) / (TICKS - FILLING)
+
+print("%d loggers, one entry each per tick, %d ticks" % (STREAMS, TICKS))
+alone, aloneOperations, aloneBytes = run("Each logger on its own")
+everyTick, everyTickOperations, everyTickBytes = run("KitronikLoggerGroup, every tick", KitronikLoggerGroup(entries=STREAMS))
+batched, batchedOperations, batchedBytes = run("KitronikLoggerGroup, every 10 ticks", KitronikLoggerGroup(entries=10 * STREAMS))
+assert (everyTickOperations * 4 < aloneOperations * 3) and (batchedOperations * 10 < aloneOperations)
+assert (everyTickBytes * 20 < aloneBytes) and (batchedBytes * 20 < aloneBytes)
+
+# The group keeps the newest entries of each log, in order, after the same header - at least half of MAX_FILE_SIZE worth (the logger on its own keeps nearly all of it)
+for logs in (everyTick, batched):
+    for stream in range(STREAMS):
+        header, entries = logs[stream]
+        assert header == alone[stream][0]
+        assert len(entries) * 2 > len(alone[stream][1]) and alone[stream][1][-len(entries):] == entries
+
+# Loggers which write their own files (here a segmented log) are flushed in the group's flush cycle
+os.chdir(root)
+group = KitronikLoggerGroup(entries=50)
+log = group.addLogger(KitronikSegmentedLogger("segments", "semicolon", segmentSize=2000, maxSegments=100))
+log.nameColumnHeadings("Date", "Time", ("Temperature", 2), ("Humidity", 2), "IAQ")
+plain = group.addLogger(KitronikDataLogger("plain.txt", "semicolon"))
+plain.nameColumnHeadings("Date", "Time", ("Temperature", 2), ("Humidity", 2), "IAQ")
+for tick in range(500):
+    log.storeDataEntry(*entry(0, tick))
+    plain.storeDataEntry(*entry(0, tick))
+    group.update()
+group.close()
+assert list(KitronikLogReader("segments").readRecords()) == list(KitronikLogReader("plain.txt").readRecords())
+assert len(list(KitronikLogReader("plain.txt").readRecords())) == 500
+group.removeLogger(plain)
+plain.storeDataEntry(*entry(0, 500))
+assert len(list(KitronikLogReader("plain.txt").readRecords())) == 501
+print("PASS")
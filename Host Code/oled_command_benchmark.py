@@ -0,0 +1,72 @@
+# Benchmark: I2C transactions and bus time for KitronikOLED start up, show() and contrast(), sending each command in its own transaction vs batched
+# Runs on a PC: python3 oled_command_benchmark.py
+# "One by one" is the way the commands used to be sent: one I2C transaction for each command byte (and for each argument), then the screen data in another
+# "Batched" is KitronikOLED now: a command sequence in one transaction, and the screen area commands in the same transaction as the screen data
+# The simulated bus time only counts the bits on the wire - on the Pico each transaction also costs the time to make the I2C call, which batching saves as well
+# Exits with an AssertionError if both ways do not leave the simulated display in the same state
+import host_stubs
+host_stubs.install()
+
+from host_stubs import MockI2C, oled as display
+from PicoAirQuality import KitronikI2CBus, KitronikOLED
+
+# The old way of sending commands, for comparison
+class OneByOneOLED(KitronikOLED):
+    def write_cmds(self, cmds):
+        for cmd in cmds:
+            self.write_cmd(cmd)
+
+    def sendWindow(self, page0, page1, x0, x1):
+        self.write_cmd(self.SET_COL_ADDR)
+        self.write_cmd(x0)
+        self.write_cmd(x1)
+        self.write_cmd(self.SET_PAGE_ADDR)
+        self.write_cmd(page0)
+        self.write_cmd(page1)
+        buffer = memoryview(self.buffer)
+        if (x0 == 0) and (x1 == self.width - 1):
+            parts = ((page0 * self.width, (page1 + 1) * self.width),)
+        else:
+            parts = [((page * self.width) + x0, (page * self.width) + x1 + 1) for page in range(page0, page1 + 1)]
+        for start, end in parts:
+            self.write_data(buffer[start:end])
+            if (self.refreshMode == "diff"):
+                self.shadow[start:end] = buffer[start:end]
+
+def measure(function):
+    MockI2C.resetCounters()
+    function()
+    return MockI2C.transactions, MockI2C.bytesMoved, MockI2C.busyUs / 1000
+
+def run(oledClass, freq):
+    MockI2C.reset()
+    oled = oledClass(bus=KitronikI2CBus(freq=freq))
+    results = []
+    results.append(("Start up (settings and clear screen)", ) + measure(oled.init))
+    oled.setRefreshMode("full")
+    oled.displayText("Whole screen", 1)
+    results.append(("show(), whole screen", ) + measure(oled.show))
+    oled.setRefreshMode("diff")
+    oled.show()
+    oled.clearLine(3)
+    oled.displayText("DATA DISPLAY  *", 3)
+    results.append(("show(), one line changed", ) + measure(oled.show))
+    oled.clearLine(3)
+    oled.drawRect(0, 0, 10, 10)
+    oled.drawRect(100, 50, 10, 10)
+    results.append(("show(), two corners changed", ) + measure(oled.show))
+    results.append(("contrast()", ) + measure(lambda: oled.contrast(100)))
+    state = (bytes(display().gddram), display().contrast, display().displayOn)
+    assert state[0] == oled.buffer
+    return results, state
+
+for freq in (100000, 400000):
+    print("%d kHz I2C:" % (freq // 1000))
+    old, oldState = run(OneByOneOLED, freq)
+    new, newState = run(KitronikOLED, freq)
+    assert oldState == newState
+    for (name, oldCount, oldBytes, oldMs), (name, newCount, newBytes, newMs) in zip(old, new):
+        print("    %-38s one by one %3d transactions %5d bytes %7.2f ms    batched %3d transactions %5d bytes %7.2f ms" % (name + ":", oldCount, oldBytes, oldMs, newCount, newBytes, newMs))
+    assert new[0][1] <= 2 and new[1][1] == 1 and new[4][1] == 1
+    assert all(newMs <= oldMs for (name, count, size, oldMs), (name, count, size, newMs) in zip(old, new))
+print("PASS")
@@ -0,0 +1,132 @@
+# Check and benchmark: bytes sent and I2C bus time for each KitronikOLED.show(), in the "full", "dirty" and "diff" refresh modes
+# Runs on a PC: python3 oled_refresh_benchmark.py
+# The screen updates are the ones 'Example Code/smart_house_example.py' makes: moving the menu marker (clearLine() and displayText() on two lines), and updating the climate readings once a second
+# Also draws random text, lines, rectangles and FrameBuffer calls and checks the simulated display memory matches the screen after every show()
+# Exits with an AssertionError if the display memory is ever different to what should be showing
+import asyncio
+import random
+
+import host_stubs
+host_stubs.install()
+
+from host_stubs import MockI2C, oled as display
+from PicoAirQuality import KitronikI2CBus, KitronikOLED
+from PicoAirQualityAsync import KitronikOLEDAsync
+
+MENU = ["DATA DISPLAY", "DEVICE STATUS", "LIGHT CONTROL"]
+FREQ = 100000    # The bus speed the bus times are worked out at (the default - see KitronikI2CBus for faster speeds)
+
+def makeOLED():
+    return KitronikOLED(bus=KitronikI2CBus(freq=FREQ))
+
+def check(oled):
+    assert display().gddram == oled.buffer
+
+def mainMenu(oled):
+    oled.clear()
+    oled.displayText("MAIN MENU", 1, 30)
+    for i, option in enumerate(MENU):
+        oled.displayText(option + ("  *" if i == 0 else ""), i + 3)
+
+# Move the marker down one option, the same as the smart house example
+def moveMarker(oled, option):
+    oled.clearLine(option + 3)
+    oled.displayText(MENU[option], option + 3)
+    option = (option + 1) % 3
+    oled.clearLine(option + 3)
+    oled.displayText(MENU[option] + "  *", option + 3)
+    return option
+
+def climateData(oled, n):
+    oled.clearLine(2)
+    oled.displayText("T: " + str(21 + ((n // 5) % 3) / 10) + " C", 2)
+    oled.clearLine(3)
+    oled.displayText("P: " + str(101325 - (n % 2)) + " Pa", 3)
+    oled.clearLine(4)
+    oled.displayText("H: 45.2 %", 4)
+    oled.clearLine(5)
+    oled.displayText("IAQ: " + str(50 + (n // 10)), 5)
+    oled.clearLine(6)
+    oled.displayText("eCO2: " + str(600 + (n // 10) * 4) + " ppm", 6)
+
+# Time one kind of screen update: the average bytes sent and bus time per show()
+def measure(oled, update, count):
+    MockI2C.resetCounters()
+    saved = oled.totalBytesSaved
+    for n in range(count):
+        update(n)
+        oled.show()
+        check(oled)
+    assert oled.i2c.i2c.freq == FREQ    # The bus really runs at FREQ
+    return MockI2C.bytesMoved / count, MockI2C.busyUs / count / 1000, (oled.totalBytesSaved - saved) / count
+
+print("%d kHz I2C, bytes and bus time per show()" % (FREQ // 1000))
+results = {}
+for mode in ("full", "dirty", "diff"):
+    MockI2C.reset()
+    oled = makeOLED()
+    oled.setRefreshMode(mode)
+    oled.init()
+    check(oled)
+    state = {"option": 0}
+    rows = []
+    rows.append(("Main menu drawn", ) + measure(oled, lambda n: mainMenu(oled), 1))
+    rows.append(("Menu marker moved", ) + measure(oled, lambda n: state.update(option=moveMarker(oled, state["option"])), 30))
+    oled.clear()
+    oled.displayText("CLIMATE DATA", 1, 20)
+    oled.show()
+    rows.append(("Climate readings updated", ) + measure(oled, lambda n: climateData(oled, n), 60))
+    rows.append(("Nothing changed", ) + measure(oled, lambda n: None, 10))
+    results[mode] = rows
+    print(mode + ":")
+    for name, sent, busy, saved in rows:
+        print("    %-26s %7.1f bytes  %6.2f ms  %7.1f bytes saved (bytesSaved)" % (name + ":", sent, busy, saved))
+
+marker = [row[1] for row in results["diff"]]
+assert marker[1] * 10 < results["full"][1][1] and marker[3] == 0
+assert results["dirty"][1][1] * 2 < results["full"][1][1]
+
+# Random drawing: library functions in every mode, and the FrameBuffer functions directly in "diff" mode (or with markDirty() in "dirty" mode)
+generator = random.Random(21)
+for mode in ("full", "dirty", "diff"):
+    MockI2C.reset()
+    oled = makeOLED()
+    oled.setRefreshMode(mode)
+    for frame in range(300):
+        for change in range(generator.randrange(0, 4)):
+            kind = generator.randrange(7)
+            x = generator.randrange(-10, 130)
+            y = generator.randrange(-10, 70)
+            if (kind == 0):
+                oled.displayText("Frame %d" % frame, generator.randrange(1, 7), generator.randrange(0, 100))
+            elif (kind == 1):
+                oled.clearLine(generator.randrange(1, 7))
+            elif (kind == 2):
+                oled.drawLine(x, y, generator.randrange(-10, 130), generator.randrange(-10, 70))
+            elif (kind == 3):
+                oled.drawRect(x, y, generator.randrange(1, 40), generator.randrange(1, 30), generator.random() < 0.5)
+            elif (kind == 4):
+                if (generator.random() < 0.05):
+                    oled.clear()
+            elif (kind == 5):
+                oled.pixel(x, y, 0)
+                oled.markDirty(x, y, 1, 1)
+            elif (mode == "diff"):
+                oled.text("x", x, y, 1)    # Not marked - only "diff" mode finds it
+        oled.show()
+        check(oled)
+    print("Random drawing, %-5s mode: display matches after every show(), %d bytes saved" % (mode, oled.totalBytesSaved))
+
+# The asyncio show() sends the same changed areas, a page at a time
+async def asyncUpdates():
+    MockI2C.reset()
+    oled = KitronikOLEDAsync(makeOLED())
+    await oled.show()
+    for n in range(30):
+        climateData(oled, n)
+        await oled.show()
+        check(oled.oled)
+    return oled.lastShowBytes
+
+assert asyncio.run(asyncUpdates()) < 200
+print("PASS")
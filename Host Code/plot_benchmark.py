@@ -0,0 +1,137 @@
+# Check and benchmark: KitronikOLED.plot(), redrawing the whole graph for every new value vs the ring buffer that moves the graph along and draws only the newest line
+# Runs on a PC: python3 plot_benchmark.py
+# On the Pico the FrameBuffer functions (line(), scroll(), blit()) run as fast C code, and the time goes on the Python in plot() - so the work counted is the line() calls and values scaled to pixels for each plot()
+# (host_stubs draws scroll() and blit() a pixel at a time in Python, so PC time is not a fair comparison here)
+# Exits with an AssertionError if the plot area is ever different to the whole graph drawn from scratch with the same values, or if plot() turns off pixels it did not set
+import math
+import random
+
+import host_stubs
+host_stubs.install()
+
+import framebuf
+from host_stubs import MockI2C, oled as display
+from PicoAirQuality import KitronikOLED
+
+# The way plot() used to work, for comparison: all the values scaled to pixels and the whole graph drawn again for every new value
+# (with the old bugs fixed - the newest value was not drawn until the next plot(), and values below zero were drawn below the screen)
+class RedrawOLED(KitronikOLED):
+    def plot(self, variable):
+        variable = math.trunc(variable)
+        if not hasattr(self, "plotArray"):
+            self.plotArray = []
+        if (variable > self.plotYMax):
+            self.plotYMax = variable
+        if (variable < self.plotYMin):
+            self.plotYMin = variable
+        self.plotArray.append(variable)
+        if (len(self.plotArray) > 128):
+            self.plotArray.pop(0)
+        for x in range(len(self.plotArray)):
+            y = math.trunc((self.yPixelMin - self.yPixelMax) - ((self.plotArray[x] - self.plotYMin) * ((self.yPixelMin - self.yPixelMax) / (self.plotYMax - self.plotYMin)))) + self.yPixelMax
+            countScaled()
+            if (x == 0):
+                self.pixel(x, y, 1)
+            else:
+                self.line(x - 1, prevY, x, y, 1)
+            prevY = y
+
+counts = {"line": 0, "scaled": 0}
+def countScaled():
+    counts["scaled"] = counts["scaled"] + 1
+
+realLine = framebuf.FrameBuffer.line
+def countedLine(self, x0, y0, x1, y1, c):
+    counts["line"] = counts["line"] + 1
+    realLine(self, x0, y0, x1, y1, c)
+framebuf.FrameBuffer.line = countedLine
+
+realPlotRow = KitronikOLED.plotRow
+def countedPlotRow(self, value):
+    countScaled()
+    return realPlotRow(self, value)
+KitronikOLED.plotRow = countedPlotRow
+
+# The plot area of the screen as a list of rows of pixels
+def plotArea(oled):
+    return [[oled.pixel(x, y) for x in range(oled.width)] for y in range(oled.yPixelMax, oled.yPixelMin + 1)]
+
+# Readings that drift, with the occasional spike that widens the y range
+def readings(count, seed):
+    generator = random.Random(seed)
+    value = 400
+    for n in range(count):
+        value = value + generator.randrange(-6, 7)
+        if (generator.random() < 0.01):
+            yield value + generator.randrange(-900, 900)
+        else:
+            yield value
+
+def run(oledClass, values, screenClear=True):
+    MockI2C.reset()
+    oled = oledClass()
+    oled.init()
+    calls = 0
+    counts["line"] = 0
+    counts["scaled"] = 0
+    for value in values:
+        if screenClear:
+            oled.clear()
+            oled.displayText("eCO2", 1)
+        oled.plot(value)
+        calls = calls + 1
+    return oled, counts["line"] / calls, counts["scaled"] / calls
+
+values = list(readings(600, 24))
+old, oldLines, oldScaled = run(RedrawOLED, values)
+new, newLines, newScaled = run(KitronikOLED, values)
+print("%d values plotted, per plot() call:" % len(values))
+print("    Whole graph redrawn:  %6.1f line() calls  %6.1f values scaled to pixels" % (oldLines, oldScaled))
+print("    Ring buffer:          %6.1f line() calls  %6.1f values scaled to pixels (the whole graph only when the y range grows)" % (newLines, newScaled))
+assert plotArea(new) == plotArea(old)
+assert newLines * 10 < oldLines and newScaled * 20 < oldScaled
+
+# After every value (with and without clearing the screen between values) the plot area matches the whole graph drawn from scratch
+for screenClear in (True, False):
+    MockI2C.reset()
+    oled = KitronikOLED()
+    reference = RedrawOLED()
+    for n, value in enumerate(readings(400, 7)):
+        if screenClear:
+            oled.clear()
+        oled.plot(value)
+        reference.clear()
+        reference.plot(value)
+        assert plotArea(oled) == plotArea(reference), n
+        assert oled.pixel(min(n, 127), oled.plotRows[(oled.plotNext - 1) % 128] + oled.yPixelMax) == 1    # The newest value is drawn straight away
+    oled.show()
+    assert display().gddram == oled.buffer
+print("Plot area matches the whole graph drawn from scratch after every value, with and without clear() between values")
+
+# Text and markers drawn in the plot area are kept: each plot() only turns off the pixels the graph set before
+MockI2C.reset()
+oled = KitronikOLED()
+for n, value in enumerate(readings(300, 11)):
+    if (n % 50 == 0):
+        oled.displayText("%d" % n, 4, 60)
+        oled.drawRect(100, 30, 6, 6, True)
+    before = plotArea(oled)
+    graph = [[oled.plotFrame.pixel(x, y) if (oled.plotFrame is not None) else 0 for x in range(oled.width)] for y in range(len(before))]
+    oled.plot(value)
+    after = plotArea(oled)
+    for y in range(len(before)):
+        for x in range(oled.width):
+            if before[y][x] and not graph[y][x]:
+                assert after[y][x] == 1, (n, x, y)
+            if after[y][x] and not before[y][x]:
+                assert oled.plotFrame.pixel(x, y) == 1, (n, x, y)
+print("Text and markers in the plot area: kept by plot()")
+
+# Values below zero stay in the plot area
+oled = KitronikOLED()
+for value in (-50, 0, 50, -100, 100):
+    oled.plot(value)
+column = [oled.pixel(3, y) for y in range(64)]
+assert column[oled.yPixelMin] == 1 and sum(column[:oled.yPixelMax]) == 0
+print("Negative values: plotted inside the plot area")
+print("PASS")
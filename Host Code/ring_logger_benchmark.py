@@ -0,0 +1,117 @@
+# Benchmark: flash writes per entry once the log is full, KitronikDataLogger (removeOneLine) vs KitronikRingLogger
+# 'flash written' is host_stubs' estimate of what LittleFS writes, counting the rest of a file being copied when it is written in the middle (see host_stubs.files)
+# Runs on a PC: python3 ring_logger_benchmark.py
+# The log files are written to a temporary folder
+# Exits with an AssertionError if the ring log does not read back the newest entries in order, or loses them after a power cut while its header is replaced
+import os
+import tempfile
+import time
+
+import host_stubs
+host_stubs.install()
+host_stubs.countFiles()
+
+from host_stubs import PowerCut, files, powerCutAfter
+from PicoAirQuality import KitronikDataLogger
+from PicoAirQualityLogging import KitronikRingLogger
+
+MAX_FILE_SIZE = 50000     # Smaller than the 500kB default so the old method finishes in a reasonable time on a PC
+FULL_ENTRIES = 200
+
+os.chdir(tempfile.mkdtemp())
+
+def entry(n):
+    return ("01/01/2025", "12:%02d:%02d" % ((n // 60) % 60, n % 60), "%.2f" % (20 + (n % 500) / 100), str(101325 - (n % 40)), str(40 + (n % 9)), str(n % 500), str(400 + (n % 300)))
+
+def setUp(log):
+    log.writeProjectInfo("Kitronik Data Logger - Pico Smart Air Quality Board - www.kitronik.co.uk", "Name: User Name", "Subject: Ring log")
+    log.nameColumnHeadings("Date", "Time", "Temperature", "Pressure", "Humidity", "IAQ", "eCO2")
+
+# Fill the log until it is at the maximum size, then measure adding more entries
+def run(name, log):
+    n = 0
+    while (log.checkFileSize() <= MAX_FILE_SIZE - 64):
+        log.storeDataEntry(*entry(n))
+        n = n + 1
+    host_stubs.resetFileCounters()
+    start = time.perf_counter()
+    for i in range(FULL_ENTRIES):
+        log.storeDataEntry(*entry(n))
+        n = n + 1
+    elapsed = time.perf_counter() - start
+    print("%-20s %6d entries kept  %9.1f bytes written  %9.1f bytes flash written  %5.1f file operations  %8.1f us per entry (PC time)" % (name, entriesKept(log), files["bytesWritten"] / FULL_ENTRIES,
+          files["flashBytes"] / FULL_ENTRIES, (files["opens"] + files["removes"] + files["renames"]) / FULL_ENTRIES, elapsed * 1e6 / FULL_ENTRIES))
+    return n, files["flashBytes"] / FULL_ENTRIES
+
+def entriesKept(log):
+    if hasattr(log, "count"):
+        return log.count
+    f = open(log.FILENAME, "r")
+    lines = len(f.readlines()) - 4
+    f.close()
+    return lines
+
+print("Adding entries to a full log (%d bytes):" % MAX_FILE_SIZE)
+text = KitronikDataLogger("data_log.txt", "semicolon")
+text.MAX_FILE_SIZE = MAX_FILE_SIZE
+setUp(text)
+written, textFlash = run("KitronikDataLogger", text)
+
+ring = KitronikRingLogger("data_log.ring", "semicolon", slots=MAX_FILE_SIZE // 64, slotSize=64)
+setUp(ring)
+written, ringFlash = run("KitronikRingLogger", ring)
+assert ringFlash <= (ring.slotsPerChunk * ring.slotSize) + KitronikRingLogger.INDEX_RECORD_SIZE * 2 and ringFlash * 5 < textFlash
+
+# The ring log reads back the newest entries, oldest first, with the same layout as a text log
+ring.exportData("export.txt")
+f = open("export.txt", "rb")
+lines = f.read().decode().split("\r\n")
+f.close()
+assert lines[3] == "Date;Time;Temperature;Pressure;Humidity;IAQ;eCO2;"
+assert len(lines) - 5 == ring.slots
+for i, line in enumerate(lines[4:-1]):
+    assert line == ";".join(entry(written - ring.slots + i)) + ";", line
+
+# Restarting (the logger made again, then the project info and headings written, as at every boot) keeps the entries and leaves the header alone
+for boot in range(5):
+    host_stubs.resetFileCounters()
+    reopened = KitronikRingLogger("data_log.ring")
+    setUp(reopened)
+    assert files["bytesWritten"] == 0
+    assert list(reopened.readEntries()) == list(ring.readEntries())
+reopened.exportData("export2.txt")
+assert open("export2.txt", "rb").read() == open("export.txt", "rb").read()
+print("Restarted 5 times: entries kept, header not rewritten")
+
+# A different heading replaces the old one
+reopened.nameColumnHeadings("Date", "Time", "Temperature")
+headings = KitronikRingLogger("data_log.ring").headingsInfo
+assert headings == b"Date;Time;Temperature;\r\n"
+
+# A power cut at any point while the header is being replaced keeps the entries, with either the old or the new headings
+for cut in range(1000):
+    powerCutAfter(cut)
+    try:
+        reopened.nameColumnHeadings("Date", "Time", "Temperature", "Cut %d" % cut)
+        finished = True
+    except PowerCut:
+        finished = False
+    powerCutAfter(None)
+    restarted = KitronikRingLogger("data_log.ring")
+    assert (restarted.count == reopened.count) and (restarted.slots == reopened.slots), cut
+    assert restarted.headingsInfo in (headings, ("Date;Time;Temperature;Cut %d;\r\n" % cut).encode()), restarted.headingsInfo
+    headings = restarted.headingsInfo
+    reopened = restarted
+    if finished:
+        break
+assert finished and (cut > 2)
+print("Power cut while replacing the header (%d places tried): entries kept" % cut)
+
+# Removing / erasing entries only adds a record to the index
+host_stubs.resetFileCounters()
+reopened.removeOneLine()
+assert files["bytesWritten"] == KitronikRingLogger.INDEX_RECORD_SIZE and reopened.count == ring.slots - 1
+assert KitronikRingLogger("data_log.ring").count == ring.slots - 1
+reopened.eraseAllData()
+assert list(reopened.readEntries()) == []
+print("PASS")
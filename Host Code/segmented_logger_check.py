@@ -0,0 +1,122 @@
+# Check and benchmark: KitronikSegmentedLogger (hourly segment files with a time index) vs a single KitronikDataLogger file
+# Runs on a PC: python3 segmented_logger_check.py
+# Logs a simulated day and a half of readings (one every 10 seconds), then compares reading back the last hour and making space in a full log
+# The log files are written to a temporary folder
+# Exits with an AssertionError if the segments, index or retention are wrong
+import os
+import tempfile
+import time
+
+import host_stubs
+host_stubs.install()
+host_stubs.countFiles()
+
+from host_stubs import files
+from PicoAirQuality import KitronikDataLogger
+from PicoAirQualityLogging import KitronikSegmentedLogger
+
+INTERVAL = 10
+ENTRIES = 13000    # Just over 36 hours - more than fits in 500kB of text
+FULL_ENTRIES = 20
+
+os.chdir(tempfile.mkdtemp())
+
+# Simulated time.time(), moved on by INTERVAL seconds for each entry
+now = [1735689600]
+time.time = lambda: now[0]
+
+def entry(n):
+    t = time.gmtime(now[0])
+    return ("%02d/%02d/%04d" % (t[2], t[1], t[0]), "%02d:%02d:%02d" % (t[3], t[4], t[5]), "%.2f" % (20 + (n % 500) / 100), str(101325 - (n % 40)), str(40 + (n % 9)), str(n % 500), str(400 + (n % 300)))
+
+def setUp(log):
+    log.writeProjectInfo("Kitronik Data Logger - Pico Smart Air Quality Board - www.kitronik.co.uk", "Name: User Name", "Subject: Segmented log")
+    log.nameColumnHeadings("Date", "Time", "Temperature", "Pressure", "Humidity", "IAQ", "eCO2")
+
+# Fill the log, then measure adding FULL_ENTRIES more to the full log
+def run(name, log):
+    setUp(log)
+    log.setFlushPolicy(entries=100)    # Filling the log is quicker with the entries written in blocks
+    for n in range(ENTRIES):
+        log.storeDataEntry(*entry(n))
+        now[0] = now[0] + INTERVAL
+    log.setFlushPolicy(entries=1)
+    host_stubs.resetFileCounters()
+    start = time.perf_counter()
+    for n in range(ENTRIES, ENTRIES + FULL_ENTRIES):
+        log.storeDataEntry(*entry(n))
+        now[0] = now[0] + INTERVAL
+    log.flush()
+    elapsed = time.perf_counter() - start
+    print("%-24s full log: %9.1f bytes written per entry  %6.1f us per entry (PC time)" % (name, files["bytesWritten"] / FULL_ENTRIES, elapsed * 1e6 / FULL_ENTRIES))
+
+# The last hour from a single file means reading the whole file
+def lastHourText(log):
+    f = open(log.FILENAME, "rb")
+    lines = [line.decode() for line in f.read().split(b"\r\n")[4:-1]]
+    f.close()
+    return lines[-(3600 // INTERVAL):]
+
+startTime = now[0]
+text = KitronikDataLogger("data_log.txt", "semicolon")
+run("KitronikDataLogger", text)
+
+now[0] = startTime
+segmented = KitronikSegmentedLogger("data_log", "semicolon", segmentSize=0, segmentTime=3600, maxSegments=48)
+segmented.MAX_FILE_SIZE = text.MAX_FILE_SIZE
+run("KitronikSegmentedLogger", segmented)
+
+host_stubs.resetFileCounters()
+expected = lastHourText(text)
+print("%-24s last hour: %7d bytes read, %d file opened" % ("KitronikDataLogger", files["bytesRead"], files["opens"]))
+host_stubs.resetFileCounters()
+lastHour = [line[:-2] for line in segmented.readEntries(start=now[0] - 3600)]
+print("%-24s last hour: %7d bytes read, %d files opened (of %d segments)" % ("KitronikSegmentedLogger", files["bytesRead"], files["opens"], len(segmented.segments)))
+assert lastHour[-len(expected):] == expected
+assert len(lastHour) <= 2 * len(expected)
+
+# Segments start on the hour (the first entry is at midnight), each one is a complete text log, and the index matches the files
+assert len(segmented.segments) > 1
+header = segmented.segmentHeader()
+for number, headerLength, entries, first, last, size in segmented.segments:
+    f = open(segmented.segmentName(number), "rb")
+    data = f.read().decode()
+    f.close()
+    assert data.startswith(header) and (headerLength == len(header)) and (size == len(data))
+    assert entries == data.count("\r\n") - 4
+    assert (first % 3600 == 0) and (last - first == (entries - 1) * INTERVAL)
+assert segmented.checkFileSize() <= segmented.MAX_FILE_SIZE
+assert not os.path.exists(segmented.segmentName(segmented.segments[0][0] - 1))
+
+# Retention deletes whole segments: the oldest entries kept are the start of an hour
+entries = list(segmented.readEntries())
+assert entries[0].split(";")[1].endswith(":00:00")
+assert entries[-1][:-2] == expected[-1]
+
+# Reopening keeps the segments, and adding to the current one
+reopened = KitronikSegmentedLogger("data_log", "semicolon", segmentSize=0, segmentTime=3600, maxSegments=48)
+setUp(reopened)
+assert reopened.segments == segmented.segments
+reopened.storeDataEntry(*entry(0))
+assert reopened.segments[:-1] == segmented.segments[:-1] and reopened.segments[-1][2] == segmented.segments[-1][2] + 1
+
+# Changing the headings starts a new segment
+reopened.nameColumnHeadings("Date", "Time", "Temperature")
+reopened.storeDataEntry("01/01/2025", "00:00:00", "20.00")
+assert reopened.segments[-1][2] == 1 and reopened.segments[-1][0] == (segmented.segments[-1][0] + 1) % 1000
+
+# Size based segments
+sized = KitronikSegmentedLogger("sized", "comma", segmentSize=2000, maxSegments=3)
+setUp(sized)
+for n in range(200):
+    sized.storeDataEntry(*entry(n))
+assert len(sized.segments) == 3 and all(size <= 2000 for number, headerLength, entries, first, last, size in sized.segments)
+assert len([name for name in os.listdir(".") if name.startswith("sized.") and name != "sized.idx"]) == 3
+
+sized.removeOneLine()
+assert len(sized.segments) == 2
+sized.eraseAllData()
+assert list(sized.readEntries()) == [] and sized.checkFileSize() == 0
+sized.deleteDataFile()
+assert [name for name in os.listdir(".") if name.startswith("sized.")] == []
+print("PASS")
@@ -2,28 +2,51 @@ import math
 import framebuf
 import array
 import os
+import struct
 from machine import Pin, PWM, ADC, time_pulse_us, I2C, RTC
 from rp2 import PIO, StateMachine, asm_pio
-from time import sleep, sleep_ms, sleep_us, ticks_ms, ticks_us
+from time import sleep, sleep_ms, sleep_us, ticks_ms, ticks_us, ticks_diff
 from micropython import const
 from sys import implementation
+try:
+    from _thread import allocate_lock, get_ident
+except ImportError:
+    allocate_lock = None
 
-# Initialise the module with all outputs off
-# High Power Output Pins
-hp_3 = Pin(3, Pin.OUT)
-hp_15 = Pin(15, Pin.OUT)
-hp_3.value(0)
-hp_15.value(0)
-# Servo
-servo = Pin(2, Pin.OUT)
-servo.value(0)
-# Buzzer
-buzzer = PWM(Pin(4))
-buzzer.duty_u16(0)
+# Importing the module does not touch the hardware: each class sets up its pins, PIO, PWM or I2C the first time it is used
+# Call board.init() at the start of a program to put the outputs into a known (off) state straight away
 
 # List of which StateMachines we have used
 usedSM = [False, False, False, False, False, False, False, False]
 
+# The KitronikBoard class sets up the board hardware when the program chooses to, rather than on first use
+# 'parts' can include:
+#   "outputs" - high-power outputs (GP3 & GP15) off
+#   "servo" - servo pin (GP2) low (call before the servo is first used, as it takes over the pin)
+#   "buzzer" - buzzer (GP4) silent
+#   any instance of the classes in this module - its hardware is set up immediately (e.g. the BME688 soft reset and first reading)
+# board.init() with no arguments turns all the outputs off
+class KitronikBoard:
+    def __init__(self):
+        self.parts = []
+
+    def init(self, parts=("outputs", "servo", "buzzer")):
+        for part in parts:
+            if (part == "outputs"):
+                Pin(3, Pin.OUT).value(0)
+                Pin(15, Pin.OUT).value(0)
+            elif (part == "servo"):
+                Pin(2, Pin.OUT).value(0)
+            elif (part == "buzzer"):
+                PWM(Pin(4)).duty_u16(0)
+            elif isinstance(part, str):
+                raise ValueError("Unknown board part: " + part)
+            else:
+                part.init()
+            self.parts.append(part)
+
+board = KitronikBoard()
+
 # The KitronikButton class enable the use of the 2 user input buttons on the board
 class KitronikButton:
     def __init__(self):
@@ -47,11 +70,11 @@ class KitronikOutputControl:
         jmp(y_dec, "loop") #count down y by 1 and jump to pwmloop. When y is 0 we will go back to the 'pull' command
 
     def __init__(self):
-        # High Power Output Pins
-        self.highPwr_3 = Pin(3, Pin.OUT)
-        self.highPwr_15 = Pin(15, Pin.OUT)
+        # High Power Output Pins (set up on first use)
+        self.highPwr_3 = None
+        self.highPwr_15 = None
 
-        # Servo Control
+        # Servo Control (the StateMachine is claimed and started on first use)
         self.servo = []
         # Servo 0 degrees -> pulse of 0.5ms, 180 degrees 2.5ms
         # Pulse train freq 50hz - 20ms
@@ -64,7 +87,14 @@ class KitronikOutputControl:
         self.degreesToUS = 2000/180
         self.piEstimate = 3.1416
 
-        # Create and start the servo statemachine
+    # Set up the high-power output pins and the servo now, rather than on first use
+    def init(self):
+        self.initHighPower()
+        if not self.servo:
+            self.registerServo()
+
+    # Create the servo statemachine
+    def initServo(self):
         for i in range(8): # StateMachine range from 0 to 7
             if usedSM[i]:
                 continue # Ignore this index if already used
@@ -82,16 +112,17 @@ class KitronikOutputControl:
         self.servo[0].exec("pull()")
         self.servo[0].exec("mov(isr, osr)")
         self.servo[0].put(self.minServoPulse)
-        self.registerServo()
 
     # Doesn't actually register/unregister, just stops and starts the servo PIO
-    # The servo is registered by default in the __init__() function - these are only required if you want to use Pin 2 for something else, and then register the servo again
+    # The servo is registered automatically the first time it is moved - these are only required if you want to use Pin 2 for something else, and then register the servo again
     def registerServo(self):
+        if not self.servo:
+            self.initServo()
         if(not self.servo[0].active()):
             self.servo[0].active(1)
 
     def deregisterServo(self):
-        if(self.servo[0].active()):
+        if self.servo and (self.servo[0].active()):
             self.servo[0].active(0)
  
     # goToPosition takes a degree position for the servo to go to. 
@@ -113,17 +144,27 @@ class KitronikOutputControl:
             period = 500
         if(period >2500):
             period =2500
+        if not self.servo:
+            self.registerServo()
         self.servo[0].put(period)
 
+    # Set up the high power output pins (off)
+    def initHighPower(self):
+        if (self.highPwr_3 is None):
+            self.highPwr_3 = Pin(3, Pin.OUT, value=0)
+            self.highPwr_15 = Pin(15, Pin.OUT, value=0)
+
     # Functions to turn on/off the high power outputs
     # Enter the pin number, either '3' or '15'
     def highPowerOn(self, pin):
+        self.initHighPower()
         if (pin == 3):
             self.highPwr_3.value(1)
         elif (pin == 15):
             self.highPwr_15.value(1)
 
     def highPowerOff(self, pin):
+        self.initHighPower()
         if (pin == 3):
             self.highPwr_3.value(0)
         elif (pin == 15):
@@ -132,6 +173,8 @@ class KitronikOutputControl:
 # The KitronikDataLogger class enables data logging through the Pico file system
 # It is possible to create multiple data logger instances to then log to multiple files simulataneously
 class KitronikDataLogger:
+    DEFAULT_DECIMALS = 2    # Decimal places for floating point values, unless the column heading gives a number
+
     # Function is called when the class is initialised - sets the maximum permissable filesize, the data separator and creates the log file with the entered filename
     # Separator options: ("comma", "semicolon", "tab")
     def __init__(self, file = "data_log.txt", separator = "semicolon"):
@@ -154,6 +197,29 @@ class KitronikDataLogger:
         self.dataHeadings = ""
         self.projectInfo = False
         self.headings = False
+        self.fileSize = None    # Size of the log file, kept up to date as it is written (read from the file system when first needed)
+        self.decimals = []
+        self.separatorByte = ord(self.SEPARATOR)
+        self.row = bytearray(128)    # Each data entry is built up in this buffer
+        self.rowView = memoryview(self.row)
+
+        # Entries waiting to be written to the file (see setFlushPolicy()) - by default every entry is written straight away
+        self.buffer = []
+        self.bufferSize = 0
+        self.flushEntries = 1
+        self.flushSize = 0
+        self.flushInterval = 0
+        self.lastFlush = ticks_ms()
+
+    # Choose when data entries are written to the file: entries are kept in RAM and written together in one go when any of the limits is reached
+    # entries - number of entries    size - total length of the entries (characters)    interval - time since the last write (ms, checked when an entry is stored)
+    # A limit of 0 is not used, so with all three set to 0 entries are only written when flush() is called
+    # WARNING: Entries which have not been written yet are lost if the Pico is reset or loses power - call flush() before stopping the program
+    def setFlushPolicy(self, entries=0, size=0, interval=0):
+        self.flush()
+        self.flushEntries = entries
+        self.flushSize = size
+        self.flushInterval = interval
 
     # Write a header section to the specified file (there are 3 free text fields, each will write on a separate line)
     def writeProjectInfo(self, line1="", line2="", line3=""):
@@ -168,68 +234,168 @@ class KitronikDataLogger:
             self.line3 = line3
         self.projectInfo = True
 
-    # This writes whatever is passed to it to the file     
+    # This writes whatever is passed to it to the file (text, or the bytes of data entries)
+    # Text is written as its UTF-8 bytes, so fileSize goes up by the number of bytes written (not characters)
     def writeFile(self, file, passed):
-        f = open(file, "a") #open in append - creates if not existing, will append if it exists
+        if isinstance(passed, str):
+            passed = passed.encode()
+        f = open(file, "ab") #open in append - creates if not existing, will append if it exists
         f.write(passed)
         f.close()
+        if (file == self.FILENAME) and (self.fileSize is not None):
+            self.fileSize = self.fileSize + len(passed)
+
+    # Input and write to the file the data field headings (any number of them)
+    # A heading can be given with the number of decimal places to write that column's floating point values with, eg: ("Temperature", 1) - otherwise DEFAULT_DECIMALS is used
+    def nameColumnHeadings(self, *fields):
+        self.setColumns(fields)
+        self.writeFile(self.FILENAME, self.dataHeadings + "\r\n")
+        self.headings = True
 
-    # Input and write to the file up to 10 data field headings
-    def nameColumnHeadings(self, field1="", field2="", field3="", field4="", field5="", field6="", field7="", field8="", field9="", field10=""):
+    # Set up the heading text and the decimal places for each column
+    def setColumns(self, fields):
         dataHeadings = ""
-        if (field1 != ""):
-            dataHeadings = field1 + self.SEPARATOR
-        if (field2 != ""):
-            dataHeadings = dataHeadings + field2 + self.SEPARATOR
-        if (field3 != ""):
-            dataHeadings = dataHeadings + field3 + self.SEPARATOR
-        if (field4 != ""):
-            dataHeadings = dataHeadings + field4 + self.SEPARATOR
-        if (field5 != ""):
-            dataHeadings = dataHeadings + field5 + self.SEPARATOR
-        if (field6 != ""):
-            dataHeadings = dataHeadings + field6 + self.SEPARATOR
-        if (field7 != ""):
-            dataHeadings = dataHeadings + field7 + self.SEPARATOR
-        if (field8 != ""):
-            dataHeadings = dataHeadings + field8 + self.SEPARATOR
-        if (field9 != ""):
-            dataHeadings = dataHeadings + field9 + self.SEPARATOR
-        if (field10 != ""):
-            dataHeadings = dataHeadings + field10 + self.SEPARATOR
-
+        decimals = []
+        for field in fields:
+            if isinstance(field, tuple):
+                field, places = field
+            else:
+                places = self.DEFAULT_DECIMALS
+            if (field != ""):
+                dataHeadings = dataHeadings + field + self.SEPARATOR
+                decimals.append(places)
         self.dataHeadings = dataHeadings
-        self.writeFile(self.FILENAME, dataHeadings + "\r\n")
-        self.headings = True
-
-    # Store up to 10 data entries (match the order with the data headings used)
-    def storeDataEntry(self, field1="", field2="", field3="", field4="", field5="", field6="", field7="", field8="", field9="", field10=""):
-        dataEntry = ""
-        if (field1 != ""):
-            dataEntry = field1 + self.SEPARATOR
-        if (field2 != ""):
-            dataEntry = dataEntry + field2 + self.SEPARATOR
-        if (field3 != ""):
-            dataEntry = dataEntry + field3 + self.SEPARATOR
-        if (field4 != ""):
-            dataEntry = dataEntry + field4 + self.SEPARATOR
-        if (field5 != ""):
-            dataEntry = dataEntry + field5 + self.SEPARATOR
-        if (field6 != ""):
-            dataEntry = dataEntry + field6 + self.SEPARATOR
-        if (field7 != ""):
-            dataEntry = dataEntry + field7 + self.SEPARATOR
-        if (field8 != ""):
-            dataEntry = dataEntry + field8 + self.SEPARATOR
-        if (field9 != ""):
-            dataEntry = dataEntry + field9 + self.SEPARATOR
-        if (field10 != ""):
-            dataEntry = dataEntry + field10 + self.SEPARATOR
-
-        while (self.checkFileSize() > self.MAX_FILE_SIZE):
-            self.removeOneLine()
-
-        self.writeFile(self.FILENAME, dataEntry + "\r\n")
+        self.decimals = decimals
+
+    # Store a data entry (match the order with the data headings used) - any number of fields
+    # Fields can be text, or numbers: whole numbers are written as they are and floating point numbers with the column's decimal places
+    # The entry is built up in one reused buffer, so no text is made for each field
+    def storeDataEntry(self, *fields):
+        pos = 0
+        column = 0
+        for field in fields:
+            if isinstance(field, float) and ((field != field) or (field - field != 0)):
+                field = str(field)    # "nan" or "inf"
+            if isinstance(field, str):
+                if (field == ""):
+                    continue
+                data = field.encode()
+                self.reserveRow(pos, len(data) + 3)
+                self.row[pos:pos + len(data)] = data
+                pos = pos + len(data)
+            else:
+                if isinstance(field, float):
+                    if (column < len(self.decimals)):
+                        places = self.decimals[column]
+                    else:
+                        places = self.DEFAULT_DECIMALS
+                    pos = self.formatFixed(field, places, pos)
+                else:
+                    pos = self.formatFixed(field, 0, pos)
+            self.row[pos] = self.separatorByte
+            pos = pos + 1
+            column = column + 1
+        self.row[pos] = 13    # "\r\n"
+        self.row[pos + 1] = 10
+        self.writeRow(pos + 2)
+
+    # Store the first 'length' bytes of the row buffer as an entry
+    # With the default flush policy (and a logger which writes its entries to the file in the usual way) they are written straight from the row buffer with one write, so no copy of the entry is made
+    def writeRow(self, length):
+        if (self.flushEntries == 1) and (len(self.buffer) == 0) and (type(self).writeEntry is KitronikDataLogger.writeEntry) and (type(self).flush is KitronikDataLogger.flush):
+            self.lastFlush = ticks_ms()
+            self.writeData(self.rowView[:length])
+        else:
+            self.writeEntry(bytes(self.rowView[:length]))
+
+    # Make sure the row buffer has 'needed' bytes free after 'pos' (the buffer is made bigger if an entry does not fit)
+    def reserveRow(self, pos, needed):
+        if (pos + needed > len(self.row)):
+            self.row = self.row + bytearray(pos + needed)
+            self.rowView = memoryview(self.row)
+
+    # Write a number into the row buffer at 'pos' with 'places' decimal places (rounded half away from zero), returning the position after it
+    # (The separator and line end are written after it, so there is always room for 3 more bytes)
+    # Only whole number arithmetic is used to make the digits, so no text is made
+    def formatFixed(self, value, places, pos):
+        if isinstance(value, float):
+            if (value >= 0):
+                value = int((value * (10 ** places)) + 0.5)
+            else:
+                value = int((value * (10 ** places)) - 0.5)
+        else:
+            places = 0
+        negative = (value < 0)
+        if negative:
+            value = -value
+        digits = 1
+        remaining = value // 10
+        while (remaining > 0):
+            digits = digits + 1
+            remaining = remaining // 10
+        if (digits <= places):
+            digits = places + 1    # Leading "0" before the decimal point
+        end = pos + digits
+        if (places > 0):
+            end = end + 1
+        if negative:
+            end = end + 1
+        self.reserveRow(pos, end - pos + 3)
+        row = self.row
+        if negative:
+            row[pos] = 45    # "-"
+            pos = pos + 1
+        i = end - 1
+        for place in range(places):
+            row[i] = 48 + (value % 10)
+            value = value // 10
+            i = i - 1
+        if (places > 0):
+            row[i] = 46    # "."
+            i = i - 1
+        while (i >= pos):
+            row[i] = 48 + (value % 10)
+            value = value // 10
+            i = i - 1
+        return end
+
+    # Add one data entry (bytes, or text) to the buffer, and write the buffer to the file if the flush policy says it is time to
+    # (The loggers in PicoAirQualityLogging.py store their entries differently by replacing this function)
+    def writeEntry(self, dataEntry):
+        self.buffer.append(dataEntry)
+        self.bufferSize = self.bufferSize + len(dataEntry)
+        if (self.flushEntries and (len(self.buffer) >= self.flushEntries)) or (self.flushSize and (self.bufferSize >= self.flushSize)) or (self.flushInterval and (ticks_diff(ticks_ms(), self.lastFlush) >= self.flushInterval)):
+            self.flush()
+
+    # Write all the buffered entries to the file in one go, removing the earliest entries first if the file would go over the maximum size
+    # With the default policy (every entry written straight away) there is only ever one entry to write, so nothing is joined or trimmed
+    # Once the log is full, each write first copies the file to remove the earliest entries - buffering more entries (see setFlushPolicy()) makes this happen less often
+    def flush(self):
+        self.lastFlush = ticks_ms()
+        buffer = self.buffer
+        if (len(buffer) == 1):
+            data = buffer[0]
+        elif (len(buffer) == 0):
+            return
+        else:
+            while (self.bufferSize > self.MAX_FILE_SIZE) and (len(buffer) > 1):   # More than a whole file of entries waiting - keep the newest
+                self.bufferSize = self.bufferSize - len(buffer.pop(0))
+            data = buffer[0][:0].join(buffer)    # Joined with "" (or b"" for loggers which store bytes)
+        self.buffer = []
+        self.bufferSize = 0
+        self.writeData(data)
+
+    # Write data to the end of the file, removing the earliest entries first if the file would go over the maximum size
+    def writeData(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        if (self.fileSize is None):
+            self.fileSize = self.checkFileSize()
+        if (self.fileSize + len(data) > self.MAX_FILE_SIZE):
+            self.removeEntries(self.fileSize + len(data) - self.MAX_FILE_SIZE)
+            if (self.fileSize is None):
+                self.fileSize = self.checkFileSize()
+        self.writeFile(self.FILENAME, data)
 
     # This returns the size of the file, or 0 if the file does not exist
     def checkFileSize(self):
@@ -247,6 +413,10 @@ class KitronikDataLogger:
 
     # Remove a line from the data file to make space for more data
     def removeOneLine(self):
+        self.removeEntries(1)
+
+    # Remove the earliest data entries, at least 'size' characters worth, in one pass through the file
+    def removeEntries(self, size):
         tempName = self.FILENAME + ".bak"
         readFrom = open(self.FILENAME, "r")
         writeTo = open(tempName, "w")
@@ -259,34 +429,80 @@ class KitronikDataLogger:
         if self.headings:
             readFrom.readline()     # If there are Headings, skip over this line and then write them to the temporary file
             writeTo.write(self.dataHeadings  + "\r\n")
-        readFrom.readline()         # Read and throw away the first line of data in the file
-
-        for lines in readFrom:      # Write the remaining lines to the temporary file
-            writeTo.write(lines)
+        removed = 0
+        while (removed < size):     # Read and throw away the earliest lines of data in the file
+            line = readFrom.readline()
+            if (line == ""):
+                break
+            removed = removed + len(line)
+
+        while True:                 # Copy the rest of the file to the temporary file, a block at a time rather than line by line
+            block = readFrom.read(1024)
+            if (block == ""):
+                break
+            writeTo.write(block)
+        kept = writeTo.tell()
         readFrom.close()    # Close both files
         writeTo.close()
         os.remove(self.FILENAME)    # Delete original log file
-        os.rename(tempName, self.FILENAME)  # Rename temporary file as new log file (now with the first line of data removed)
+        os.rename(tempName, self.FILENAME)  # Rename temporary file as new log file (now with the earliest lines of data removed)
+        self.fileSize = kept
 
     # Deletes all the contents of the file
     def eraseAllData(self):
+        self.buffer = []
+        self.bufferSize = 0
         f = open(self.FILENAME, "w")
         f.write("")
         f.close()
+        self.fileSize = 0
+
+    # Move the log to '<file>.old' (replacing the one before) and start the file again with just the project info and headings - no entries are copied
+    def rotateFile(self):
+        try:
+            os.remove(self.FILENAME + ".old")
+        except OSError:
+            pass
+        os.rename(self.FILENAME, self.FILENAME + ".old")
+        header = self.fileHeader()
+        f = open(self.FILENAME, "wb")
+        f.write(header)
+        f.close()
+        self.fileSize = len(header)
+
+    # The project info and headings at the start of the file
+    def fileHeader(self):
+        header = ""
+        if self.projectInfo:
+            for line in (self.line1, self.line2, self.line3):
+                if (line != ""):
+                    header = header + line + "\r\n"
+        if self.headings:
+            header = header + self.dataHeadings + "\r\n"
+        return header.encode()
 
     # Deletes the file from the Pico file system
     def deleteDataFile(self):
+        self.buffer = []
+        self.bufferSize = 0
         os.remove(self.FILENAME)
+        self.fileSize = None
 
 # The KitronikBuzzer class enables control of the piezo buzzer on the board
 class KitronikBuzzer:
-    # Function is called when the class is initialised and sets the buzzer pin to GP4
+    # Function is called when the class is initialised - the buzzer PWM on GP4 is set up on first use
     def __init__(self):
-        self.buzzer = PWM(Pin(4))
+        self.buzzer = None
         self.dutyCycle = 32767
 
+    # Set up the buzzer PWM now, rather than on first use
+    def init(self):
+        if (self.buzzer is None):
+            self.buzzer = PWM(Pin(4))
+
     # Play a continous tone at a specified frequency
     def playTone(self, freq):
+        self.init()
         if (freq < 30):
             freq = 30
         if (freq > 3000):
@@ -302,6 +518,7 @@ class KitronikBuzzer:
 
     # Stop the buzzer producing a tone
     def stopTone(self):
+        self.init()
         self.buzzer.duty_u16(0)
 
 # The KitronikZIPLEDs class enables control of the ZIP LEDs both on the board and any connected externally
@@ -323,24 +540,9 @@ class KitronikZIPLEDs:
 
     def __init__(self, num_zip_leds):
         self.num_zip_leds = num_zip_leds
-        
-        # Create  and start the StateMachine for the ZIPLeds
-        for i in range(8): # StateMachine range from 0 to 7
-            if usedSM[i]:
-                continue # Ignore this index if already used
-            try:
-                self.ZIPLEDs = StateMachine(i, self._ZIPLEDOutput, freq=8_000_000, sideset_base=Pin(20))
-                usedSM[i] = True # Set this index to used
-                break # Have claimed the SM, can leave now
-            except ValueError:
-                pass # External resouce has SM, move on
-            if i == 7:
-                # Cannot find an unused SM
-                raise ValueError("Could not claim a StateMachine, all in use")
-        
+        self.ZIPLEDs = None     # The StateMachine is claimed and started on first show() (or by init())
         self.theLEDs = array.array("I", [0 for _ in range(self.num_zip_leds)]) #an array for the LED colours.
         self.brightness = 0.5 #20% initially 
-        self.ZIPLEDs.active(1)
             
         # Define some colour tuples for people to use.    
         self.BLACK = (0, 0, 0)
@@ -353,8 +555,27 @@ class KitronikZIPLEDs:
         self.WHITE = (255, 255, 255)
         self.COLOURS = (self.BLACK, self.RED, self.YELLOW, self.GREEN, self.CYAN, self.BLUE, self.PURPLE, self.WHITE)
 
+    # Create and start the StateMachine for the ZIPLeds
+    def init(self):
+        if (self.ZIPLEDs is not None):
+            return
+        for i in range(8): # StateMachine range from 0 to 7
+            if usedSM[i]:
+                continue # Ignore this index if already used
+            try:
+                self.ZIPLEDs = StateMachine(i, self._ZIPLEDOutput, freq=8_000_000, sideset_base=Pin(20))
+                usedSM[i] = True # Set this index to used
+                break # Have claimed the SM, can leave now
+            except ValueError:
+                pass # External resouce has SM, move on
+            if i == 7:
+                # Cannot find an unused SM
+                raise ValueError("Could not claim a StateMachine, all in use")
+        self.ZIPLEDs.active(1)
+
     # Show pushes the current setup of the LEDS to the physical LEDS - it makes them visible.
     def show(self):
+        self.init()
         brightAdjustedLEDs = array.array("I", [0 for _ in range(self.num_zip_leds)])
         for i,c in enumerate(self.theLEDs):
             r = int(((c >> 8) & 0xFF) * self.brightness)
@@ -537,12 +758,346 @@ class KitronikRTC:
                 newHour = newHour - 24
             self.setAlarm(newHour, newMinute, True, self.hourPeriod, self.minutePeriod)
 
+# The KitronikI2CBus class owns the I2C bus (I2C1 on GP6 & GP7) which is shared by the BME688 sensor and the OLED display
+# One instance is shared by all the classes which use the bus (see sharedI2CBus()), rather than each class setting up I2C1 again
+# It has the same transaction functions as machine.I2C, and also:
+#  - Serialises transactions: 'with bus:' holds the bus for a sequence of transactions which must not be interleaved (e.g. read-modify-write of a register)
+#  - Reuses a scratch buffer for single byte register reads and writes
+#  - Counts transactions and bytes for each device address, for profiling
+#  - Can pick the fastest bus speed the devices work at, if asked to (freq="auto", see negotiate())
+class KitronikI2CBus:
+    BME688_ADDRESSES = (0x77, 0x76)
+    OLED_ADDRESS = 0x3C
+    AUTO_SPEEDS = (400_000,)    # Bus speeds (Hz) tried by negotiate(), fastest first - the BME688 and the SSD1306 OLED both support 400 kHz fast mode
+    STANDARD_SPEED = 100_000
+
+    # The I2C peripheral is set up on the first transaction (or by init())
+    # freq - the bus speed in Hz (100 kHz by default), or "auto" to use the fastest speed at which the devices on the bus answer correctly
+    def __init__(self, sda=6, scl=7, freq=100_000):
+        self.sda = sda
+        self.scl = scl
+        self.i2c = None
+        self.freq = freq
+        self.bytesPerSecond = None    # Bus throughput measured by negotiate()
+        # Lock so that transactions from the second core (or threads) are kept separate
+        self.lock = allocate_lock() if allocate_lock else None
+        self.owner = None
+        self.depth = 0
+        self.deferred = []
+        self.scratch = bytearray(1)
+        self.counters = {}     # Device address: [transactions, bytes]
+
+    def init(self):
+        if (self.i2c is not None):
+            return
+        if (self.freq == "auto"):
+            self.setFrequency(self.STANDARD_SPEED)
+            self.negotiate()
+        else:
+            self.setFrequency(self.freq)
+
+    # Set up I2C1 at a bus speed (Hz)
+    def setFrequency(self, freq):
+        if implementation._mpy >= 4358:
+            self.i2c = I2C(1, sda=Pin(self.sda), scl=Pin(self.scl), freq=freq, timeout=100_000)
+        else:
+            self.i2c = I2C(1, sda=Pin(self.sda), scl=Pin(self.scl), freq=freq)
+        self.freq = freq
+
+    # Try each speed in 'speeds' (Hz, fastest first) and keep the fastest at which the devices on the bus answer correctly at that speed, or 100 kHz if none of them do
+    # The devices are found with a scan at 100 kHz, then each speed is checked with probe() - the bus throughput at the chosen speed is measured and kept in 'bytesPerSecond'
+    # Returns the speed chosen
+    def negotiate(self, speeds=None):
+        if (speeds is None):
+            speeds = self.AUTO_SPEEDS
+        self.acquire()
+        try:
+            self.setFrequency(self.STANDARD_SPEED)
+            devices = self.i2c.scan()
+            chosen = self.STANDARD_SPEED
+            for freq in speeds:
+                if (freq <= self.STANDARD_SPEED):
+                    continue
+                try:
+                    self.setFrequency(freq)
+                    if self.probe(devices):
+                        chosen = freq
+                        break
+                except OSError:
+                    pass
+            self.setFrequency(chosen)
+            self.bytesPerSecond = self.measureThroughput(devices)
+        finally:
+            self.release()
+        return chosen
+
+    # Check the BME688 and OLED (if they are on the bus) answer correctly, 3 times over: the BME688 chip ID must read 0x61
+    # The SSD1306 can only read back its status byte over I2C, so the OLED is sent a NOP command and its status byte must read the same each time
+    def probe(self, devices):
+        buf = bytearray(1)    # Not the scratch buffer, which anything run by release() may use
+        status = None
+        for attempt in range(3):
+            for addr in self.BME688_ADDRESSES:
+                if addr in devices:
+                    self.i2c.readfrom_mem_into(addr, 0xD0, buf)
+                    if (buf[0] != 0x61):
+                        return False
+            if self.OLED_ADDRESS in devices:
+                self.i2c.writeto(self.OLED_ADDRESS, b"\x80\xE3")    # Co=1, D/C#=0, NOP
+                self.i2c.readfrom_into(self.OLED_ADDRESS, buf)
+                if (status is not None) and (buf[0] != status):
+                    return False
+                status = buf[0]
+        return True
+
+    # Time reading 128 bytes of BME688 registers (reading does not change anything), returning the bytes moved per second - None if there is no BME688 on the bus
+    def measureThroughput(self, devices):
+        for addr in self.BME688_ADDRESSES:
+            if addr in devices:
+                buf = bytearray(32)
+                start = ticks_us()
+                for block in range(4):
+                    self.i2c.readfrom_mem_into(addr, 0x80 + (block * 32), buf)
+                elapsed = ticks_diff(ticks_us(), start)
+                return (4 * (len(buf) + 2) * 1000000) // max(elapsed, 1)    # 2 more bytes each: the device address and register address
+        return None
+
+    # Take the bus for a sequence of transactions (can be nested)
+    def acquire(self):
+        if (self.i2c is None):
+            self.init()
+        if self.lock is not None:
+            ident = get_ident()
+            if (self.owner != ident):
+                self.lock.acquire()
+                self.owner = ident
+        self.depth = self.depth + 1
+
+    # Give the bus back, then run anything which was deferred while it was held
+    def release(self):
+        self.depth = self.depth - 1
+        if (self.depth == 0):
+            self.owner = None
+            if self.lock is not None:
+                self.lock.release()
+            while self.deferred:
+                self.deferred.pop(0)()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.release()
+
+    # For use in timer and IRQ callbacks: call the function now if the bus is free, or as soon as the current sequence of transactions has finished
+    # (callbacks run on the same core as the main program, so they cannot wait for the main program to release the bus)
+    def runWhenFree(self, function):
+        if (self.depth > 0) and ((self.lock is None) or (self.owner == get_ident())):
+            self.deferred.append(function)
+        else:
+            function()
+
+    def count(self, addr, nbytes):
+        counter = self.counters.get(addr)
+        if counter is None:
+            counter = [0, 0]
+            self.counters[addr] = counter
+        counter[0] = counter[0] + 1
+        counter[1] = counter[1] + nbytes
+
+    # Returns (transactions, bytes) for a device address
+    def getCounters(self, addr):
+        counter = self.counters.get(addr, (0, 0))
+        return (counter[0], counter[1])
+
+    def resetCounters(self):
+        self.counters = {}
+
+    def scan(self):
+        self.init()
+        return self.i2c.scan()
+
+    def readfrom_mem(self, addr, memaddr, nbytes):
+        self.acquire()
+        try:
+            data = self.i2c.readfrom_mem(addr, memaddr, nbytes)
+        finally:
+            self.release()
+        self.count(addr, 1 + nbytes)
+        return data
+
+    def readfrom_mem_into(self, addr, memaddr, buf):
+        self.acquire()
+        try:
+            self.i2c.readfrom_mem_into(addr, memaddr, buf)
+        finally:
+            self.release()
+        self.count(addr, 1 + len(buf))
+
+    def writeto_mem(self, addr, memaddr, buf):
+        self.acquire()
+        try:
+            self.i2c.writeto_mem(addr, memaddr, buf)
+        finally:
+            self.release()
+        self.count(addr, 1 + len(buf))
+
+    def readfrom_into(self, addr, buf):
+        self.acquire()
+        try:
+            self.i2c.readfrom_into(addr, buf)
+        finally:
+            self.release()
+        self.count(addr, len(buf))
+
+    def writeto(self, addr, buf):
+        self.acquire()
+        try:
+            sent = self.i2c.writeto(addr, buf)
+        finally:
+            self.release()
+        self.count(addr, len(buf))
+        return sent
+
+    def writevto(self, addr, vector):
+        self.acquire()
+        try:
+            sent = self.i2c.writevto(addr, vector)
+        finally:
+            self.release()
+        nbytes = 0
+        for buf in vector:
+            nbytes = nbytes + len(buf)
+        self.count(addr, nbytes)
+        return sent
+
+    # Read a single register as an unsigned 8 bit integer, using the scratch buffer
+    # The bus is held until the value has been taken out of the scratch buffer, as release() runs any deferred callbacks, which may use it too
+    def readByte(self, addr, reg):
+        self.acquire()
+        try:
+            self.readfrom_mem_into(addr, reg, self.scratch)
+            value = self.scratch[0]
+        finally:
+            self.release()
+        return value
+
+    # Write a single register, using the scratch buffer
+    def writeByte(self, addr, reg, value):
+        self.acquire()
+        try:
+            self.scratch[0] = value
+            self.writeto_mem(addr, reg, self.scratch)
+        finally:
+            self.release()
+
+# The I2C bus shared by the BME688 and OLED classes, created when it is first needed
+i2cBus = None
+
+# Returns the shared KitronikI2CBus (a separate bus is created if different pins are requested)
+def sharedI2CBus(sda=6, scl=7):
+    global i2cBus
+    if (i2cBus is None):
+        i2cBus = KitronikI2CBus(sda, scl)
+    elif (i2cBus.sda != sda) or (i2cBus.scl != scl):
+        return KitronikI2CBus(sda, scl)
+    return i2cBus
+
+# The KitronikBME688Compensation class holds the BME688 compensation calculations with every term that only depends on the calibration parameters worked out once
+# It is created by KitronikBME688 when the calibration is loaded, and gives exactly the same results as calcTemperature(), intCalcPressure(), intCalcHumidity() & intCalcgRes()
+class KitronikBME688Compensation:
+    def __init__(self, bme688):
+        # Temperature
+        self.T1x2 = bme688.PAR_T1 << 1
+        self.T2 = bme688.PAR_T2
+        self.T3x16 = bme688.PAR_T3 << 4
+
+        # Pressure
+        self.P1 = bme688.PAR_P1
+        self.P2 = bme688.PAR_P2
+        self.P3x32 = bme688.PAR_P3 << 5
+        self.P4x65536 = bme688.PAR_P4 << 16
+        self.P5x2 = bme688.PAR_P5 << 1
+        self.P6 = bme688.PAR_P6
+        self.P7x128 = bme688.PAR_P7 << 7
+        self.P8 = bme688.PAR_P8
+        self.P9 = bme688.PAR_P9
+        self.P10 = bme688.PAR_P10
+
+        # Humidity: the terms that only depend on the (whole degree) temperature are kept for the last temperature used
+        self.H1x16 = bme688.PAR_H1 << 4
+        self.H2 = bme688.PAR_H2
+        self.H3 = bme688.PAR_H3
+        self.H4 = bme688.PAR_H4
+        self.H5 = bme688.PAR_H5
+        self.H6x128 = bme688.PAR_H6 << 7
+        self.H7 = bme688.PAR_H7
+        self.humidTemp = None
+        self.humidOffset = 0
+        self.humidScale = 0
+        self.humidVar4 = 0
+
+        # Gas resistance
+        self.gasRangeValues = bme688.GAS_RANGE_VALUES
+
+        self.tFine = 0      # Intermediate temperature value from the last compensate()
+
+    # Work out the humidity terms for a temperature in whole degrees C
+    def setHumidityTemp(self, tempScaled):
+        self.humidTemp = tempScaled
+        self.humidOffset = self.H1x16 + (((tempScaled * self.H3) // 100) >> 1)
+        self.humidScale = (self.H2 * (((tempScaled * self.H4) // 100) + (((tempScaled * ((tempScaled * self.H5) // 100)) >> 6) // 100) + (1 << 14))) >> 10
+        self.humidVar4 = (self.H6x128 + ((tempScaled * self.H7) // 100)) >> 4
+
+    # Compensate one set of raw ADC readings
+    # Returns (temperature in 1/100 degC, pressure in Pa, humidity in %, gas resistance in Ohms)
+    def compensate(self, tRaw, pRaw, hRaw, gResRaw, gasRange):
+        # Temperature
+        var1 = (tRaw >> 3) - self.T1x2
+        tFine = ((var1 * self.T2) >> 11) + (((((var1 >> 1) * (var1 >> 1)) >> 12) * self.T3x16) >> 14)
+        self.tFine = tFine
+        temperature = ((tFine * 5) + 128) >> 8
+
+        # Pressure
+        var1 = (tFine >> 1) - 64000
+        var1Sq = (var1 >> 2) * (var1 >> 2)
+        var2 = (((((var1Sq >> 11) * self.P6) >> 2) + (var1 * self.P5x2)) >> 2) + self.P4x65536
+        var1 = (((((var1Sq >> 13) * self.P3x32) >> 3) + ((self.P2 * var1) >> 1)) >> 18)
+        var1 = ((32768 + var1) * self.P1) >> 15
+        pressure = ((1048576 - pRaw) - (var2 >> 12)) * 3125
+        if (pressure >= (1 << 30)):
+            pressure = (pressure // var1) << 1
+        else:
+            pressure = (pressure << 1) // var1
+        var1 = (self.P9 * (((pressure >> 3) * (pressure >> 3)) >> 13)) >> 12
+        var2 = ((pressure >> 2) * self.P8) >> 13
+        var3 = pressure >> 8
+        var3 = (var3 * var3 * var3 * self.P10) >> 17
+        pressure = pressure + ((var1 + var2 + var3 + self.P7x128) >> 4)
+
+        # Humidity: uses the temperature in whole degrees C (rounded towards 0)
+        if (temperature < 0):
+            tempScaled = -((-temperature) // 100)
+        else:
+            tempScaled = temperature // 100
+        if (tempScaled != self.humidTemp):
+            self.setHumidityTemp(tempScaled)
+        var3 = (hRaw - self.humidOffset) * self.humidScale
+        var5 = ((var3 >> 14) * (var3 >> 14)) >> 10
+        humidity = ((((var3 + ((self.humidVar4 * var5) >> 1)) >> 10) * 1000) >> 12) // 1000
+
+        # Gas resistance
+        gasRes = (self.gasRangeValues[gasRange] // (2560 + (gResRaw * 3))) * 100     # 4096 + ((gResRaw - 512) * 3)
+
+        return temperature, pressure, humidity, gasRes
+
 # The KitronikBME688 class enables contro and use of the BME688 sensor on the board
 class KitronikBME688:
     # The following functions are for reading the registers on the BME688
     # Function for reading register as signed 8 bit integer
     def getUInt8(self, reg):
-        return int.from_bytes(self.i2c.readfrom_mem(self.CHIP_ADDRESS, reg, 1), "big")
+        return self.i2c.readByte(self.CHIP_ADDRESS, reg)
     
     # Function to convert unsigned ints to twos complement signed ints
     def twosComp(self, value, bits):
@@ -556,15 +1111,12 @@ class KitronikBME688:
         mappedVal = toMin + ((value - frMin) * ((toMax - toMin) / (frMax - frMin)))
         return mappedVal
 
-    def __init__(self, i2cAddr=0x77, sda=6, scl=7):
+    # 'bus' is the KitronikI2CBus to use - by default the bus shared with the OLED display
+    def __init__(self, i2cAddr=0x77, sda=6, scl=7, calibrationCache=None, bus=None):
         self.CHIP_ADDRESS = i2cAddr    # I2C address as determined by hardware configuration
-        sda = Pin(sda)
-        scl = Pin(scl)
-        
-        if implementation._mpy >= 4358:
-            self.i2c = I2C(1, sda=sda, scl=scl, freq=100_000, timeout=100_000)
-        else:
-            self.i2c = I2C(1, sda=sda, scl=scl, freq=100_000)
+        if (bus is None):
+            bus = sharedI2CBus(sda, scl)
+        self.i2c = bus
 
         # Useful BME688 Register Addresses
         # Control
@@ -575,6 +1127,9 @@ class KitronikBME688:
         self.CONFIG = 0x75          # Bit position <4:2>: IIR filter settings
         self.CTRL_GAS_0 = 0x70      # Bit position <3>: Heater off (set to '1' to turn off current injection)
         self.CTRL_GAS_1 = 0x71      # Bit position <5> DATASHEET ERROR: Enable gas conversions to start when set to '1'   Bit position <3:0>: Heater step selection (0 to 9)
+        self.RES_HEAT_0 = 0x5A      # Heater step 0 target resistance (res_heat_1 to res_heat_9 follow at 0x5B - 0x63)
+        self.GAS_WAIT_0 = 0x64      # Heater step 0 duration (gas_wait_1 to gas_wait_9 follow at 0x65 - 0x6D) - in parallel mode this is a multiplier of the shared cycle time
+        self.GAS_WAIT_SHARED = 0x6E # Parallel mode: Heater time added to every TPHG cycle, in 0.477ms steps    Bits <7:6> are a multiplier (1, 4, 16 or 64 times)
 
         # Pressure Data
         self.PRESS_MSB_0 = 0x1F     # Forced & Parallel: MSB [19:12]
@@ -597,40 +1152,18 @@ class KitronikBME688:
         # Status
         self.MEAS_STATUS_0 = 0x1D   # Forced & Parallel: Bit <7>: New data    Bit <6>: Gas measuring    Bit <5>: Measuring    Bit <3:0>: Gas measurement index
 
-        # Calibration parameters for compensation calculations
-        # Temperature
-        self.PAR_T1 = self.twosComp((self.getUInt8(0xEA) << 8) | self.getUInt8(0xE9), 16)      # Signed 16-bit
-        self.PAR_T2 = self.twosComp((self.getUInt8(0x8B) << 8) | self.getUInt8(0x8A), 16)      # Signed 16-bit
-        self.PAR_T3 = self.twosComp(self.getUInt8(0x8C), 8)           # Signed 8-bit
-
-        # Pressure
-        self.PAR_P1 = (self.getUInt8(0x8F) << 8) | self.getUInt8(0x8E)   # Always a positive number, do not do twosComp() conversion!
-        self.PAR_P2 = self.twosComp((self.getUInt8(0x91) << 8) | self.getUInt8(0x90), 16)      # Signed 16-bit
-        self.PAR_P3 = self.twosComp(self.getUInt8(0x92), 8)                                 # Signed 8-bit
-        self.PAR_P4 = self.twosComp((self.getUInt8(0x95) << 8) | self.getUInt8(0x94), 16)      # Signed 16-bit
-        self.PAR_P5 = self.twosComp((self.getUInt8(0x97) << 8) | self.getUInt8(0x96), 16)      # Signed 16-bit
-        self.PAR_P6 = self.twosComp(self.getUInt8(0x99), 8)                                 # Signed 8-bit
-        self.PAR_P7 = self.twosComp(self.getUInt8(0x98), 8)                                 # Signed 8-bit
-        self.PAR_P8 = self.twosComp((self.getUInt8(0x9D) << 8) | self.getUInt8(0x9C), 16)      # Signed 16-bit
-        self.PAR_P9 = self.twosComp((self.getUInt8(0x9F) << 8) | self.getUInt8(0x9E), 16)      # Signed 16-bit
-        self.PAR_P10 = self.twosComp(self.getUInt8(0xA0), 8)                                # Signed 8-bit
-
-        # Humidity
-        parH1_LSB_parH2_LSB = self.getUInt8(0xE2)
-        self.PAR_H1 = (self.getUInt8(0xE3) << 4) | (parH1_LSB_parH2_LSB & 0x0F)
-        self.PAR_H2 = (self.getUInt8(0xE1) << 4) | (parH1_LSB_parH2_LSB >> 4)
-        self.PAR_H3 = self.twosComp(self.getUInt8(0xE4), 8)                                 # Signed 8-bit
-        self.PAR_H4 = self.twosComp(self.getUInt8(0xE5), 8)                                 # Signed 8-bit
-        self.PAR_H5 = self.twosComp(self.getUInt8(0xE6), 8)                                 # Signed 8-bit
-        self.PAR_H6 = self.twosComp(self.getUInt8(0xE7), 8)                                 # Signed 8-bit
-        self.PAR_H7 = self.twosComp(self.getUInt8(0xE8), 8)                                 # Signed 8-bit
+        # Field 0 data block: MEAS_STATUS_0 (0x1D) to GAS_RES_LSB_0 (0x2D) is read in one burst into this buffer
+        self.FIELD_LENGTH = 17
+        self.fieldData = bytearray(self.FIELD_LENGTH)
+        # Parallel mode: all three data fields (0x1D - 0x4D) are read in one burst into this buffer
+        self.parallelData = bytearray(self.FIELD_LENGTH * 3)
 
-        # Gas resistance
-        self.PAR_G1 = self.twosComp(self.getUInt8(0xED), 8)                                 # Signed 8-bit
-        self.PAR_G2 = self.twosComp((self.getUInt8(0xEB) << 8) | self.getUInt8(0xEC), 16)      # Signed 16-bit
-        self.PAR_G3 = self.getUInt8(0xEE)                                # Unsigned 8-bit
-        self.RES_HEAT_RANGE = (self.getUInt8(0x02) >> 4) & 0x03
-        self.RES_HEAT_VAL = self.twosComp(self.getUInt8(0x00), 8)              # Signed 8-bit
+        # Calibration parameters for compensation calculations
+        # The raw calibration data is read in three bursts (0x8A - 0xA0, 0xE1 - 0xEE & 0x00 - 0x02) into one 40 byte buffer and decoded with struct
+        # If a calibration cache file name is given, the raw calibration data is saved to flash on the first run and loaded from there on later runs
+        self.CALIBRATION_LENGTH = 40
+        self.calibrationData = bytearray(self.CALIBRATION_LENGTH)
+        self.calibrationCache = calibrationCache
 
         # Oversampling rate constants
         self.OSRS_1X = 0x01
@@ -638,6 +1171,14 @@ class KitronikBME688:
         self.OSRS_4X = 0x03
         self.OSRS_8X = 0x04
         self.OSRS_16X = 0x05
+        self.OSRS_CYCLES = (0, 1, 2, 4, 8, 16, 16, 16)     # Number of measurement cycles for each oversampling setting
+
+        # Gas resistance range constants: 10000 * (262144 >> gasRange) for each of the 16 gas ranges, so only one division is needed per reading
+        self.GAS_RANGE_VALUES = tuple(10000 * (262144 >> gasRange) for gasRange in range(16))
+
+        # Heater resistances already calculated, keyed by (ambient temperature term, target temperature) - cleared when it gets too big
+        self.heaterCache = {}
+        self.HEATER_CACHE_SIZE = 32
 
         # IIR filter coefficient values
         self.IIR_0 = 0x00
@@ -663,11 +1204,31 @@ class KitronikBME688:
         self.eCO2Value = 0
 
         self.gBase = 0
+        self.BURN_IN_READINGS = 60     # calcBaselines() takes the mean of 60 readings...
+        self.BURN_IN_INTERVAL = 5000   # ...taken 5 seconds (5000ms) apart
+        self.burnInData = 0
+        self.ambTotal = 0
         self.hBase = 40        # Between 30% & 50% is a widely recognised optimal indoor humidity, 40% is a good middle ground
         self.hWeight = 0.25     # Humidity contributes 25% to the IAQ score, gas resistance is 75%
         self.hPrev = 0
         self.measTime = 0
         self.measTimePrev = 0
+        self.measStart = 0
+        self.measDuration = None    # Expected forced mode measurement time in ms, calculated when first needed
+        self.measuring = False
+        self.dataReady = False
+        self.heatDuration = 0       # Gas sensor heater on time in ms
+        self.targetTemp = None      # Forced mode heater settings from setupGasSensor(), restored when parallel mode is stopped
+        self.heatTime = None
+
+        self.parallelMode = False
+        self.profileLength = 0
+        self.profileDurations = []  # Actual length of each heater profile step in ms
+        self.profileCycleTime = 0   # Time in ms to run through the whole heater profile once
+        self.lastSubMeas = 0        # sub_meas_index of the last parallel mode field read
+        self.missedFields = 0       # Parallel mode fields overwritten before they were read
+        self.gasFingerprint = []    # Latest gas resistance from each heater profile step
+        self.fingerprintSteps = 0   # Bit for each heater profile step measured since the last complete fingerprint
 
         self.tRaw = 0    # adc reading of raw temperature
         self.pRaw = 0       # adc reading of raw pressure
@@ -681,10 +1242,86 @@ class KitronikBME688:
         self.ambTempFlag = False
 
         # Create an instance of the OLED display screen for use during setup and for error messages
-        self.screen = KitronikOLED()
-
-        # Begin the hardware inititialisation for the BME688 sensor
-        self.bme688Init()
+        self.screen = KitronikOLED(bus=self.i2c)
+
+        # The hardware initialisation for the BME688 sensor happens on first use (or by calling init())
+
+    # Load the calibration parameters, either from the calibration cache file (if one is being used and it is valid) or from the BME688
+    def loadCalibration(self):
+        chipID = self.getUInt8(self.CHIP_ID)
+        if not self.readCalibrationCache(chipID):
+            data = memoryview(self.calibrationData)
+            self.i2c.readfrom_mem_into(self.CHIP_ADDRESS, 0x8A, data[0:23])     # 0x8A - 0xA0: Temperature & Pressure
+            self.i2c.readfrom_mem_into(self.CHIP_ADDRESS, 0xE1, data[23:37])    # 0xE1 - 0xEE: Humidity, PAR_T1 & Gas
+            self.i2c.readfrom_mem_into(self.CHIP_ADDRESS, 0x00, data[37:40])    # 0x00 - 0x02: Heater resistance value & range
+            self.writeCalibrationCache(chipID)
+        self.decodeCalibration(self.calibrationData)
+
+    # Decode the calibration parameters from the 40 byte raw calibration data
+    def decodeCalibration(self, data):
+        # Temperature & Pressure: registers 0x8A - 0xA0 (unused registers are unpacked to 'unused' and ignored)
+        (self.PAR_T2, self.PAR_T3, unused,
+         self.PAR_P1, self.PAR_P2, self.PAR_P3, unused,
+         self.PAR_P4, self.PAR_P5, self.PAR_P7, self.PAR_P6, unused, unused,
+         self.PAR_P8, self.PAR_P9, self.PAR_P10) = struct.unpack_from("<hbBHhbBhhbbBBhhb", data, 0)     # PAR_P1 is always a positive number
+
+        # Humidity: registers 0xE1 - 0xE8 (PAR_H1 & PAR_H2 are 12-bit values which share the 0xE2 register)
+        (parH2_MSB, parH1_LSB_parH2_LSB, parH1_MSB,
+         self.PAR_H3, self.PAR_H4, self.PAR_H5, self.PAR_H6, self.PAR_H7) = struct.unpack_from("<BBBbbbbb", data, 23)
+        self.PAR_H1 = (parH1_MSB << 4) | (parH1_LSB_parH2_LSB & 0x0F)
+        self.PAR_H2 = (parH2_MSB << 4) | (parH1_LSB_parH2_LSB >> 4)
+
+        # Temperature: PAR_T1 registers 0xE9 - 0xEA (signed 16-bit)
+        self.PAR_T1 = struct.unpack_from("<h", data, 31)[0]
+
+        # Gas resistance: registers 0xEB - 0xEE (PAR_G2 is read with 0xEB as the MSB)
+        (self.PAR_G2, self.PAR_G1, self.PAR_G3) = struct.unpack_from(">hbB", data, 33)
+        self.RES_HEAT_VAL = struct.unpack_from("<b", data, 37)[0]             # Signed 8-bit
+        self.RES_HEAT_RANGE = (data[39] >> 4) & 0x03
+        self.heaterCache = {}
+        self.compensation = KitronikBME688Compensation(self)
+
+    # Simple 16-bit checksum (Fletcher-16) used to check that the calibration cache file has not been corrupted
+    def calibrationChecksum(self, data):
+        sum1 = 0
+        sum2 = 0
+        for byte in data:
+            sum1 = (sum1 + byte) % 255
+            sum2 = (sum2 + sum1) % 255
+        return (sum2 << 8) | sum1
+
+    # Calibration cache file format: chip ID (1 byte), data length (1 byte), checksum (2 bytes), raw calibration data (40 bytes)
+    # Returns True if the cache file exists, matches the chip ID and the checksum is correct, with the data loaded into calibrationData
+    # Note: The chip ID is the same for every BME688, so delete the cache file if the Pico is moved to a different board
+    def readCalibrationCache(self, chipID):
+        if (self.calibrationCache is None):
+            return False
+        try:
+            f = open(self.calibrationCache, "rb")
+            header = f.read(4)
+            data = f.read(self.CALIBRATION_LENGTH)
+            f.close()
+        except OSError:
+            return False
+        if (len(header) != 4) or (len(data) != self.CALIBRATION_LENGTH):
+            return False
+        cachedChipID, length, checksum = struct.unpack("<BBH", header)
+        if (cachedChipID != chipID) or (length != self.CALIBRATION_LENGTH) or (checksum != self.calibrationChecksum(data)):
+            return False
+        self.calibrationData[:] = data
+        return True
+
+    # Save the raw calibration data to the calibration cache file (if one is being used)
+    def writeCalibrationCache(self, chipID):
+        if (self.calibrationCache is None):
+            return
+        try:
+            f = open(self.calibrationCache, "wb")
+            f.write(struct.pack("<BBH", chipID, self.CALIBRATION_LENGTH, self.calibrationChecksum(self.calibrationData)))
+            f.write(self.calibrationData)
+            f.close()
+        except OSError:
+            pass    # Not being able to save the cache is not fatal, the calibration will be read from the BME688 again next time
 
     # Temperature compensation calculation: rawADC to degrees C (integer)
     def calcTemperature(self, tempADC):
@@ -735,12 +1372,37 @@ class KitronikBME688:
         self.hRead = (((var3 + var6) >> 10) * (1000)) >> 12
         self.hRead = self.hRead // 1000
 
+    # Calculate the compensated readings from the raw ADC values (tRaw, pRaw, hRaw & gResRaw) using the precalculated compensation terms
+    # Gives the same results as calling calcTemperature(), intCalcPressure(), intCalcHumidity() & intCalcgRes() in turn
+    def compensateReadings(self, gasRange):
+        temperature, self.pRead, humidity, self.gRes = self.compensation.compensate(self.tRaw, self.pRaw, self.hRaw, self.gResRaw, gasRange)
+        self.t_fine = self.compensation.tFine
+        self.newAmbTemp = temperature
+        self.tRead = temperature / 100
+        if (self.ambTempFlag == False):
+            self.tAmbient = temperature
+        self.hPrev = self.hRead
+        self.hRead = humidity
+
     # Gas sensor heater target temperature to target resistance calculation
     # 'ambientTemp' is reading from Temperature sensor in degC (could be averaged over a day when there is enough data?)
     # 'targetTemp' is the desired temperature of the hot plate in degC (in range 200 to 400)
     # Note: Heating duration also needs to be specified for each heating step in 'gas_wait' registers
+    # The ambient temperature only affects the result through the 'ambientTerm', so results are cached by (ambientTerm, targetTemp) - heater profiles can be reprogrammed without recalculating
     def intConvertGasTargetTemp(self, ambientTemp, targetTemp):
-        var1 = int((ambientTemp * self.PAR_G3) // 1000) << 8    # Divide by 1000 as we have ambientTemp in pre-degC format (i.e. 2500 rather than 25.00 degC)
+        ambientTerm = int((ambientTemp * self.PAR_G3) // 1000)     # Divide by 1000 as we have ambientTemp in pre-degC format (i.e. 2500 rather than 25.00 degC)
+        key = (ambientTerm, targetTemp)
+        resHeat = self.heaterCache.get(key)
+        if (resHeat is None):
+            resHeat = self.calcHeaterResistance(ambientTerm, targetTemp)
+            if (len(self.heaterCache) >= self.HEATER_CACHE_SIZE):
+                self.heaterCache.clear()
+            self.heaterCache[key] = resHeat
+        return resHeat
+
+    # The heater resistance calculation for intConvertGasTargetTemp()
+    def calcHeaterResistance(self, ambientTerm, targetTemp):
+        var1 = ambientTerm << 8
         var2 = (self.PAR_G1 + 784) * (((((self.PAR_G2 + 154009) * targetTemp * 5) // 100) + 3276800) // 10)
         var3 = var1 + (var2 >> 1)
         var4 = (var3 // (self.RES_HEAT_RANGE + 4))
@@ -751,21 +1413,26 @@ class KitronikBME688:
         return resHeat
 
     # Gas resistance compensation calculation: rawADC & range to Ohms (integer)
+    # The range constant, 10000 * (262144 >> gasRange), comes from the GAS_RANGE_VALUES table
     def intCalcgRes(self, gasADC, gasRange):
-        var1 = 262144 >> gasRange
         var2 = gasADC - 512
         var2 = var2 * 3
         var2 = 4096 + var2
-        calcGasRes = ((10000 * var1) // var2)
+        calcGasRes = (self.GAS_RANGE_VALUES[gasRange] // var2)
         self.gRes = calcGasRes * 100
 
-    # Initialise the BME688, establishing communication, entering initial T, P & H oversampling rates, setup filter and do a first data reading (won't return gas)
+    # Set up the BME688 now, rather than on first use
+    def init(self):
+        if (self.bme688InitFlag == False):
+            self.bme688Init()
+
+    # Initialise the BME688, establishing communication, reading the calibration parameters, entering initial T, P & H oversampling rates, setup filter and do a first data reading (won't return gas)
     def bme688Init(self):
+        self.loadCalibration()
         # Establish communication with BME688
-        chipID = self.i2c.readfrom_mem(self.CHIP_ADDRESS, self.CHIP_ID, 1)
-        chipID = int.from_bytes(chipID, "big")
+        chipID = self.getUInt8(self.CHIP_ID)
         while (chipID != 97):
-            chipID = self.i2c.readfrom_mem(self.CHIP_ADDRESS, self.CHIP_ID, 1)
+            chipID = self.getUInt8(self.CHIP_ID)
         # Do a soft reset
         self.i2c.writeto_mem(self.CHIP_ADDRESS, self.RESET, "\xB6")
         sleep_ms(1000)
@@ -783,6 +1450,7 @@ class KitronikBME688:
         # Enable gas conversion: CTRL_GAS_1 bit <5>    (although datasheet says <4> - not sure what's going on here...)
         self.i2c.writeto_mem(self.CHIP_ADDRESS, self.CTRL_GAS_1, "\x20")
         self.bme688InitFlag = True
+        self.measDuration = None
 
         # Do an initial data read (will only return temperature, pressure and humidity as no gas sensor parameters have been set)
         self.measureData()
@@ -795,6 +1463,8 @@ class KitronikBME688:
     def setupGasSensor(self, targetTemp=300, heatDuration=180):
         if (self.bme688InitFlag == False):
             self.bme688Init()
+        if self.parallelMode:
+            self.stopParallelMode(False)
 
         # Limit targetTemp between 200°C & 400°C
         if (targetTemp < 200):
@@ -807,9 +1477,11 @@ class KitronikBME688:
             heatDuration = 0
         elif (heatDuration > 4032):
             heatDuration = 4032
+        self.targetTemp = targetTemp
+        self.heatTime = heatDuration
 
         # Define the target heater resistance from temperature
-        self.i2c.writeto_mem(self.CHIP_ADDRESS, 0x5A, self.intConvertGasTargetTemp(self.tAmbient, targetTemp).to_bytes(1, 'big'))   # res_wait_0 register - heater step 0
+        self.i2c.writeByte(self.CHIP_ADDRESS, self.RES_HEAT_0, self.intConvertGasTargetTemp(self.tAmbient, targetTemp))   # res_wait_0 register - heater step 0
 
         # Define the heater on time, converting ms to register code (Heater Step 0) - cannot be greater than 4032ms
         # Bits <7:6> are a multiplier (1, 4, 16 or 64 times)    Bits <5:0> are 1ms steps (0 to 63ms)
@@ -823,55 +1495,278 @@ class KitronikBME688:
             codedDuration = heatDuration + (factor * 64)
         else:
             codedDuration = 255
+        self.heatDuration = (codedDuration & 0x3F) * (1 << ((codedDuration >> 6) * 2))    # Heater on time as actually set in the register
 
-        self.i2c.writeto_mem(self.CHIP_ADDRESS, 0x64, codedDuration.to_bytes(1, 'big'))     # gas_wait_0 register - heater step 0
+        self.i2c.writeByte(self.CHIP_ADDRESS, self.GAS_WAIT_0, codedDuration)     # gas_wait_0 register - heater step 0
 
         # Select index of heater step (0 to 9): CTRL_GAS_1 reg <3:0>    (Make sure to combine with gas enable setting already there)
-        gasEnable = self.getUInt8(self.CTRL_GAS_1) & 0x20
-        self.i2c.writeto_mem(self.CHIP_ADDRESS, self.CTRL_GAS_1, (0x00 | gasEnable).to_bytes(1, 'big'))   # Select heater step 0
+        with self.i2c:
+            gasEnable = self.getUInt8(self.CTRL_GAS_1) & 0x20
+            self.i2c.writeByte(self.CHIP_ADDRESS, self.CTRL_GAS_1, 0x00 | gasEnable)   # Select heater step 0
 
         self.gasInit = True
-
-    # Run all measurements on the BME688: Temperature, Pressure, Humidity & Gas Resistance.
-    def measureData(self):
+        self.measDuration = None
+
+    # Burst read the field 0 data block (MEAS_STATUS_0 to GAS_RES_LSB_0) into the preallocated buffer, rather than one register at a time
+    def readFieldData(self):
+        self.i2c.readfrom_mem_into(self.CHIP_ADDRESS, self.MEAS_STATUS_0, self.fieldData)
+        return self.fieldData
+
+    # Decode the raw ADC values from a field data block (buffer offsets are register address - MEAS_STATUS_0)
+    # Stores tRaw, pRaw, hRaw & gResRaw and returns the gas range
+    def decodeFieldData(self, data):
+        self.tRaw = (data[5] << 12) | (data[6] << 4) | (data[7] >> 4)         # TEMP_MSB_0, TEMP_LSB_0, TEMP_XLSB_0
+        self.pRaw = (data[2] << 12) | (data[3] << 4) | (data[4] >> 4)         # PRESS_MSB_0, PRESS_LSB_0, PRESS_XLSB_0
+        self.hRaw = (data[8] << 8) | (data[9] >> 4)                           # HUMID_MSB_0, HUMID_LSB_0
+        self.gResRaw = (data[15] << 2) | data[16] >> 6                        # GAS_RES_MSB_0, GAS_RES_LSB_0: shift bits <7:6> right to get LSB for gas resistance
+        return data[16] & 0x0F
+
+    # Calculate how long the temperature, pressure & humidity conversions take (in us) from the oversampling settings
+    # TPH conversion: 1.963ms per oversampling cycle, plus switching and gas measurement times (BME688 datasheet)
+    def calcTPHDuration(self):
+        oSampleTP = self.getUInt8(self.CTRL_MEAS)
+        oSampleH = self.getUInt8(self.CTRL_HUM)
+        cycles = self.OSRS_CYCLES[(oSampleTP >> 5) & 0x07] + self.OSRS_CYCLES[(oSampleTP >> 2) & 0x07] + self.OSRS_CYCLES[oSampleH & 0x07]
+        return (cycles * 1963) + (477 * 4) + (477 * 5)
+
+    # Calculate how long a forced mode measurement takes (in ms): TPH conversion, wake up time and the heater duration
+    # The result is kept until the settings are changed again by bme688Init() or setupGasSensor()
+    def calcMeasurementDuration(self):
+        if (self.measDuration is None):
+            durationUs = self.calcTPHDuration() + 1000
+            if self.gasInit:
+                durationUs = durationUs + (self.heatDuration * 1000)
+            self.measDuration = (durationUs + 999) // 1000     # Round up to whole ms
+        return self.measDuration
+
+    # Start a measurement without waiting for it to finish (non-blocking)
+    # Returns the expected conversion time in ms - call poll() after this time to check the results are ready, and then collect() to use them
+    # Other work (buttons, screen, ZIP LEDs) can be done while the BME688 is measuring
+    def startMeasurement(self):
         if (self.bme688InitFlag == False):
             self.bme688Init()
-
-        self.measTimePrev = self.measTime       # Store previous measurement time (ms since micro:bit powered on)
+        if self.parallelMode:
+            self.stopParallelMode()
 
         # Set mode to FORCED MODE to begin single read cycle: CTRL_MEAS reg <1:0>    (Make sure to combine with temp/pressure oversampling settings already there)
-        oSampleTP = self.getUInt8(self.CTRL_MEAS)
-        self.i2c.writeto_mem(self.CHIP_ADDRESS, self.CTRL_MEAS, str((0x01 | oSampleTP)))
+        with self.i2c:
+            oSampleTP = self.getUInt8(self.CTRL_MEAS)
+            self.i2c.writeto_mem(self.CHIP_ADDRESS, self.CTRL_MEAS, str((0x01 | oSampleTP)))
+        self.measStart = ticks_ms()
+        self.measuring = True
+        self.dataReady = False
+        return self.calcMeasurementDuration()
+
+    # Check whether the measurement started by startMeasurement() has finished - returns True when the results are ready to collect()
+    # No I2C traffic is generated until the expected conversion time has passed
+    def poll(self):
+        if self.dataReady:
+            return True
+        if not self.measuring:
+            return False
+        if (ticks_diff(ticks_ms(), self.measStart) < self.calcMeasurementDuration()):
+            return False
+
+        # Read all of the field 0 data registers in a single I2C transaction, then check New Data bit: MEAS_STATUS_0 bit <7>
+        data = self.readFieldData()
+        if ((data[0] & 0x80) >> 7 != 1):
+            return False
+        self.measuring = False
+        self.dataReady = True
+        return True
+
+    # Decode and compensate the results of a finished measurement - returns False if there are no results ready yet (see poll())
+    def collect(self):
+        if not self.poll():
+            return False
+        self.dataReady = False
+        data = self.fieldData
 
-        # Check New Data bit to see if values have been measured: MEAS_STATUS_0 bit <7>
-        newData = (self.getUInt8(self.MEAS_STATUS_0) & 0x80) >> 7
-        while (newData != 1):
-            newData = (self.getUInt8(self.MEAS_STATUS_0) & 0x80) >> 7
+        self.measTimePrev = self.measTime       # Store previous measurement time (ms since micro:bit powered on)
 
         # Check Heater Stability Status bit to see if gas values have been measured: <4> (heater stability)
-        heaterStable = (self.getUInt8(self.GAS_RES_LSB_0) & 0x10) >> 4
-
-        # If there is new data, read temperature ADC registers(this is required for all other calculations)        
-        self.tRaw = (self.getUInt8(self.TEMP_MSB_0) << 12) | (self.getUInt8(self.TEMP_LSB_0) << 4) | (self.getUInt8(self.TEMP_XLSB_0) >> 4)
+        heaterStable = (data[self.GAS_RES_LSB_0 - self.MEAS_STATUS_0] & 0x10) >> 4
 
-        # Read pressure ADC registers
-        self.pRaw = (self.getUInt8(self.PRESS_MSB_0) << 12) | (self.getUInt8(self.PRESS_LSB_0) << 4) | (self.getUInt8(self.PRESS_XLSB_0) >> 4)
-
-        # Read humidity ADC registers
-        self.hRaw = (self.getUInt8(self.HUMID_MSB_0) << 8) | (self.getUInt8(self.HUMID_LSB_0) >> 4)
-        
-        # Read gas resistance ADC registers
-        self.gResRaw = (self.getUInt8(self.GAS_RES_MSB_0) << 2) | self.getUInt8(self.GAS_RES_LSB_0) >> 6           # Shift bits <7:6> right to get LSB for gas resistance
-
-        gasRange = self.getUInt8(self.GAS_RES_LSB_0) & 0x0F
+        # If there is new data, decode the temperature, pressure, humidity and gas resistance ADC values from the buffer
+        gasRange = self.decodeFieldData(data)
 
         self.measTime = ticks_ms()  # Capture latest measurement time (ms since Pico powered on)
 
         # Calculate the compensated reading values from the the raw ADC data
-        self.calcTemperature(self.tRaw)
-        self.intCalcPressure(self.pRaw)
-        self.intCalcHumidity(self.hRaw, self.tRead)
-        self.intCalcgRes(self.gResRaw, gasRange)
+        self.compensateReadings(gasRange)
+        return True
+
+    # Run all measurements on the BME688: Temperature, Pressure, Humidity & Gas Resistance.
+    # Sleeps for the expected conversion time rather than continuously polling the BME688 (use startMeasurement(), poll() & collect() to do other work meanwhile)
+    def measureData(self):
+        sleep_ms(self.startMeasurement())
+        while not self.poll():
+            sleep_ms(1)
+        self.collect()
+
+    # Load a heater profile for parallel mode: a list of up to 10 (targetTemp, duration) steps, eg: [(320, 700), (100, 280), (200, 700)]
+    # targetTemp is the target temperature for the gas sensor plate during that step (100 - 400°C)
+    # duration is how long the step lasts in ms - parallel mode runs in cycles of (TPH conversion + sharedDuration), so it is rounded up to a whole number of cycles (1 - 255)
+    # sharedDuration is the heater time added to every cycle (0 - 1923ms), eg: 140
+    # The actual step lengths are stored in profileDurations, and the time for the whole profile in profileCycleTime
+    def setupHeaterProfile(self, profile, sharedDuration=140):
+        if (self.bme688InitFlag == False):
+            self.bme688Init()
+        if self.parallelMode:
+            self.stopParallelMode(False)
+        if (len(profile) < 1) or (len(profile) > 10):
+            raise ValueError("Heater profile must have 1 to 10 steps")
+
+        # Define the shared heater time, converting ms to register code in 0.477ms steps
+        # Bits <7:6> are a multiplier (1, 4, 16 or 64 times)    Bits <5:0> are 0.477ms steps (0 to 63)
+        if (sharedDuration < 0):
+            sharedDuration = 0
+        if (sharedDuration < 1923):
+            sharedSteps = (sharedDuration * 1000) // 477
+            factor = 0
+            while (sharedSteps > 63):
+                sharedSteps = (sharedSteps // 4)
+                factor = factor + 1
+            codedShared = sharedSteps + (factor * 64)
+        else:
+            codedShared = 255
+        cycleUs = self.calcTPHDuration() + ((codedShared & 0x3F) * (1 << ((codedShared >> 6) * 2)) * 477)
+
+        # Each step is a (register, value) pair for the target heater resistance and the duration multiplier
+        # The BME688 takes register/value pairs in a single write, so the whole profile is sent in one I2C transaction
+        pairs = bytearray()
+        self.profileDurations = []
+        for step in range(len(profile)):
+            targetTemp, duration = profile[step]
+            if (targetTemp < 100):
+                targetTemp = 100
+            elif (targetTemp > 400):
+                targetTemp = 400
+            multiplier = ((duration * 1000) + cycleUs - 1) // cycleUs
+            if (multiplier < 1):
+                multiplier = 1
+            elif (multiplier > 255):
+                multiplier = 255
+            self.profileDurations.append((multiplier * cycleUs) // 1000)
+            pairs.append(self.RES_HEAT_0 + step)
+            pairs.append(self.intConvertGasTargetTemp(self.tAmbient, targetTemp))
+            pairs.append(self.GAS_WAIT_0 + step)
+            pairs.append(multiplier)
+        pairs.append(self.GAS_WAIT_SHARED)
+        pairs.append(codedShared)
+        self.i2c.writeto_mem(self.CHIP_ADDRESS, pairs[0], pairs[1:])
+
+        # Number of heater steps in the profile: CTRL_GAS_1 reg <3:0>    (Make sure to combine with gas enable setting already there)
+        with self.i2c:
+            gasEnable = self.getUInt8(self.CTRL_GAS_1) & 0x20
+            self.i2c.writeByte(self.CHIP_ADDRESS, self.CTRL_GAS_1, len(profile) | gasEnable)
+
+        self.profileLength = len(profile)
+        self.profileCycleTime = sum(self.profileDurations)
+        self.gasFingerprint = [0] * self.profileLength
+        self.fingerprintSteps = 0
+        self.gasInit = False    # The forced mode heater step 0 settings have been replaced
+        self.measDuration = None
+
+    # Start parallel mode: the BME688 measures continuously, running through the heater profile loaded by setupHeaterProfile()
+    # Results are stored in three data fields on the BME688, so call readParallelData() at least every few cycles so none are overwritten
+    def startParallelMode(self):
+        if (self.profileLength == 0):
+            raise ValueError("Load a heater profile with setupHeaterProfile() first")
+        # Only fields newer than the ones already on the BME688 are read
+        self.i2c.readfrom_mem_into(self.CHIP_ADDRESS, self.MEAS_STATUS_0, self.parallelData)
+        self.lastSubMeas = self.parallelData[1]
+        for field in range(1, 3):
+            subMeas = self.parallelData[(field * self.FIELD_LENGTH) + 1]
+            if (0 < ((subMeas - self.lastSubMeas) & 0xFF) < 128):
+                self.lastSubMeas = subMeas
+        self.missedFields = 0
+        self.fingerprintSteps = 0
+        # Set mode to PARALLEL MODE: CTRL_MEAS reg <1:0>    (Make sure to combine with temp/pressure oversampling settings already there)
+        with self.i2c:
+            oSampleTP = self.getUInt8(self.CTRL_MEAS)
+            self.i2c.writeByte(self.CHIP_ADDRESS, self.CTRL_MEAS, (oSampleTP & 0xFC) | 0x02)
+        self.measuring = False
+        self.dataReady = False
+        self.parallelMode = True
+
+    # Stop parallel mode, returning the BME688 to sleep mode
+    # The heater profile replaces the forced mode gas sensor settings, so any set by setupGasSensor() are set up again (unless restoreGas is False)
+    def stopParallelMode(self, restoreGas=True):
+        with self.i2c:
+            oSampleTP = self.getUInt8(self.CTRL_MEAS)
+            self.i2c.writeByte(self.CHIP_ADDRESS, self.CTRL_MEAS, oSampleTP & 0xFC)
+        self.parallelMode = False
+        if restoreGas and (self.targetTemp is not None):
+            self.setupGasSensor(self.targetTemp, self.heatTime)
+
+    # Read the new parallel mode results: all three data fields are burst read in one I2C transaction
+    # Returns a list of (gasIndex, gasResistance) for each new field with a valid gas reading, oldest first - gasIndex is the heater profile step the reading was taken at
+    # Temperature, pressure and humidity readings are also updated from each field
+    def readParallelData(self):
+        results = []
+        if not self.parallelMode:
+            return results
+        data = self.parallelData
+        self.i2c.readfrom_mem_into(self.CHIP_ADDRESS, self.MEAS_STATUS_0, data)
+
+        # Find the fields with new data, and put them in measurement order using the sub_meas_index (offset 1 in each field)
+        newFields = []
+        for field in range(3):
+            offset = field * self.FIELD_LENGTH
+            age = (data[offset + 1] - self.lastSubMeas) & 0xFF
+            if (data[offset] & 0x80) and (0 < age < 128):
+                newFields.append((age, offset))
+        newFields.sort()
+
+        fields = memoryview(data)
+        for age, offset in newFields:
+            field = fields[offset:offset + self.FIELD_LENGTH]
+            self.missedFields = self.missedFields + ((field[1] - self.lastSubMeas - 1) & 0xFF)
+            self.lastSubMeas = field[1]
+            gasIndex = field[0] & 0x0F
+            gasRange = self.decodeFieldData(field)
+            self.measTimePrev = self.measTime
+            self.measTime = ticks_ms()
+            self.compensateReadings(gasRange)
+
+            # Only use the gas reading if it is valid and the heater reached the target temperature: GAS_RES_LSB bits <5> & <4>
+            if ((field[16] & 0x30) == 0x30) and (gasIndex < self.profileLength):
+                self.gasFingerprint[gasIndex] = self.gRes
+                self.fingerprintSteps = self.fingerprintSteps | (1 << gasIndex)
+                results.append((gasIndex, self.gRes))
+        return results
+
+    # Returns the gas resistance at every heater profile step as a list (a "fingerprint" of the gases in the air)
+    # Returns None until every step has been measured again since the last fingerprint was returned
+    def readGasFingerprint(self):
+        if (self.fingerprintSteps != (1 << self.profileLength) - 1) or (self.profileLength == 0):
+            return None
+        self.fingerprintSteps = 0
+        return list(self.gasFingerprint)
+
+    # Load the baseline gas resistance and ambient temperature from the 'baselines.txt' file
+    # Returns False if there is no file (or it cannot be read), in which case the baselines process needs to be run
+    def loadBaselines(self):
+        try:
+            f = open("baselines.txt", "r")
+            gBase = float(f.readline())
+            tAmbient = float(f.readline())
+            f.close()
+        except:
+            return False
+        self.gBase = gBase
+        self.tAmbient = tAmbient
+        return True
+
+    # Set the baseline gas resistance and ambient temperature, and save them to the 'baselines.txt' file
+    def saveBaselines(self, gBase, tAmbient):
+        self.gBase = gBase
+        self.tAmbient = tAmbient
+        f = open("baselines.txt", "w") #open in write - creates if not existing, will overwrite if it does
+        f.write(str(self.gBase) + "\r\n")
+        f.write(str(self.tAmbient) + "\r\n")
+        f.close()
 
     # A baseline gas resistance is required for the IAQ calculation - it should be taken in a well ventilated area without obvious air pollutants
     # Take 60 readings over a ~5min period and find the mean
@@ -881,6 +1776,26 @@ class KitronikBME688:
     # On subsequent power cycles of the board, this function will look for that file and take the baseline values stored there
     # To force the baselines process to be run again, call the function like this: calcBaselines(True)
     def calcBaselines(self, forcedRun=False):
+        self.startBaselines()
+        
+        # Look for a 'baselines.txt' file existing - if it does, take the baseline values from there (unless 'forcedRun' is set to True)
+        # If there is no file, the baseline process will be carried out (creating a new file at the end)
+        if forcedRun or not self.loadBaselines():
+            self.startBurnIn()
+            for burnInReadings in range(self.BURN_IN_READINGS):    # Measure data and continue summing gas resistance until 60 readings have been taken
+                self.showBurnInProgress(burnInReadings)
+                self.measureData()
+                self.addBurnInReading()
+                sleep_ms(self.BURN_IN_INTERVAL)
+            self.finishBurnIn()
+        
+        self.showSetupComplete()
+        sleep_ms(2000)
+        self.screen.clear()
+        self.screen.show()
+
+    # The steps of calcBaselines(), shared with KitronikBME688Async.calcBaselines() (PicoAirQualityAsync.py) so both work the same way
+    def startBaselines(self):
         if (self.bme688InitFlag == False):
             self.bme688Init()
         if (self.gasInit == False):
@@ -889,49 +1804,32 @@ class KitronikBME688:
         self.screen.clear()
         self.screen.displayText("Setting Baseline", 2)
         self.screen.show()
-        
-        try: # Look for a 'baselines.txt' file existing - if it does, take the baseline values from there (unless 'forcedRun' is set to True)
-            if not forcedRun:
-                f = open("baselines.txt", "r")
-                self.gBase = float(f.readline())
-                self.tAmbient = float(f.readline())
-            else:
-                raise Exception("RUNNING BASELINE PROCESS")
-        except: # If there is no file, an exception is raised, and the baseline process will be carried out (creating a new file at the end)
-            self.ambTempFlag = False
-
-            burnInReadings = 0
-            burnInData = 0
-            ambTotal = 0
-            progress = 0
-            while (burnInReadings < 60):               # Measure data and continue summing gas resistance until 60 readings have been taken
-                progress = math.trunc((burnInReadings / 60) * 100)
-                self.screen.clear()
-                self.screen.displayText(str(progress) + "%", 4, 50)
-                self.screen.displayText("Setting Baseline", 2)
-                self.screen.show()
-                self.measureData()
-                burnInData = burnInData + self.gRes
-                ambTotal = ambTotal + self.newAmbTemp
-                sleep_ms(5000)
-                burnInReadings = burnInReadings + 1
-
-            self.gBase = (burnInData / 60)             # Find the mean gas resistance during the period to form the baseline
-            self.tAmbient = (ambTotal / 60)            # Calculate the ambient temperature as the mean of the 60 initial readings
-
-            # Save baseline values to a file
-            f = open("baselines.txt", "w") #open in write - creates if not existing, will overwrite if it does
-            f.write(str(self.gBase) + "\r\n")
-            f.write(str(self.tAmbient) + "\r\n")
-            f.close()
-            
-            self.ambTempFlag = True
-        
+
+    def startBurnIn(self):
+        self.ambTempFlag = False
+        self.burnInData = 0
+        self.ambTotal = 0
+
+    def showBurnInProgress(self, burnInReadings):
+        progress = math.trunc((burnInReadings / self.BURN_IN_READINGS) * 100)
         self.screen.clear()
-        self.screen.displayText("Setup Complete!", 2)
+        self.screen.displayText(str(progress) + "%", 4, 50)
+        self.screen.displayText("Setting Baseline", 2)
         self.screen.show()
-        sleep_ms(2000)
+
+    # Add the gas resistance and ambient temperature from the last measurement to the totals
+    def addBurnInReading(self):
+        self.burnInData = self.burnInData + self.gRes
+        self.ambTotal = self.ambTotal + self.newAmbTemp
+
+    # Find the mean gas resistance during the period to form the baseline, and the ambient temperature as the mean of the 60 initial readings
+    def finishBurnIn(self):
+        self.saveBaselines(self.burnInData / self.BURN_IN_READINGS, self.ambTotal / self.BURN_IN_READINGS)
+        self.ambTempFlag = True
+
+    def showSetupComplete(self):
         self.screen.clear()
+        self.screen.displayText("Setup Complete!", 2)
         self.screen.show()
 
     # Read Temperature from sensor as a Number.
@@ -1071,18 +1969,31 @@ class KitronikBME688:
 class KitronikOLED(framebuf.FrameBuffer):
     # Write commands to the OLED controller
     def write_cmd(self, cmd):
+        if not self.oledInitFlag:
+            self.setupDisplay()
         self.temp[0] = 0x80  # Co=1, D/C#=0
         self.temp[1] = cmd
         self.i2c.writeto(self.CHIP_ADDRESS, self.temp)
 
+    # Write a sequence of commands to the OLED controller in one I2C transaction
+    # A single control byte with Co=0 says every byte after it is a command byte, so there is no control byte before each command
+    def write_cmds(self, cmds):
+        if not self.oledInitFlag:
+            self.setupDisplay()
+        self.cmd_list[1] = cmds
+        self.i2c.writevto(self.CHIP_ADDRESS, self.cmd_list)
+
     # Write data to the OLED controller
     def write_data(self, buf):
+        if not self.oledInitFlag:
+            self.setupDisplay()
         self.write_list[1] = buf
         self.i2c.writevto(self.CHIP_ADDRESS, self.write_list)
 
     # Runs on initialisation of the class
     # Sets up all the register definitions and global variables
-    def __init__(self, i2cAddr=0x3C, sda=6, scl=7):
+    # 'bus' is the KitronikI2CBus to use - by default the bus shared with the BME688 sensor
+    def __init__(self, i2cAddr=0x3C, sda=6, scl=7, bus=None):
         self.CHIP_ADDRESS = i2cAddr    # I2C address as determined by hardware configuration
         # register definitions
         self.SET_CONTRAST = const(0x81)
@@ -1103,22 +2014,32 @@ class KitronikOLED(framebuf.FrameBuffer):
         self.SET_VCOM_DESEL = const(0xDB)
         self.SET_CHARGE_PUMP = const(0x8D)
 
-        sda = Pin(sda)
-        scl = Pin(scl)
-        
-        if implementation._mpy >= 4358:
-            self.i2c = I2C(1, sda=sda, scl=scl, freq=100_000, timeout=100_000)
-        else:
-            self.i2c = I2C(1, sda=sda, scl=scl, freq=100_000)
+        if (bus is None):
+            bus = sharedI2CBus(sda, scl)
+        self.i2c = bus
 
-        self.plotArray = []
         self.plotYMin = 0
         self.plotYMax = 100
         self.yPixelMin = 63
         self.yPixelMax = 12
+        # plot() keeps the last 128 values in a ring buffer, with the pixel row of each one worked out when it is added (and again only if the y range changes)
+        # The graph is drawn in its own frame buffer for the plot area, which is set up on the first plot()
+        # plotErase is a palette which turns every pixel off, to take the graph off the screen again (see plot())
+        self.plotValues = None
+        self.plotRows = None
+        self.plotFrame = None
+        self.plotErase = None
+        self.plotCount = 0
+        self.plotNext = 0    # Where the next value goes in the ring buffer
+        self.plotScale = 0
 
         self.temp = bytearray(2)
         self.write_list = [b"\x40", None]  # Co=0, D/C#=1
+        self.cmd_list = [b"\x00", None]  # Co=0, D/C#=0
+        self.contrastCmd = bytearray(2)    # SET_CONTRAST and its argument
+        # Setting an area of the screen, then the data, in one transaction: each command byte has its own control byte with Co=1 (another control byte follows it), then Co=0, D/C#=1 for the data
+        self.windowCmd = bytearray(b"\x80\x21\x80\x00\x80\x7F\x80\x22\x80\x00\x80\x07\x40")
+        self.window_list = [self.windowCmd, None]
 
         self.width = 128
         self.height = 64
@@ -1126,11 +2047,32 @@ class KitronikOLED(framebuf.FrameBuffer):
         self.pages = 8
         self.buffer = bytearray(self.pages * self.width)
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
-        self.init_display()
-
-    # Initialise the display settings and start the display clear
-    def init_display(self):
-        for cmd in (
+        # The display settings are sent the first time anything is sent to the display (or by calling init())
+        self.oledInitFlag = False
+
+        # show() only sends the parts of the screen which have changed (see setRefreshMode())
+        self.refreshMode = "diff"
+        self.shadow = bytearray(self.pages * self.width)    # A copy of what was last sent to the display ("diff" mode)
+        self.displayValid = False    # False until the whole screen has been sent (the display memory is unknown at power on)
+        self.dirtyStart = bytearray(b"\xff" * self.pages)    # The changed columns of each page, marked by the drawing functions ("dirty" mode) - start > end for none
+        self.dirtyEnd = bytearray(self.pages)
+        self.WINDOW_BYTES = 12    # Bytes sent to set up an area of the screen (SET_COL_ADDR and SET_PAGE_ADDR, with their arguments, each with a control byte)
+        self.FULL_SCREEN_BYTES = self.WINDOW_BYTES + 1 + len(self.buffer)
+        self.lastShowBytes = 0    # Bytes sent by the last show()
+        self.lastShowUs = 0    # How long the last show() took (microseconds)
+        self.bytesSaved = 0    # Bytes the last show() did not need to send, compared to sending the whole screen
+        self.totalBytesSaved = 0
+
+    # Set up the display now, rather than on first use
+    def init(self):
+        if not self.oledInitFlag:
+            self.init_display()
+
+    # Send the display settings to the OLED controller
+    def setupDisplay(self):
+        self.oledInitFlag = True
+        self.displayValid = False
+        self.write_cmds(bytes((
             self.SET_DISP | 0x00,  # off
             # address setting
             self.SET_MEM_ADDR,
@@ -1160,9 +2102,12 @@ class KitronikOLED(framebuf.FrameBuffer):
             # charge pump
             self.SET_CHARGE_PUMP,
             0x10 if self.external_vcc else 0x14,
-            self.SET_DISP | 0x01,
-        ):  # on
-            self.write_cmd(cmd)
+            self.SET_DISP | 0x01,  # on
+        )))
+
+    # Initialise the display settings and start the display clear
+    def init_display(self):
+        self.setupDisplay()
         self.fill(0)
         self.show()
 
@@ -1176,8 +2121,9 @@ class KitronikOLED(framebuf.FrameBuffer):
 
     # 0 = Dim to 150 = Bright
     def contrast(self, contrast):
-        self.write_cmd(self.SET_CONTRAST)
-        self.write_cmd(contrast)
+        self.contrastCmd[0] = self.SET_CONTRAST
+        self.contrastCmd[1] = contrast
+        self.write_cmds(self.contrastCmd)
 
     # 0 = White on black, 1 = Black on white
     def invert(self, invert):
@@ -1195,71 +2141,238 @@ class KitronikOLED(framebuf.FrameBuffer):
         y = (line * 11) - 10
 
         super().text(text, x_offset, y)
+        self.markDirty(x_offset, y, len(text) * 8, 8)
 
     # Make what has been set to display actually appear on the screen
     # Needs to be called after 'displayText()', 'plot()', clear()', 'drawLine()' & 'drawRect()'
+    # Only the areas of the screen which have changed are sent (see setRefreshMode()) - 'bytesSaved' is how many bytes that saved
     def show(self):
-        x0 = 0
-        x1 = self.width - 1
+        start = ticks_us()
+        self.lastShowBytes = 0
+        with self.i2c:
+            for page0, page1, x0, x1 in self.refreshWindows():
+                self.sendWindow(page0, page1, x0, x1)
+        self.shown()
+        self.lastShowUs = ticks_diff(ticks_us(), start)
+
+    # The number of whole screens per second the I2C bus can send, from the throughput measured when the bus speed was chosen (None if it has not been measured)
+    # Only showing the changed parts of the screen (see setRefreshMode()) is usually much faster - 'lastShowUs' is how long the last show() took
+    def fullFrameRate(self):
+        if (self.i2c.bytesPerSecond is None):
+            return None
+        return self.i2c.bytesPerSecond / (self.FULL_SCREEN_BYTES + 1)
+
+    # Choose what show() sends to the display:
+    # "diff" (default) - compares the screen with what was last sent, and sends only the changed columns of the changed pages (a page is 8 rows of pixels)
+    # "dirty" - sends only the areas changed by displayText(), clear(), clearLine(), drawLine(), drawRect() and plot(), without comparing - call markDirty() after drawing with the FrameBuffer functions directly (eg: oled.text())
+    # "full" - sends the whole screen every time
+    def setRefreshMode(self, mode):
+        if mode not in ("diff", "dirty", "full"):
+            raise ValueError("Refresh mode must be 'diff', 'dirty' or 'full'")
+        self.refreshMode = mode
+        self.displayValid = False
+
+    # Mark an area of the screen as changed, so show() sends it in "dirty" refresh mode
+    def markDirty(self, x, y, width, height):
+        x1 = min(x + width, self.width) - 1
+        y1 = min(y + height, self.height) - 1
+        x = max(x, 0)
+        y = max(y, 0)
+        if (x1 < x) or (y1 < y):
+            return
+        for page in range(y >> 3, (y1 >> 3) + 1):
+            if (x < self.dirtyStart[page]):
+                self.dirtyStart[page] = x
+            if (x1 > self.dirtyEnd[page]):
+                self.dirtyEnd[page] = x1
+
+    def clearDirty(self):
+        for page in range(self.pages):
+            self.dirtyStart[page] = 0xFF
+            self.dirtyEnd[page] = 0
+
+    # The (first, last) changed columns of a page, or None if nothing in the page has changed
+    def changedColumns(self, page):
+        if (self.refreshMode == "dirty"):
+            if (self.dirtyStart[page] > self.dirtyEnd[page]):
+                return None
+            return (self.dirtyStart[page], self.dirtyEnd[page])
+        start = page * self.width
+        end = start + self.width
+        buffer = self.buffer
+        shadow = self.shadow
+        if (buffer[start:end] == shadow[start:end]):
+            return None
+        x0 = start
+        while (buffer[x0] == shadow[x0]):
+            x0 = x0 + 1
+        x1 = end - 1
+        while (buffer[x1] == shadow[x1]):
+            x1 = x1 - 1
+        return (x0 - start, x1 - start)
+
+    # The areas of the screen show() needs to send, as a list of (first page, last page, first column, last column)
+    # Changed pages next to each other are sent as one area when that sends fewer bytes than setting up another area, and the whole screen is sent if that is no more bytes
+    def refreshWindows(self):
+        if (self.refreshMode == "full") or not self.displayValid:
+            self.clearDirty()
+            return [(0, self.pages - 1, 0, self.width - 1)]
+        windows = []
+        size = 0
+        page0 = None
+        for page in range(self.pages):
+            columns = self.changedColumns(page)
+            if columns is None:
+                continue
+            if (page0 is not None) and (page1 == page - 1):
+                joinedX0 = min(x0, columns[0])
+                joinedX1 = max(x1, columns[1])
+                joined = (page - page0 + 1) * (joinedX1 - joinedX0 + 2)
+                apart = ((page1 - page0 + 1) * (x1 - x0 + 2)) + (columns[1] - columns[0] + 2) + self.WINDOW_BYTES
+                if (joined <= apart):
+                    page1 = page
+                    x0 = joinedX0
+                    x1 = joinedX1
+                    continue
+            if (page0 is not None):
+                windows.append((page0, page1, x0, x1))
+                size = size + self.WINDOW_BYTES + ((page1 - page0 + 1) * (x1 - x0 + 2))
+            page0 = page
+            page1 = page
+            x0, x1 = columns
+        if (page0 is not None):
+            windows.append((page0, page1, x0, x1))
+            size = size + self.WINDOW_BYTES + ((page1 - page0 + 1) * (x1 - x0 + 2))
+        self.clearDirty()
+        if (size >= self.FULL_SCREEN_BYTES):
+            return [(0, self.pages - 1, 0, self.width - 1)]
+        return windows
+
+    # Send one area of the screen to the display: the area is set and its first part sent in one I2C transaction
+    # A full width area is sent in one part, a part width area a page at a time
+    def sendWindow(self, page0, page1, x0, x1):
+        if not self.oledInitFlag:
+            self.setupDisplay()
+        offset = 0
         if self.width == 64:
             # displays with width of 64 pixels are shifted by 32
-            x0 += 32
-            x1 += 32
-        self.write_cmd(self.SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(self.SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+            offset = 32
+        cmd = self.windowCmd
+        cmd[3] = x0 + offset
+        cmd[5] = x1 + offset
+        cmd[9] = page0
+        cmd[11] = page1
+        self.lastShowBytes = self.lastShowBytes + self.WINDOW_BYTES
+        buffer = memoryview(self.buffer)
+        if (x0 == 0) and (x1 == self.width - 1):
+            parts = ((page0 * self.width, (page1 + 1) * self.width),)
+        else:
+            parts = [((page * self.width) + x0, (page * self.width) + x1 + 1) for page in range(page0, page1 + 1)]
+        first = True
+        for start, end in parts:
+            if first:
+                self.window_list[1] = buffer[start:end]
+                self.i2c.writevto(self.CHIP_ADDRESS, self.window_list)
+                first = False
+            else:
+                self.write_data(buffer[start:end])
+            if (self.refreshMode == "diff"):
+                self.shadow[start:end] = buffer[start:end]
+            self.lastShowBytes = self.lastShowBytes + 1 + end - start
+
+    # Called once the changed areas have all been sent
+    def shown(self):
+        self.displayValid = True
+        self.bytesSaved = self.FULL_SCREEN_BYTES - self.lastShowBytes
+        self.totalBytesSaved = self.totalBytesSaved + self.bytesSaved
 
     # Plot a live updating graph of a variable
     # Plot y range is pixels 12 down to 63, leaving room for a title or similar on the first line
+    # Each call only turns off the pixels the graph set last time and then draws the graph again, so text or markers drawn in the plot area are kept (unless the graph is drawn over them)
+    # Each new value moves the graph one pixel to the left (once it is 128 values wide) and only the newest line is drawn, unless the value is outside the y range so far, when the whole graph is redrawn to the new range
     # Need to call 'show()' to make the plot actually display
     def plot(self, variable):
         variable = math.trunc(variable)
-
+        if (self.plotFrame is None):
+            self.plotValues = array.array("i", [0] * self.width)
+            self.plotRows = bytearray(self.width)
+            self.plotFrame = framebuf.FrameBuffer(bytearray(((self.yPixelMin - self.yPixelMax + 8) // 8) * self.width), self.width, self.yPixelMin - self.yPixelMax + 1, framebuf.MONO_VLSB)
+            self.plotErase = framebuf.FrameBuffer(bytearray(2), 2, 1, framebuf.MONO_VLSB)
+            self.plotScale = (self.yPixelMin - self.yPixelMax) / (self.plotYMax - self.plotYMin)
+
+        rescale = False
         if (variable > self.plotYMax):
             self.plotYMax = variable
+            rescale = True
         if (variable < self.plotYMin):
             self.plotYMin = variable
-
-        entries = len(self.plotArray)
-        if (entries >= 128):
-            prevX = 0
-            prevY = self.plotArray[127]
-            self.plotArray.pop(0)
-            self.plotArray.append(variable)
+            rescale = True
+
+        width = self.width
+        newest = self.plotNext
+        self.plotValues[newest] = variable
+        self.plotNext = (newest + 1) % width
+        if (self.plotCount < width):
+            self.plotCount = self.plotCount + 1
+            scroll = False
+        else:
+            scroll = True
+
+        # Take the graph as it was off the screen: key 0 skips the pixels it did not set, and the palette turns the ones it did set off
+        frame = self.plotFrame
+        super().blit(frame, 0, self.yPixelMax, 0, self.plotErase)
+        if rescale:
+            self.plotScale = (self.yPixelMin - self.yPixelMax) / (self.plotYMax - self.plotYMin)
+            oldest = (self.plotNext - self.plotCount) % width
+            frame.fill(0)
+            for x in range(self.plotCount):
+                entry = (oldest + x) % width
+                self.plotRows[entry] = self.plotRow(self.plotValues[entry])
+                if (x == 0):
+                    frame.pixel(x, self.plotRows[entry], 1)
+                else:
+                    frame.line(x - 1, self.plotRows[(entry - 1) % width], x, self.plotRows[entry], 1)
         else:
-            self.plotArray.append(variable)
-            prevX = len(self.plotArray) - 1
-            prevY = self.plotArray[prevX]
-
-        for entry in range(entries):
-            x = entry
-            y = self.plotArray[entry]
-            y = math.trunc(self.yPixelMin - (y * ((self.yPixelMin - self.yPixelMax) / (self.plotYMax - self.plotYMin))))
+            row = self.plotRow(variable)
+            self.plotRows[newest] = row
+            x = self.plotCount - 1
+            if scroll:
+                # scroll() leaves the old pixels in the column it uncovers, and the first column still has the end of the line that has moved off the screen
+                frame.scroll(-1, 0)
+                frame.vline(x, 0, self.yPixelMin - self.yPixelMax + 1, 0)
+                frame.vline(0, 0, self.yPixelMin - self.yPixelMax + 1, 0)
+                oldest = self.plotNext
+                frame.pixel(0, self.plotRows[oldest], 1)
+                frame.line(0, self.plotRows[oldest], 1, self.plotRows[(oldest + 1) % width], 1)
             if (x == 0):
-                super().pixel(x, y, 1)
+                frame.pixel(x, row, 1)
             else:
-                self.drawLine(prevX, prevY, x, y)
-            prevX = x 
-            prevY = y
+                frame.line(x - 1, self.plotRows[(newest - 1) % width], x, row, 1)
+
+        super().blit(frame, 0, self.yPixelMax, 0)
+        self.markDirty(0, self.yPixelMax, width, self.yPixelMin - self.yPixelMax + 1)
+
+    # The pixel row in the plot area for a value
+    def plotRow(self, value):
+        return math.trunc((self.yPixelMin - self.yPixelMax) - ((value - self.plotYMin) * self.plotScale))
 
     # Wipe all data from the screen
     # Need to call 'show()' to make the clear actually happen
     def clear(self):
         super().fill(0)
+        self.markDirty(0, 0, self.width, self.height)
 
     # Clear a specific line on the screen
     def clearLine(self, line):
         yPixel = (line - 1) + ((line * 10) - 10)
         super().fill_rect(0, yPixel, 128, 10, 0)
+        self.markDirty(0, yPixel, 128, 10)
 
     # Draw a line on the screen (vertical, horizontal or diagonal), setting start and finish (x, y) coordinates
     # Need to call 'show()' to make the line actually display    
     def drawLine(self, start_x, start_y, end_x, end_y):
         super().line(start_x, start_y, end_x, end_y, 1)
+        self.markDirty(min(start_x, end_x), min(start_y, end_y), abs(end_x - start_x) + 1, abs(end_y - start_y) + 1)
 
     # Draw rectangles with a top left starting (x, y) coordinate and then a width and height
     # Can be filled (True) or just an outline (False)
@@ -1269,4 +2382,5 @@ class KitronikOLED(framebuf.FrameBuffer):
             super().rect(start_x, start_y, width, height, 1)
         elif (fill == True):
             super().fill_rect(start_x, start_y, width, height, 1)
+        self.markDirty(start_x, start_y, width, height)
 
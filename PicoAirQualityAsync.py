@@ -0,0 +1,122 @@
+# asyncio versions of the blocking functions in PicoAirQuality.py
+# Each class wraps an instance of the matching PicoAirQuality class, so a single event loop can measure, log, update the screen and react to buttons at the same time
+# Anything not provided here is passed straight through to the wrapped instance (e.g. bme688.readTemperature())
+# Save this file onto the Pico alongside PicoAirQuality.py
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+# MicroPython asyncio has sleep_ms(), CPython asyncio only has sleep() in seconds
+if hasattr(asyncio, "sleep_ms"):
+    sleepMs = asyncio.sleep_ms
+else:
+    def sleepMs(ms):
+        return asyncio.sleep(ms / 1000)
+
+# The KitronikBME688Async class runs BME688 measurements without blocking the event loop
+class KitronikBME688Async:
+    def __init__(self, bme688):
+        self.bme688 = bme688
+
+    def __getattr__(self, name):
+        return getattr(self.bme688, name)
+
+    # Run all measurements on the BME688: Temperature, Pressure, Humidity & Gas Resistance.
+    # Other tasks run while the BME688 is converting
+    async def measure(self):
+        await sleepMs(self.bme688.startMeasurement())
+        while not self.bme688.poll():
+            await sleepMs(1)
+        self.bme688.collect()
+
+    # The same baselines process as KitronikBME688.calcBaselines() (using the same steps), but the 5 minutes of readings do not block other tasks
+    async def calcBaselines(self, forcedRun=False):
+        bme688 = self.bme688
+        bme688.startBaselines()
+        if forcedRun or not bme688.loadBaselines():
+            bme688.startBurnIn()
+            for burnInReadings in range(bme688.BURN_IN_READINGS):
+                bme688.showBurnInProgress(burnInReadings)
+                await self.measure()
+                bme688.addBurnInReading()
+                await sleepMs(bme688.BURN_IN_INTERVAL)
+            bme688.finishBurnIn()
+
+        bme688.showSetupComplete()
+        await sleepMs(2000)
+        bme688.screen.clear()
+        bme688.screen.show()
+
+# The KitronikOLEDAsync class sends the screen contents one page (8 pixel rows) at a time, letting other tasks run in between
+class KitronikOLEDAsync:
+    def __init__(self, oled):
+        self.oled = oled
+
+    def __getattr__(self, name):
+        return getattr(self.oled, name)
+
+    # Make what has been set to display actually appear on the screen
+    # Only the changed areas are sent (see KitronikOLED.setRefreshMode()), a page at a time, letting other tasks run in between
+    async def show(self):
+        oled = self.oled
+        oled.lastShowBytes = 0
+        for page0, page1, x0, x1 in oled.refreshWindows():
+            for page in range(page0, page1 + 1):
+                with oled.i2c:
+                    oled.sendWindow(page, page, x0, x1)
+                await sleepMs(0)
+        oled.shown()
+
+# The KitronikBuzzerAsync class plays timed tones without blocking
+class KitronikBuzzerAsync:
+    def __init__(self, buzzer):
+        self.buzzer = buzzer
+
+    def __getattr__(self, name):
+        return getattr(self.buzzer, name)
+
+    # Play a tone at a specified frequency for a specified length of time in ms
+    async def tone(self, freq, length):
+        self.buzzer.playTone(freq)
+        try:
+            await sleepMs(length)
+        finally:
+            self.buzzer.stopTone()
+
+# The KitronikButtonAsync class waits for button presses without blocking
+class KitronikButtonAsync:
+    def __init__(self, buttons, pollTime=5):
+        self.buttons = buttons
+        self.pollTime = pollTime    # ms between checks of the button pins
+
+    def __getattr__(self, name):
+        return getattr(self.buttons, name)
+
+    # Wait until the button is pressed (if it is already held down, wait for it to be released and pressed again)
+    async def waitForPress(self, button):
+        while button.value():
+            await sleepMs(self.pollTime)
+        while not button.value():
+            await sleepMs(self.pollTime)
+
+    async def waitForButtonA(self):
+        return await self.waitForPress(self.buttons.buttonA)
+
+    async def waitForButtonB(self):
+        return await self.waitForPress(self.buttons.buttonB)
+
+# The KitronikOutputControlAsync class moves the servo gradually without blocking
+class KitronikOutputControlAsync:
+    def __init__(self, output):
+        self.output = output
+
+    def __getattr__(self, name):
+        return getattr(self.output, name)
+
+    # Sweep the servo from one angle to another in 1 degree steps, waiting stepTime ms between steps
+    async def sweepServo(self, fromDegrees, toDegrees, stepTime=15):
+        step = 1 if toDegrees >= fromDegrees else -1
+        for degrees in range(fromDegrees, toDegrees + step, step):
+            self.output.servoToPosition(degrees)
+            await sleepMs(stepTime)
@@ -0,0 +1,221 @@
+# A chart for the OLED screen on the Pico Smart Air Quality board, building on KitronikOLED in PicoAirQuality.py
+# Several series (eg: BME688 temperature, humidity and IAQ) are drawn over each other, each scaled to its own range, across a time span which can be much longer than the screen is wide (eg: the last 24 hours)
+# Each column of the chart covers (span / width) seconds and only the lowest and highest value of each series in each column is kept, so the RAM used is the same however long the span is and however often readings are added
+# Save this file onto the Pico alongside PicoAirQuality.py
+import array
+import framebuf
+import math
+import time
+
+INFINITY = float("inf")
+
+# The KitronikChart class draws a time chart of one or more series in an area of the OLED screen (by default the area below the top line, the same as KitronikOLED.plot())
+# Each column is drawn as a line from the lowest to the highest value in that time, joined to the column before, with a tick mark along the bottom at every 'tick' seconds (eg: every hour)
+# The chart is kept in its own frame buffer: when time moves on by a column the chart is moved one pixel to the left, and only the columns whose values have changed are drawn again
+# Add the series with addSeries(), then add readings with addReading() (and/or load the readings already logged with loadLog()), then call draw() and the screen's show() to display the chart
+class KitronikChart:
+    STYLES = ("solid", "dotted")
+
+    # span - the number of seconds across the chart (rounded down to a whole number of seconds for each column)
+    # x, y, width, height - the area of the screen to draw the chart in
+    # tick - seconds between the tick marks along the bottom (0 for none)
+    def __init__(self, oled, span=86400, x=0, y=12, width=128, height=52, tick=3600):
+        self.oled = oled
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.secondsPerColumn = max(1, span // width)
+        self.span = self.secondsPerColumn * width
+        self.tick = tick
+        self.names = []
+        self.styles = []
+        self.fixed = []    # True for a series drawn to a set range, False if the range follows the values
+        self.lows = []     # The range each series is drawn to (None until a series has values)
+        self.highs = []
+        self.scales = []
+        self.mins = []     # The lowest and highest value of each series in each column (the lowest is INFINITY for a column with no values)
+        self.maxs = []
+        # The columns are kept in a ring: the column number (time // secondsPerColumn) each slot holds, -1 for none
+        self.columns = array.array("i", [-1] * width)
+        self.newest = None
+        self.changedFrom = None    # The oldest column which has changed since the last draw()
+        self.scrollBy = 0          # Columns the chart has moved on by since the last draw()
+        self.checkRanges = False
+        self.redrawAll = True
+        self.frame = framebuf.FrameBuffer(bytearray(((height + 7) // 8) * width), width, height, framebuf.MONO_VLSB)
+        self.columnsDrawn = 0
+
+    # Add a series to the chart - 'name' is the column heading to read from a log in loadLog()
+    # style - "solid" or "dotted", to tell the series apart where they cross
+    # low, high - the range to draw the series over, or None for both to fit the range to the values on the chart
+    def addSeries(self, name, style="solid", low=None, high=None):
+        if (self.newest is not None):
+            raise ValueError("Add the series before any readings")
+        if (style not in self.STYLES):
+            raise ValueError("Style must be one of " + ", ".join(self.STYLES))
+        if ((low is None) != (high is None)) or ((low is not None) and (high <= low)):
+            raise ValueError("Give both low and high (with low less than high), or neither")
+        self.names.append(name)
+        self.styles.append(style)
+        self.fixed.append(low is not None)
+        self.lows.append(low)
+        self.highs.append(high)
+        self.scales.append(0 if (low is None) else (self.height - 1) / (high - low))
+        self.mins.append(array.array("f", [INFINITY] * self.width))
+        self.maxs.append(array.array("f", [-INFINITY] * self.width))
+
+    # Add one reading of every series, in the order the series were added (None, or anything which is not a number, for a missing reading)
+    # The time is time.time() unless 'timestamp' is given (seconds) - readings older than the chart span are ignored
+    def addReading(self, *values, timestamp=None):
+        if (len(values) != len(self.names)):
+            raise ValueError("Expected " + str(len(self.names)) + " values")
+        if (timestamp is None):
+            timestamp = int(time.time())
+        column = int(timestamp // self.secondsPerColumn)
+        if (self.newest is None):
+            self.newest = column
+        elif (column > self.newest):
+            self.scrollBy = self.scrollBy + column - self.newest
+            self.newest = column
+            self.checkRanges = True    # The oldest columns have gone, so a range may be able to shrink
+        elif (column <= self.newest - self.width):
+            return
+        slot = column % self.width
+        if (self.columns[slot] != column):
+            self.columns[slot] = column
+            for s in range(len(self.names)):
+                self.mins[s][slot] = INFINITY
+                self.maxs[s][slot] = -INFINITY
+        for s in range(len(values)):
+            value = values[s]
+            if not isinstance(value, (int, float)):
+                continue
+            changed = False
+            if (value < self.mins[s][slot]):
+                self.mins[s][slot] = value
+                changed = True
+            if (value > self.maxs[s][slot]):
+                self.maxs[s][slot] = value
+                changed = True
+            if changed:
+                if (self.changedFrom is None) or (column < self.changedFrom):
+                    self.changedFrom = column
+                if (self.fixed[s] == False) and ((self.lows[s] is None) or (value < self.lows[s]) or (value > self.highs[s])):
+                    self.checkRanges = True
+
+    # Add the readings already in a log, from 'end' (seconds, time.time() if None) back over the span of the chart
+    # 'reader' is a KitronikLogReader (PicoAirQualityReader.py) for the log - the series names are the column headings to read
+    # Only the readings in the span are read (a KitronikDeltaLogger log starts reading at the keyframe before the span)
+    def loadLog(self, reader, end=None):
+        if (end is None):
+            end = int(time.time())
+        for record in reader.readRecords(self.names, end - self.span + 1, end):
+            if (record[0] is not None):
+                self.addReading(*record[1:], timestamp=record[0])
+
+    # Fit the range of each series which follows its values to the values now on the chart
+    # A range is left alone while the values fit in it and fill at least half of it, so the whole chart is only redrawn now and again
+    def fitRanges(self):
+        oldest = self.newest - self.width + 1
+        for s in range(len(self.names)):
+            if self.fixed[s]:
+                continue
+            low = INFINITY
+            high = -INFINITY
+            mins = self.mins[s]
+            maxs = self.maxs[s]
+            for slot in range(self.width):
+                if (self.columns[slot] >= oldest):
+                    if (mins[slot] < low):
+                        low = mins[slot]
+                    if (maxs[slot] > high):
+                        high = maxs[slot]
+            if (low > high):
+                continue
+            if (self.lows[s] is not None) and (low >= self.lows[s]) and (high <= self.highs[s]) and (((high - low) * 2) >= (self.highs[s] - self.lows[s]) / 1.25):
+                continue
+            margin = (high - low) / 8
+            if (margin == 0):
+                margin = 1
+            if (self.lows[s] != low - margin) or (self.highs[s] != high + margin):
+                self.lows[s] = low - margin
+                self.highs[s] = high + margin
+                self.scales[s] = (self.height - 1) / (self.highs[s] - self.lows[s])
+                self.redrawAll = True
+
+    # The row in the chart for a value of series 's'
+    def row(self, s, value):
+        row = (self.height - 1) - math.trunc((value - self.lows[s]) * self.scales[s])
+        if (row < 0):
+            return 0
+        if (row >= self.height):
+            return self.height - 1
+        return row
+
+    # Draw one column of the chart (in the chart frame buffer)
+    def drawColumn(self, column):
+        frame = self.frame
+        x = self.width - 1 - (self.newest - column)
+        frame.vline(x, 0, self.height, 0)
+        self.columnsDrawn = self.columnsDrawn + 1
+        if (self.tick > 0):
+            start = column * self.secondsPerColumn
+            if (((start + self.secondsPerColumn - 1) // self.tick) != ((start - 1) // self.tick)):
+                frame.pixel(x, self.height - 1, 1)
+        slot = column % self.width
+        if (self.columns[slot] != column):
+            return
+        before = (column - 1) % self.width
+        joined = (x > 0) and (self.columns[before] == column - 1)
+        for s in range(len(self.names)):
+            low = self.mins[s][slot]
+            high = self.maxs[s][slot]
+            if (low > high):
+                continue
+            # Reach across to the values in the column before, so the line is joined up
+            if joined and (self.mins[s][before] <= self.maxs[s][before]):
+                if (self.maxs[s][before] < low):
+                    low = self.maxs[s][before]
+                if (self.mins[s][before] > high):
+                    high = self.mins[s][before]
+            top = self.row(s, high)
+            bottom = self.row(s, low)
+            if (self.styles[s] == "solid"):
+                frame.vline(x, top, bottom - top + 1, 1)
+            else:
+                for row in range(top + ((top + column) % 2), bottom + 1, 2):
+                    frame.pixel(x, row, 1)
+
+    # Draw the chart onto the screen - only the columns which have changed since the last draw() are drawn again
+    # Need to call 'show()' to make the chart actually display
+    def draw(self):
+        if (self.newest is None):
+            return
+        if self.checkRanges:
+            self.fitRanges()
+            self.checkRanges = False
+        oldest = self.newest - self.width + 1
+        frame = self.frame
+        if self.redrawAll or (self.scrollBy >= self.width):
+            frame.fill(0)
+            first = oldest
+            moved = True
+        else:
+            first = self.newest + 1 if (self.changedFrom is None) else max(self.changedFrom, oldest)
+            moved = self.scrollBy > 0
+            if moved:
+                frame.scroll(-self.scrollBy, 0)
+                first = min(first, self.newest - self.scrollBy + 1)
+                self.drawColumn(oldest)    # The first column was joined to a column which has now gone
+        for column in range(first, self.newest + 1):
+            self.drawColumn(column)
+
+        self.oled.blit(frame, self.x, self.y)
+        if moved:
+            self.oled.markDirty(self.x, self.y, self.width, self.height)
+        elif (first <= self.newest):
+            self.oled.markDirty(self.x + (first - oldest), self.y, self.newest - first + 1, self.height)
+        self.changedFrom = None
+        self.scrollBy = 0
+        self.redrawAll = False
@@ -0,0 +1,1507 @@
+# Extra data logging options for the Pico Smart Air Quality board, building on KitronikDataLogger in PicoAirQuality.py
+# Each logger has the same functions as KitronikDataLogger (writeProjectInfo(), nameColumnHeadings(), storeDataEntry()...) but stores the data differently
+# Save this file onto the Pico alongside PicoAirQuality.py
+import array
+import os
+import struct
+import time
+from PicoAirQuality import KitronikDataLogger
+try:
+    from binascii import crc32
+except ImportError:
+    crc32 = None
+
+# CRC-32 (the same as binascii.crc32 / zlib.crc32), worked out a byte at a time from a table - used if the firmware does not have binascii.crc32
+crcTable = None
+
+def softCrc32(data, crc=0):
+    global crcTable
+    if (crcTable is None):
+        crcTable = array.array("I", [0] * 256)
+        for n in range(256):
+            c = n
+            for bit in range(8):
+                if (c & 1):
+                    c = 0xEDB88320 ^ (c >> 1)
+                else:
+                    c = c >> 1
+            crcTable[n] = c
+    crc = crc ^ 0xFFFFFFFF
+    for byte in data:
+        crc = crcTable[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+if (crc32 is None):
+    crc32 = softCrc32
+
+# The KitronikRingLogger class keeps the most recent entries in a fixed number of preallocated slots (a circular log)
+# When the log is full, the newest entry replaces the oldest one, so entries are never copied to make space
+# The slots are kept in chunk files ('<file>.000', '<file>.001'...) of at most 'chunkSize' bytes each. On the Pico's LittleFS file system, writing into the middle of a file copies the rest of that file to new flash blocks,
+# so storing an entry costs rewriting up to one chunk (8kB by default), however big the log is - a larger chunk size means fewer files, but more flash written for each entry
+# After each entry the position of the next slot and the number of entries are added to the end of a small index file ('<file>.idx'), which is started again every INDEX_RECORDS entries
+# '<file>' holds the slot layout, project info and headings, and is only written when they change
+# Each entry takes one slot, so entries must be no longer than the slot size (including the "\r\n" at the end)
+class KitronikRingLogger(KitronikDataLogger):
+    MAGIC = b"KRL2"
+    HEADER_FORMAT = "<4sHHIHH"    # "KRL2", slot size, slots per chunk, slots, project info length, headings length
+    HEADER_SIZE = 16
+    INDEX_FORMAT = "<II"          # Position of the next slot to write, number of entries
+    INDEX_RECORD_SIZE = 8
+    INDEX_RECORDS = 64
+
+    # 'slots' x 'slotSize' bytes are set aside for entries when the log is created - the defaults use the same space as KitronikDataLogger's 500kB maximum
+    # If the log already exists, its own slot size, number of slots and chunk size are used (and the entries in it are kept)
+    def __init__(self, file="data_log.ring", separator="semicolon", slots=7500, slotSize=64, chunkSize=8192):
+        KitronikDataLogger.__init__(self, file, separator)
+        self.INDEXNAME = file + ".idx"
+        self.info = b""
+        self.headingsInfo = b""
+        if self.readHeader():
+            self.readIndex()
+        else:
+            self.slots = slots
+            self.slotSize = slotSize
+            self.slotsPerChunk = max(1, chunkSize // slotSize)
+            self.createFile()
+        self.MAX_FILE_SIZE = self.slots * self.slotSize
+
+    def chunkName(self, number):
+        return self.FILENAME + "." + ("%03d" % number)
+
+    def chunks(self):
+        return (self.slots + self.slotsPerChunk - 1) // self.slotsPerChunk
+
+    # Read the slot layout, project info and headings - returns False if there is no file or it is not a ring log
+    # If the power was cut while a new header was being put in place, the old one is gone (or left empty by KitronikDataLogger's constructor) but the new one is complete in '<file>.new' (see writeHeader())
+    def readHeader(self):
+        header = b""
+        for name in (self.FILENAME, self.FILENAME + ".new"):
+            try:
+                f = open(name, "rb")
+                header = f.read()
+                f.close()
+            except OSError:
+                continue
+            if (len(header) >= self.HEADER_SIZE) and (header[:4] == self.MAGIC):
+                break
+        if (len(header) < self.HEADER_SIZE):
+            return False
+        magic, slotSize, slotsPerChunk, slots, infoLength, headingsLength = struct.unpack_from(self.HEADER_FORMAT, header, 0)
+        if (magic != self.MAGIC):
+            return False
+        self.slotSize = slotSize
+        self.slotsPerChunk = slotsPerChunk
+        self.slots = slots
+        self.info = header[self.HEADER_SIZE:self.HEADER_SIZE + infoLength]
+        self.headingsInfo = header[self.HEADER_SIZE + infoLength:self.HEADER_SIZE + infoLength + headingsLength]
+        return True
+
+    # The new header is written to '<file>.new' and then renamed, so a power cut part way through never leaves a cut short header (which would start the log again)
+    def writeHeader(self):
+        f = open(self.FILENAME + ".new", "wb")
+        f.write(struct.pack(self.HEADER_FORMAT, self.MAGIC, self.slotSize, self.slotsPerChunk, self.slots, len(self.info), len(self.headingsInfo)))
+        f.write(self.info)
+        f.write(self.headingsInfo)
+        f.close()
+        try:
+            os.remove(self.FILENAME)
+        except OSError:
+            pass
+        os.rename(self.FILENAME + ".new", self.FILENAME)
+
+    # The last complete record in the index file gives the next slot and the number of entries (a record cut short by a power cut is ignored)
+    def readIndex(self):
+        self.head = 0
+        self.count = 0
+        self.indexRecords = self.INDEX_RECORDS    # Start a new index file unless there is one to add to
+        try:
+            f = open(self.INDEXNAME, "rb")
+            data = f.read()
+            f.close()
+        except OSError:
+            return
+        records = len(data) // self.INDEX_RECORD_SIZE
+        if (records > 0):
+            head, count = struct.unpack_from(self.INDEX_FORMAT, data, (records - 1) * self.INDEX_RECORD_SIZE)
+            if (head < self.slots) and (count <= self.slots):
+                self.head = head
+                self.count = count
+        if (len(data) == records * self.INDEX_RECORD_SIZE):
+            self.indexRecords = records
+
+    # Add the next slot and number of entries to the index - once it has INDEX_RECORDS records, a new index file replaces it
+    def writeIndex(self):
+        record = struct.pack(self.INDEX_FORMAT, self.head, self.count)
+        if (self.indexRecords >= self.INDEX_RECORDS):
+            f = open(self.INDEXNAME + ".new", "wb")
+            f.write(record)
+            f.close()
+            try:
+                os.remove(self.INDEXNAME)
+            except OSError:
+                pass
+            os.rename(self.INDEXNAME + ".new", self.INDEXNAME)
+            self.indexRecords = 1
+        else:
+            f = open(self.INDEXNAME, "ab")
+            f.write(record)
+            f.close()
+            self.indexRecords = self.indexRecords + 1
+
+    # Create the chunk files with every slot preallocated, so the files never have to grow
+    def createFile(self):
+        self.head = 0
+        self.count = 0
+        self.info = b""
+        self.headingsInfo = b""
+        self.writeHeader()
+        block = bytes(512)
+        remaining = self.slots * self.slotSize
+        for chunk in range(self.chunks()):
+            size = min(remaining, self.slotsPerChunk * self.slotSize)
+            remaining = remaining - size
+            f = open(self.chunkName(chunk), "wb")
+            while (size > 0):
+                f.write(block[:min(size, 512)])
+                size = size - 512
+            f.close()
+        self.indexRecords = self.INDEX_RECORDS
+        self.writeIndex()
+
+    # Keep the project info and headings, replacing any from before (the file is only written if they have changed)
+    def saveInfo(self, info, headingsInfo):
+        if (info != self.info) or (headingsInfo != self.headingsInfo):
+            self.info = info
+            self.headingsInfo = headingsInfo
+            self.writeHeader()
+
+    def writeProjectInfo(self, line1="", line2="", line3=""):
+        info = ""
+        for line in (line1, line2, line3):
+            if (line != ""):
+                info = info + line + "\r\n"
+        self.line1 = line1
+        self.line2 = line2
+        self.line3 = line3
+        self.projectInfo = True
+        self.saveInfo(info.encode(), self.headingsInfo)
+
+    def nameColumnHeadings(self, *fields):
+        self.setColumns(fields)
+        self.headings = True
+        self.saveInfo(self.info, (self.dataHeadings + "\r\n").encode())
+
+    # Write an entry into the next slot, replacing the oldest entry if the log is full, then update the index
+    def writeEntry(self, dataEntry):
+        data = dataEntry
+        if isinstance(data, str):
+            data = data.encode()
+        if (len(data) > self.slotSize):
+            raise ValueError("Entry is longer than the slot size (" + str(self.slotSize) + " bytes)")
+        chunk, slot = divmod(self.head, self.slotsPerChunk)
+        f = open(self.chunkName(chunk), "r+b")
+        f.seek(slot * self.slotSize)
+        f.write(data + bytes(self.slotSize - len(data)))
+        f.close()
+        self.head = (self.head + 1) % self.slots
+        if (self.count < self.slots):
+            self.count = self.count + 1
+        self.writeIndex()
+
+    # Entries are written to their slot straight away, so there is never anything waiting to be written
+    def flush(self):
+        pass
+
+    # The number of bytes of entries in the log
+    def checkFileSize(self):
+        return self.count * self.slotSize
+
+    # Remove the oldest entry from the log
+    def removeOneLine(self):
+        if (self.count > 0):
+            self.count = self.count - 1
+            self.writeIndex()
+
+    # Remove the oldest entries, at least 'size' bytes worth (whole slots)
+    def removeEntries(self, size):
+        self.count = max(0, self.count - ((size + self.slotSize - 1) // self.slotSize))
+        self.writeIndex()
+
+    # Empty the log (the project info and headings are kept)
+    def eraseAllData(self):
+        self.head = 0
+        self.count = 0
+        self.writeIndex()
+
+    # Deletes the log's files from the Pico file system (they are created again when the logger is next constructed)
+    def deleteDataFile(self):
+        for name in [self.FILENAME, self.FILENAME + ".new", self.INDEXNAME, self.INDEXNAME + ".new"] + [self.chunkName(chunk) for chunk in range(self.chunks())]:
+            try:
+                os.remove(name)
+            except OSError:
+                pass
+        self.count = 0
+
+    # Read the entries back one at a time, oldest first (one slot is read at a time, so this works however big the log is)
+    def readEntries(self):
+        f = None
+        openChunk = None
+        try:
+            slot = (self.head - self.count) % self.slots
+            for entry in range(self.count):
+                chunk, position = divmod(slot, self.slotsPerChunk)
+                if (chunk != openChunk):
+                    if f is not None:
+                        f.close()
+                    f = open(self.chunkName(chunk), "rb")
+                    openChunk = chunk
+                f.seek(position * self.slotSize)
+                data = f.read(self.slotSize)
+                end = data.find(b"\x00")
+                if (end >= 0):
+                    data = data[:end]
+                yield data.decode()
+                slot = (slot + 1) % self.slots
+        finally:
+            if f is not None:
+                f.close()
+
+    # Write the project info, headings and entries (oldest first) to a normal text file, laid out the same as a KitronikDataLogger file
+    def exportData(self, file):
+        f = open(file, "w")
+        f.write(self.info.decode())
+        f.write(self.headingsInfo.decode())
+        for entry in self.readEntries():
+            f.write(entry)
+        f.close()
+
+# The KitronikBinaryLogger class stores each entry as a fixed size record of numbers packed with struct, rather than as text
+# Records are about a third of the size of the same entry as text, so the same maximum file size holds about 3 times as many entries, and no number to text conversion is needed
+# The file starts with a header holding the project info and the column names and types, so it can be read back without knowing the program that wrote it (see 'Host Code/binary_log_decoder.py')
+# Every record starts with a timestamp: the Pico's time.time() in seconds
+# File layout (all numbers little-endian):
+#   header: "KBL1", epoch year (H), record size (H), number of columns (B), separator character (B), project info length (H), project info text
+#   then for each column: name length (B), name, struct type code character (B), decimal places (B)
+#   then the records, each packed with the format "<I" + the column type codes
+class KitronikBinaryLogger(KitronikDataLogger):
+    MAGIC = b"KBL1"
+    HEADER_FORMAT = "<4sHHBBH"
+    # Column types used if nameColumnHeadings() is not given one: struct type code and number of decimal places kept
+    DEFAULT_TYPES = {"Temperature": "h2", "Pressure": "I0", "Humidity": "H2", "Gas": "I0", "IAQ": "H0", "eCO2": "I0"}
+    # The range of each whole number type - values outside it are stored as the nearest end of the range, so an unexpected reading cannot stop the logging
+    LIMITS = {"b": (-128, 127), "B": (0, 255), "h": (-32768, 32767), "H": (0, 65535), "i": (-2147483648, 2147483647), "I": (0, 4294967295),
+              "l": (-2147483648, 2147483647), "L": (0, 4294967295), "q": (-(2 ** 63), (2 ** 63) - 1), "Q": (0, (2 ** 64) - 1)}
+
+    def __init__(self, file="data_log.bin", separator="semicolon"):
+        KitronikDataLogger.__init__(self, file, separator)
+        self.recordSize = 0
+        self.recordFormat = ""
+        self.columns = []
+        self.scales = []
+        self.limits = []
+
+    # The project info is kept in the file header, so it must be written before nameColumnHeadings()
+    def writeProjectInfo(self, line1="", line2="", line3=""):
+        if self.headings:
+            raise ValueError("Write the project info before the column headings")
+        self.line1 = line1
+        self.line2 = line2
+        self.line3 = line3
+        self.projectInfo = True
+
+    # Name the columns (after the timestamp, which every record has) - any number of columns can be used
+    # The type of each column can be given after a ':' - a struct type code and the number of decimal places to keep, eg: "Temperature:h2" is a signed 16-bit number in 1/100ths
+    # Without a type, the columns in DEFAULT_TYPES use those types and any others are stored as 32-bit floating point ("f")
+    # If the file already has the same columns, new records are added to it, otherwise the old file is renamed to '<file>.old' and a new file is started
+    def nameColumnHeadings(self, *fields):
+        self.columns = []
+        self.scales = []
+        self.limits = []
+        recordFormat = "<I"
+        for field in fields:
+            if (field == ""):
+                continue
+            name = field
+            columnType = None
+            if (":" in field):
+                name, columnType = field.rsplit(":", 1)
+            if (columnType is None):
+                columnType = self.DEFAULT_TYPES.get(name, "f")
+            code = columnType[0]
+            decimals = int(columnType[1:]) if (len(columnType) > 1) else 0
+            self.columns.append((name, code, decimals))
+            if (code in "fd"):
+                self.scales.append(None)
+            else:
+                self.scales.append(10 ** decimals)
+            self.limits.append(self.LIMITS.get(code))
+            recordFormat = recordFormat + code
+        self.recordFormat = recordFormat
+        self.recordSize = struct.calcsize(recordFormat)
+
+        header = self.packHeader()
+        existing = b""
+        try:
+            f = open(self.FILENAME, "rb")
+            existing = f.read(len(header))
+            f.close()
+        except OSError:
+            pass
+        if (existing != header):
+            if (len(existing) > 0):
+                try:
+                    os.remove(self.FILENAME + ".old")
+                except OSError:
+                    pass
+                os.rename(self.FILENAME, self.FILENAME + ".old")
+            f = open(self.FILENAME, "wb")
+            f.write(header)
+            f.close()
+        self.headerSize = len(header)
+        self.fileSize = None
+        self.headings = True
+
+    # The file header: format details, project info and column names & types
+    def packHeader(self):
+        info = ""
+        if self.projectInfo:
+            info = self.line1 + "\r\n" + self.line2 + "\r\n" + self.line3 + "\r\n"
+        info = info.encode()
+        header = struct.pack(self.HEADER_FORMAT, self.MAGIC, time.gmtime(0)[0], self.recordSize, len(self.columns), ord(self.SEPARATOR), len(info)) + info
+        for name, code, decimals in self.columns:
+            name = name.encode()
+            header = header + struct.pack("<B", len(name)) + name + struct.pack("<BB", ord(code), decimals)
+        return header
+
+    # The header is the start of the file (see rotateFile())
+    def fileHeader(self):
+        return self.packHeader()
+
+    # Store one record - the values must be in the same order as the column headings, as numbers (or text which can be converted to a number)
+    def storeDataEntry(self, *fields):
+        if not self.headings:
+            raise ValueError("Name the columns with nameColumnHeadings() first")
+        if (len(fields) != len(self.columns)):
+            raise ValueError("Expected " + str(len(self.columns)) + " values")
+        values = [int(time.time())]
+        for i in range(len(fields)):
+            value = fields[i]
+            if isinstance(value, str):
+                value = float(value)
+            scale = self.scales[i]
+            if (scale is None):
+                values.append(value)
+            else:
+                value = int(round(value * scale))
+                limits = self.limits[i]
+                if (limits is not None):
+                    if (value < limits[0]):
+                        value = limits[0]
+                    elif (value > limits[1]):
+                        value = limits[1]
+                values.append(value)
+        self.writeEntry(struct.pack(self.recordFormat, *values))
+
+    # Records are bytes, so the file is written in binary mode
+    def writeFile(self, file, passed):
+        f = open(file, "ab")
+        f.write(passed)
+        f.close()
+        if (file == self.FILENAME) and (self.fileSize is not None):
+            self.fileSize = self.fileSize + len(passed)
+
+    # Remove the earliest records, at least 'size' bytes worth, keeping the header
+    def removeEntries(self, size):
+        records = (size + self.recordSize - 1) // self.recordSize
+        tempName = self.FILENAME + ".bak"
+        readFrom = open(self.FILENAME, "rb")
+        writeTo = open(tempName, "wb")
+        writeTo.write(readFrom.read(self.headerSize))
+        readFrom.seek(self.headerSize + (records * self.recordSize))
+        blockSize = max(1, 512 // self.recordSize) * self.recordSize    # Whole records, at least one even if a record is longer than 512 bytes
+        block = readFrom.read(blockSize)
+        while block:
+            writeTo.write(block)
+            block = readFrom.read(blockSize)
+        readFrom.close()
+        writeTo.close()
+        os.remove(self.FILENAME)
+        os.rename(tempName, self.FILENAME)
+        self.fileSize = None
+
+    # Deletes all the records from the file (the header is kept)
+    def eraseAllData(self):
+        self.buffer = []
+        self.bufferSize = 0
+        f = open(self.FILENAME, "wb")
+        if self.headings:
+            f.write(self.packHeader())
+        f.close()
+        self.fileSize = None
+
+    # This returns the size of the file, or 0 if the file does not exist
+    def checkFileSize(self):
+        try:
+            f = open(self.FILENAME, "rb")
+            f.seek(0, 2)
+            size = f.tell()
+            f.close()
+            return size
+        except OSError:
+            return 0
+
+# The KitronikSegmentedLogger class splits the log into numbered segment files ('data_log.000', 'data_log.001'...), starting a new segment when the current one reaches a size or an age
+# Each segment is a normal text log (project info, headings, then entries), so any of them can be copied off and opened on its own
+# A small index file ('data_log.idx') records each segment's number, header length, number of entries and the time of its first and last entries, so reading a time range only opens the segments which cover it
+# When the log is too big, the oldest whole segment is deleted - entries are never copied from one file to another to make space
+# Index file layout (little-endian): "KSI1", epoch year (H), then for each segment, oldest first: number (H), header length (H), entries (I), first time (I), last time (I), size (I)
+# Times are the Pico's time.time() in seconds when each entry was stored
+class KitronikSegmentedLogger(KitronikDataLogger):
+    INDEX_MAGIC = b"KSI1"
+    INDEX_HEADER_FORMAT = "<4sH"
+    INDEX_HEADER_SIZE = 6
+    SEGMENT_FORMAT = "<HHIIII"
+    SEGMENT_RECORD_SIZE = 20
+
+    # 'file' is the start of the file names: segments are '<file>.000' to '<file>.999' (the numbers wrap around) and the index is '<file>.idx'
+    # A new segment is started when the current one would go over 'segmentSize' bytes, or its first entry is 'segmentTime' seconds old (0 to not use a limit)
+    # At most 'maxSegments' segments are kept, and MAX_FILE_SIZE (segmentSize x maxSegments) is the most space the whole log uses
+    def __init__(self, file="data_log", separator="semicolon", segmentSize=50000, segmentTime=0, maxSegments=10):
+        self.BASENAME = file
+        self.INDEXNAME = file + ".idx"
+        self.segments = []
+        if not self.readIndex():
+            self.segments = [[0, 0, 0, 0, 0, 0]]
+            self.writeIndex()
+        KitronikDataLogger.__init__(self, self.segmentName(self.segments[-1][0]), separator)
+        self.segmentSize = segmentSize
+        self.segmentTime = segmentTime
+        self.maxSegments = maxSegments
+        if segmentSize:
+            self.MAX_FILE_SIZE = segmentSize * maxSegments
+        self.headerChecked = False
+        self.bufferFirst = 0
+        self.bufferLast = 0
+
+    def segmentName(self, number):
+        return self.BASENAME + "." + ("%03d" % number)
+
+    # Read the list of segments from the index file - returns False if there is no index
+    def readIndex(self):
+        try:
+            f = open(self.INDEXNAME, "rb")
+            data = f.read()
+            f.close()
+        except OSError:
+            return False
+        if (len(data) < self.INDEX_HEADER_SIZE) or (data[0:4] != self.INDEX_MAGIC):
+            return False
+        self.segments = []
+        for offset in range(self.INDEX_HEADER_SIZE, len(data) - self.SEGMENT_RECORD_SIZE + 1, self.SEGMENT_RECORD_SIZE):
+            self.segments.append(list(struct.unpack_from(self.SEGMENT_FORMAT, data, offset)))
+        return (len(self.segments) > 0)
+
+    # Write the whole index (when a segment is started or deleted)
+    def writeIndex(self):
+        f = open(self.INDEXNAME, "wb")
+        f.write(struct.pack(self.INDEX_HEADER_FORMAT, self.INDEX_MAGIC, time.gmtime(0)[0]))
+        for segment in self.segments:
+            f.write(struct.pack(self.SEGMENT_FORMAT, *segment))
+        f.close()
+
+    # Update the current segment's record in the index, in place
+    def writeSegmentRecord(self):
+        f = open(self.INDEXNAME, "r+b")
+        f.seek(self.INDEX_HEADER_SIZE + ((len(self.segments) - 1) * self.SEGMENT_RECORD_SIZE))
+        f.write(struct.pack(self.SEGMENT_FORMAT, *self.segments[-1]))
+        f.close()
+
+    # The project info and headings are written at the start of every segment, so they are kept until the next entries are written
+    def writeProjectInfo(self, line1="", line2="", line3=""):
+        self.line1 = line1
+        self.line2 = line2
+        self.line3 = line3
+        self.projectInfo = True
+        self.headerChecked = False
+
+    def nameColumnHeadings(self, *fields):
+        self.setColumns(fields)
+        self.headings = True
+        self.headerChecked = False
+
+    # The text at the start of each segment
+    def segmentHeader(self):
+        header = ""
+        if self.projectInfo:
+            for line in (self.line1, self.line2, self.line3):
+                if (line != ""):
+                    header = header + line + "\r\n"
+        if self.headings:
+            header = header + self.dataHeadings + "\r\n"
+        return header
+
+    # Note the time of each entry as it is stored, for the index
+    # If this entry belongs in the next segment, the buffered entries are written first, so segments split at the right entry whatever the flush policy
+    def writeEntry(self, dataEntry):
+        now = int(time.time())
+        if (len(self.buffer) > 0):
+            segment = self.segments[-1]
+            first = segment[3] if (segment[2] > 0) else self.bufferFirst
+            if (self.segmentSize and (segment[5] + self.bufferSize + len(dataEntry) > self.segmentSize)) or (self.segmentTime and (now - first >= self.segmentTime)):
+                self.flush()
+        if (len(self.buffer) == 0):
+            self.bufferFirst = now
+        self.bufferLast = now
+        KitronikDataLogger.writeEntry(self, dataEntry)
+
+    # Write the buffered entries to the current segment, starting a new segment first if the current one is full or old enough
+    def flush(self):
+        self.lastFlush = time.ticks_ms()
+        if (len(self.buffer) == 0):
+            return
+        data = self.buffer[0][:0].join(self.buffer)
+        if isinstance(data, str):
+            data = data.encode()
+        entries = len(self.buffer)
+        self.buffer = []
+        self.bufferSize = 0
+        segment = self.segments[-1]
+        if (segment[2] > 0):
+            headerChanged = (self.headerChecked == False) and (self.projectInfo or self.headings) and (self.readHeader(segment) != self.segmentHeader())
+            if headerChanged or (self.segmentSize and (segment[5] + len(data) > self.segmentSize)) or (self.segmentTime and (self.bufferFirst - segment[3] >= self.segmentTime)):
+                segment = self.newSegment()
+        self.headerChecked = True
+        if (segment[5] == 0):
+            header = self.segmentHeader().encode()
+            segment[1] = len(header)
+            data = header + data
+        removed = self.applyRetention(len(data))
+        self.writeFile(self.FILENAME, data)
+        if (segment[2] == 0):
+            segment[3] = self.bufferFirst
+        segment[2] = segment[2] + entries
+        segment[4] = self.bufferLast
+        segment[5] = segment[5] + len(data)
+        if removed:
+            self.writeIndex()
+        else:
+            self.writeSegmentRecord()
+
+    # Read the project info and headings at the start of a segment
+    def readHeader(self, segment):
+        f = open(self.segmentName(segment[0]), "rb")
+        header = f.read(segment[1])
+        f.close()
+        return header.decode()
+
+    # Start a new, empty segment, deleting the oldest segments if there are too many
+    def newSegment(self):
+        self.segments.append([(self.segments[-1][0] + 1) % 1000, 0, 0, 0, 0, 0])
+        self.applyRetention(0)
+        self.FILENAME = self.segmentName(self.segments[-1][0])
+        f = open(self.FILENAME, "w")
+        f.close()
+        self.fileSize = 0
+        self.writeIndex()
+        return self.segments[-1]
+
+    # Delete whole segments, oldest first, until there are no more than maxSegments and they fit in MAX_FILE_SIZE with 'size' more bytes (the newest segment is always kept)
+    # Returns True if any segments were deleted (the index then needs to be written again)
+    def applyRetention(self, size):
+        removed = False
+        while (len(self.segments) > 1) and ((len(self.segments) > self.maxSegments) or (self.checkFileSize() + size > self.MAX_FILE_SIZE)):
+            self.deleteSegment(self.segments.pop(0))
+            removed = True
+        return removed
+
+    def deleteSegment(self, segment):
+        try:
+            os.remove(self.segmentName(segment[0]))
+        except OSError:
+            pass
+
+    # This returns the size of the whole log (all of the segments)
+    def checkFileSize(self):
+        size = 0
+        for segment in self.segments:
+            size = size + segment[5]
+        return size
+
+    # Make space by deleting the oldest segments, at least 'size' bytes worth - if only the current segment is left, it is emptied
+    def removeEntries(self, size):
+        self.flush()
+        removed = 0
+        while (removed < size) and (len(self.segments) > 1):
+            segment = self.segments.pop(0)
+            removed = removed + segment[5]
+            self.deleteSegment(segment)
+        if (removed < size):
+            self.eraseAllData()
+        else:
+            self.writeIndex()
+
+    # Deletes all the segments and starts again with a new, empty segment
+    def eraseAllData(self):
+        self.buffer = []
+        self.bufferSize = 0
+        for segment in self.segments:
+            self.deleteSegment(segment)
+        self.segments = [[(self.segments[-1][0] + 1) % 1000, 0, 0, 0, 0, 0]]
+        self.FILENAME = self.segmentName(self.segments[0][0])
+        f = open(self.FILENAME, "w")
+        f.close()
+        self.fileSize = 0
+        self.headerChecked = False
+        self.writeIndex()
+
+    # Deletes all the segments and the index from the Pico file system
+    def deleteDataFile(self):
+        self.buffer = []
+        self.bufferSize = 0
+        for segment in self.segments:
+            self.deleteSegment(segment)
+        os.remove(self.INDEXNAME)
+        self.segments = [[0, 0, 0, 0, 0, 0]]
+        self.fileSize = None
+
+    # The names of the segments (oldest first) which have entries between the times 'start' and 'end' (seconds, as time.time() - None for no limit)
+    def segmentsBetween(self, start=None, end=None):
+        names = []
+        for number, headerLength, entries, first, last, size in self.segments:
+            if (entries > 0) and ((start is None) or (last >= start)) and ((end is None) or (first <= end)):
+                names.append(self.segmentName(number))
+        return names
+
+    # Read the entries back one line at a time, oldest first, from only the segments which cover the times 'start' to 'end'
+    # The index has the times of each segment's first and last entries, so whole segments are picked - entries near the start and end of the range may be just outside it
+    def readEntries(self, start=None, end=None):
+        self.flush()
+        for number, headerLength, entries, first, last, size in self.segments:
+            if (entries == 0) or ((start is not None) and (last < start)) or ((end is not None) and (first > end)):
+                continue
+            f = open(self.segmentName(number), "rb")
+            try:
+                f.seek(headerLength)
+                line = f.readline()
+                while line:
+                    yield line.decode()
+                    line = f.readline()
+            finally:
+                f.close()
+
+    # Write the project info, headings and the entries between 'start' and 'end' to one normal text file, laid out the same as a KitronikDataLogger file
+    def exportData(self, file, start=None, end=None):
+        f = open(file, "w")
+        f.write(self.segmentHeader())
+        for entry in self.readEntries(start, end):
+            f.write(entry)
+        f.close()
+
+# The KitronikJournalLogger class keeps the log safe if the Pico loses power or is reset while it is writing
+# Each entry is written as a record with its length and a CRC-32 check value, only ever added to the end of the file - so a write which is cut short can be found and ignored
+# When the logger is created, both journal files are checked and logging carries on straight after the last whole, correct entry (anything after it is written over)
+# Each record's CRC also covers the journal's sequence number, the number of restarts and the record's number in the journal. After a restart which found cut short or damaged data, a restart record comes first,
+# so any old records left after the new ones never pass their check and cannot come back into the log
+# The log uses two journal files ('data_log.j0' and 'data_log.j1'), each up to half of MAX_FILE_SIZE - when one is full, logging moves to the other, clearing out the oldest entries in one go
+# Entries are never copied from one file to another, so there is no point where the only copy of the log is a half-written temporary file
+# Journal file layout (little-endian): "KJL2", sequence number (I), project info & headings length (H), project info & headings text, CRC-32 of all of these (I)
+#   then the records: entry length (H), CRC-32 (I) of the sequence number, restart count & record number (<III) followed by the entry, entry
+#   a restart record has length 0 and adds one to the restart count (its CRC is worked out with the new count)
+# The file with the higher sequence number is the one being written to
+# Journals in the older "KJL1" layout (whose record CRCs only covered the entry) are not read: recovery ignores them and their entries, and starts a new '<file>.j0' in their place
+class KitronikJournalLogger(KitronikDataLogger):
+    MAGIC = b"KJL2"
+    HEADER_FORMAT = "<4sIH"
+    HEADER_SIZE = 10
+    RECORD_FORMAT = "<HI"
+    RECORD_SIZE = 6
+    RECORD_KEY_FORMAT = "<III"
+    MAX_ENTRY = 1024
+
+    # 'file' is the start of the file names: the journals are '<file>.j0' and '<file>.j1'
+    def __init__(self, file="data_log", separator="semicolon"):
+        self.BASENAME = file
+        self.journals = [file + ".j0", file + ".j1"]
+        KitronikDataLogger.__init__(self, self.journals[0], separator)
+        self.recover()
+
+    # Check both journal files and carry on from the end of the last good entry in the newest one
+    # recoveredEntries is the number of good entries found and discardedBytes is the amount of cut short or damaged data after them (which will be written over)
+    def recover(self):
+        self.sequences = [None, None]
+        self.ends = [0, 0]
+        self.entries = [0, 0]
+        self.records = [0, 0]     # Records in each journal, including restart records
+        self.restarts = [0, 0]
+        self.stale = [False, False]    # True if there is data after the last good record, so a restart record must be written first
+        self.infos = [b"", b""]
+        self.discardedBytes = 0
+        for i in range(2):
+            self.scanJournal(i)
+        self.recoveredEntries = self.entries[0] + self.entries[1]
+        if (self.sequences[0] is None) and (self.sequences[1] is None):
+            self.startJournal(0, 1)
+            return
+        if (self.sequences[1] is None) or ((self.sequences[0] is not None) and (self.sequences[0] > self.sequences[1])):
+            self.active = 0
+        else:
+            self.active = 1
+        self.FILENAME = self.journals[self.active]
+        self.info = self.infos[self.active]
+        self.discardedBytes = self.fileLength(self.FILENAME) - self.ends[self.active]
+        self.stale[self.active] = (self.discardedBytes > 0)
+
+    # Read one journal file's header and check its records, noting where the last good record ends
+    def scanJournal(self, i):
+        try:
+            f = open(self.journals[i], "rb")
+        except OSError:
+            return
+        try:
+            header = f.read(self.HEADER_SIZE)
+            if (len(header) < self.HEADER_SIZE):
+                return
+            magic, sequence, infoLength = struct.unpack(self.HEADER_FORMAT, header)
+            if (magic != self.MAGIC):
+                return
+            info = f.read(infoLength)
+            check = f.read(4)
+            if (len(check) < 4) or (struct.unpack("<I", check)[0] != crc32(info, crc32(header))):
+                return
+            self.sequences[i] = sequence
+            self.infos[i] = info
+            end = self.HEADER_SIZE + infoLength + 4
+            entries = 0
+            records = 0
+            restarts = 0
+            for entry in self.readRecords(f, sequence):
+                end = end + self.RECORD_SIZE + len(entry)
+                records = records + 1
+                if (len(entry) == 0):
+                    restarts = restarts + 1
+                else:
+                    entries = entries + 1
+            self.ends[i] = end
+            self.entries[i] = entries
+            self.records[i] = records
+            self.restarts[i] = restarts
+        finally:
+            f.close()
+
+    # Generator: the entries in a journal file with sequence number 'sequence', from the first record up to the first record which is cut short or does not match its CRC
+    # A restart record is returned as b""
+    def readRecords(self, f, sequence):
+        restarts = 0
+        index = 0
+        while True:
+            record = f.read(self.RECORD_SIZE)
+            if (len(record) < self.RECORD_SIZE):
+                return
+            length, check = struct.unpack(self.RECORD_FORMAT, record)
+            if (length > self.MAX_ENTRY):
+                return
+            if (length == 0):
+                if (self.recordCrc(b"", sequence, restarts + 1, index) != check):
+                    return
+                restarts = restarts + 1
+                entry = b""
+            else:
+                entry = f.read(length)
+                if (len(entry) < length) or (self.recordCrc(entry, sequence, restarts, index) != check):
+                    return
+            index = index + 1
+            yield entry
+
+    # The CRC-32 of a record: the sequence number, restart count and record number, then the entry
+    def recordCrc(self, entry, sequence, restarts, index):
+        return crc32(entry, crc32(struct.pack(self.RECORD_KEY_FORMAT, sequence, restarts, index)))
+
+    def fileLength(self, name):
+        try:
+            f = open(name, "rb")
+            length = f.seek(0, 2)
+            f.close()
+            return length
+        except OSError:
+            return 0
+
+    # Start writing to journal file 'i' with a new header (anything in the file before is cleared)
+    def startJournal(self, i, sequence):
+        info = self.headerText().encode()
+        header = struct.pack(self.HEADER_FORMAT, self.MAGIC, sequence, len(info)) + info
+        header = header + struct.pack("<I", crc32(header))
+        f = open(self.journals[i], "wb")
+        f.write(header)
+        f.close()
+        self.active = i
+        self.FILENAME = self.journals[i]
+        self.sequences[i] = sequence
+        self.ends[i] = len(header)
+        self.entries[i] = 0
+        self.records[i] = 0
+        self.restarts[i] = 0
+        self.stale[i] = False
+        self.infos[i] = info
+        self.info = info
+
+    # The project info and headings text kept in each journal file's header
+    def headerText(self):
+        text = ""
+        if self.projectInfo:
+            for line in (self.line1, self.line2, self.line3):
+                if (line != ""):
+                    text = text + line + "\r\n"
+        if self.headings:
+            text = text + self.dataHeadings + "\r\n"
+        return text
+
+    # The project info and headings are kept in the journal file header, written with the next entries
+    def writeProjectInfo(self, line1="", line2="", line3=""):
+        self.line1 = line1
+        self.line2 = line2
+        self.line3 = line3
+        self.projectInfo = True
+
+    def nameColumnHeadings(self, *fields):
+        self.setColumns(fields)
+        self.headings = True
+
+    def writeEntry(self, dataEntry):
+        if (len(dataEntry) > self.MAX_ENTRY):
+            raise ValueError("Entry is longer than " + str(self.MAX_ENTRY) + " bytes")
+        KitronikDataLogger.writeEntry(self, dataEntry)
+
+    # Add the buffered entries to the end of the journal as records, in one write
+    # If the project info or headings have changed, or the journal is full, logging moves to the other journal file first
+    def flush(self):
+        self.lastFlush = time.ticks_ms()
+        if (len(self.buffer) == 0):
+            return
+        entries = []
+        size = 0
+        for entry in self.buffer:
+            if isinstance(entry, str):
+                entry = entry.encode()
+            entries.append(entry)
+            size = size + self.RECORD_SIZE + len(entry)
+        self.buffer = []
+        self.bufferSize = 0
+        active = self.active
+        if (self.projectInfo or self.headings) and (self.headerText().encode() != self.info):
+            if (self.entries[active] == 0):
+                self.startJournal(active, self.sequences[active])
+            else:
+                self.startJournal(1 - active, self.sequences[active] + 1)
+        elif (self.entries[active] > 0) and (self.ends[active] + size > self.MAX_FILE_SIZE // 2):
+            self.startJournal(1 - active, self.sequences[active] + 1)
+        active = self.active
+        sequence = self.sequences[active]
+        index = self.records[active]
+        records = []
+        if self.stale[active]:
+            self.restarts[active] = self.restarts[active] + 1
+            records.append(struct.pack(self.RECORD_FORMAT, 0, self.recordCrc(b"", sequence, self.restarts[active], index)))
+            index = index + 1
+        restarts = self.restarts[active]
+        for entry in entries:
+            records.append(struct.pack(self.RECORD_FORMAT, len(entry), self.recordCrc(entry, sequence, restarts, index)))
+            records.append(entry)
+            index = index + 1
+        data = b"".join(records)
+        f = open(self.FILENAME, "r+b")
+        f.seek(self.ends[active])
+        f.write(data)
+        f.close()
+        self.ends[active] = self.ends[active] + len(data)
+        self.entries[active] = self.entries[active] + len(entries)
+        self.records[active] = index
+        self.stale[active] = False
+
+    # This returns the size of both journal files (up to the last good entry)
+    def checkFileSize(self):
+        size = 0
+        for i in range(2):
+            if (self.sequences[i] is not None):
+                size = size + self.ends[i]
+        return size
+
+    # Make space by clearing the older journal file - if there is only one, all the entries are removed
+    def removeEntries(self, size):
+        self.flush()
+        older = 1 - self.active
+        if (self.sequences[older] is None) or (self.entries[older] == 0):
+            self.eraseAllData()
+        else:
+            self.clearJournal(older)
+
+    def clearJournal(self, i):
+        f = open(self.journals[i], "wb")
+        f.close()
+        self.sequences[i] = None
+        self.ends[i] = 0
+        self.entries[i] = 0
+        self.records[i] = 0
+        self.restarts[i] = 0
+        self.stale[i] = False
+
+    # Deletes all the entries (the project info and headings are kept)
+    def eraseAllData(self):
+        self.buffer = []
+        self.bufferSize = 0
+        sequence = self.sequences[self.active] + 1
+        self.clearJournal(1 - self.active)
+        self.startJournal(self.active, sequence)
+
+    # Deletes both journal files from the Pico file system (they are created again when the logger is next constructed)
+    def deleteDataFile(self):
+        self.buffer = []
+        self.bufferSize = 0
+        for name in self.journals:
+            try:
+                os.remove(name)
+            except OSError:
+                pass
+        self.sequences = [None, None]
+
+    # Read the entries back one at a time as text, oldest first (only the entries which were written completely are returned)
+    def readEntries(self):
+        self.flush()
+        order = [1 - self.active, self.active]
+        for i in order:
+            if (self.sequences[i] is None) or (self.entries[i] == 0):
+                continue
+            f = open(self.journals[i], "rb")
+            try:
+                f.seek(self.HEADER_SIZE + len(self.infos[i]) + 4)
+                count = 0
+                for entry in self.readRecords(f, self.sequences[i]):
+                    if (count == self.entries[i]):
+                        break
+                    if (len(entry) > 0):
+                        yield entry.decode()
+                        count = count + 1
+            finally:
+                f.close()
+
+    # Write the project info, headings and entries (oldest first) to a normal text file, laid out the same as a KitronikDataLogger file
+    def exportData(self, file):
+        f = open(file, "w")
+        f.write(self.info.decode())
+        for entry in self.readEntries():
+            f.write(entry)
+        f.close()
+
+# The KitronikRollup class keeps the running count, min, max, mean and last value of each channel over one period (used by KitronikAggregator)
+# Only these few numbers are kept, however many readings there are in the period
+class KitronikRollup:
+    def __init__(self, period, logger, channels):
+        self.period = period
+        self.logger = logger
+        self.start = None
+        self.count = 0
+        self.counts = [0] * channels
+        self.mins = [0] * channels
+        self.maxs = [0] * channels
+        self.means = [0] * channels
+        self.lasts = [0] * channels
+
+    # Start a new period
+    def reset(self, start):
+        self.start = start
+        self.count = 0
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+
+    # Add one reading of each channel (None for a channel with no reading)
+    def addReading(self, values):
+        self.count = self.count + 1
+        for i in range(len(self.counts)):
+            value = values[i]
+            if (value is None):
+                continue
+            n = self.counts[i] + 1
+            self.counts[i] = n
+            if (n == 1):
+                self.mins[i] = value
+                self.maxs[i] = value
+                self.means[i] = value
+            else:
+                if (value < self.mins[i]):
+                    self.mins[i] = value
+                if (value > self.maxs[i]):
+                    self.maxs[i] = value
+                self.means[i] = self.means[i] + ((value - self.means[i]) / n)
+            self.lasts[i] = value
+
+    # Add the totals of a shorter period (eg: a minute into an hour)
+    def addRollup(self, other):
+        self.count = self.count + other.count
+        for i in range(len(self.counts)):
+            otherCount = other.counts[i]
+            if (otherCount == 0):
+                continue
+            n = self.counts[i] + otherCount
+            if (self.counts[i] == 0):
+                self.mins[i] = other.mins[i]
+                self.maxs[i] = other.maxs[i]
+                self.means[i] = other.means[i]
+            else:
+                if (other.mins[i] < self.mins[i]):
+                    self.mins[i] = other.mins[i]
+                if (other.maxs[i] > self.maxs[i]):
+                    self.maxs[i] = other.maxs[i]
+                self.means[i] = self.means[i] + ((other.means[i] - self.means[i]) * otherCount / n)
+            self.counts[i] = n
+            self.lasts[i] = other.lasts[i]
+
+    # The log entry for the period: date & time of the start of the period, number of readings, then min, mean, max and last for each channel ("-" if a channel had no readings)
+    def fields(self):
+        t = time.gmtime(self.start)
+        fields = ["%02d/%02d/%04d" % (t[2], t[1], t[0]), "%02d:%02d:%02d" % (t[3], t[4], t[5]), self.count]
+        for i in range(len(self.counts)):
+            if (self.counts[i] == 0):
+                fields.extend(("-", "-", "-", "-"))
+            else:
+                fields.extend((self.mins[i], float(self.means[i]), self.maxs[i], self.lasts[i]))
+        return fields
+
+# The KitronikAggregator class sits in front of data loggers and logs summaries of the readings (count, min, mean, max and last) rather than every reading
+# Each summary period (eg: minute, hour and day) goes to its own logger, so each can be kept for a different length of time, and reading back a long time range only needs the small, coarse logs
+# Readings go into the shortest period, and each completed period is added into the next longer one - so each reading only updates one set of totals, and only a few numbers are kept for each channel
+# Each period must be a whole number of the period before it (eg: 60, 3600, 86400 seconds)
+# The totals for the periods which have not finished yet are only kept in RAM, so after a restart the first summaries only count the readings since the restart (see the count column)
+# The summaries have text fields (the date & time, and "-" for a channel with no readings), so they need a text logger: KitronikDataLogger, KitronikRingLogger, KitronikSegmentedLogger or KitronikJournalLogger
+class KitronikAggregator:
+    # channels - the channel names, or (name, decimal places) for the mean & other decimal values, eg: ("Temperature", 2)
+    # tiers - (period in seconds, logger) for each summary period, shortest first, eg: ((60, minuteLog), (3600, hourLog), (86400, dayLog))
+    # The column headings are written to each logger: Date, Time, Count, then "<channel> Min", "<channel> Mean", "<channel> Max", "<channel> Last" for each channel
+    def __init__(self, channels, tiers):
+        self.channels = len(channels)
+        self.rollups = []
+        previous = None
+        for period, logger in tiers:
+            if (previous is not None) and ((period <= previous) or (period % previous != 0)):
+                raise ValueError("Each period must be a whole number of the period before it")
+            previous = period
+            if isinstance(logger, (KitronikBinaryLogger, KitronikDeltaLogger)):
+                raise TypeError(type(logger).__name__ + " only stores numbers, so it cannot log the summaries - use a text logger")
+            self.rollups.append(KitronikRollup(period, logger, len(channels)))
+            headings = ["Date", "Time", "Count"]
+            for channel in channels:
+                if isinstance(channel, tuple):
+                    name, places = channel
+                else:
+                    name = channel
+                    places = logger.DEFAULT_DECIMALS
+                for statistic in (" Min", " Mean", " Max", " Last"):
+                    headings.append((name + statistic, places))
+            logger.nameColumnHeadings(*headings)
+
+    # Add one reading of every channel, in the same order as the channel names (None for a missing reading)
+    # The time is time.time() unless 'timestamp' is given (seconds)
+    def addReading(self, *values, timestamp=None):
+        if (len(values) != self.channels):
+            raise ValueError("Expected " + str(self.channels) + " values")
+        if (timestamp is None):
+            timestamp = int(time.time())
+        self.advance(0, timestamp)
+        self.rollups[0].addReading(values)
+
+    # Move period 'level' on to the one containing 'timestamp', logging the finished period first
+    def advance(self, level, timestamp):
+        rollup = self.rollups[level]
+        start = timestamp - (timestamp % rollup.period)
+        if (rollup.start != start):
+            if (rollup.count > 0):
+                self.finish(level)
+            rollup.reset(start)
+
+    # Log a finished period and add it into the next longer one
+    def finish(self, level):
+        rollup = self.rollups[level]
+        rollup.logger.storeDataEntry(*rollup.fields())
+        if (level + 1 < len(self.rollups)):
+            self.advance(level + 1, rollup.start)
+            self.rollups[level + 1].addRollup(rollup)
+
+    # Write any buffered entries in all the loggers to their files
+    def flush(self):
+        for rollup in self.rollups:
+            rollup.logger.flush()
+
+# The KitronikDeltaLogger class stores readings compressed: each value is kept as a whole number (to the column's decimal places) and each entry only stores how much the values changed since the entry before
+# The changes are stored as zig-zag varints (small changes, up or down, take 1 byte), so a typical entry of BME688 readings takes a few bytes rather than about 50 characters of text
+# Every 'keyframeInterval' entries (and at the start of the file) there is a keyframe with the full values, and a small index file lists where each keyframe is, so reading can start part way through the log
+# Read the log back with KitronikLogReader (PicoAirQualityReader.py), on the Pico or a PC
+# File layout (little-endian):
+#   header: "KDL1", epoch year (H), keyframe interval (H), number of columns (B), separator character (B), project info length (H), project info text
+#   then for each column: name length (B), name, decimal places (B)
+#   then the entries: a keyframe is varint((time << 1) | 1) then zigzag(value) for each column
+#                     other entries are varint((time - previous time) << 1) then zigzag(value - previous value) for each column
+# Keyframe index '<file>.keys': time (I), offset of the keyframe in the file (I) for each keyframe
+class KitronikDeltaLogger(KitronikDataLogger):
+    MAGIC = b"KDL1"
+    HEADER_FORMAT = "<4sHHBBH"
+    INDEX_FORMAT = "<II"
+    INDEX_RECORD_SIZE = 8
+
+    def __init__(self, file="data_log.dlt", separator="semicolon", keyframeInterval=60):
+        KitronikDataLogger.__init__(self, file, separator)
+        self.INDEXNAME = file + ".keys"
+        self.keyframeInterval = keyframeInterval
+        self.columns = []
+        self.scales = []
+        self.previous = []
+        self.previousTime = 0
+        self.sinceKeyframe = None    # None until the first keyframe has been stored
+        self.headerSize = 0
+        self.bufferTime = 0          # The time and full values of the first buffered entry, to write it as a keyframe if the entries before it are removed
+        self.bufferValues = []
+
+    # The project info is kept in the file header, so it must be written before nameColumnHeadings()
+    def writeProjectInfo(self, line1="", line2="", line3=""):
+        if self.headings:
+            raise ValueError("Write the project info before the column headings")
+        self.line1 = line1
+        self.line2 = line2
+        self.line3 = line3
+        self.projectInfo = True
+
+    # Name the columns (after the time, which every entry has) - a heading can be given with the number of decimal places to keep, eg: ("Temperature", 2)
+    # If the file already has the same columns, new entries are added to it, otherwise the old file is renamed to '<file>.old' and a new file is started
+    def nameColumnHeadings(self, *fields):
+        self.setColumns(fields)
+        self.columns = []
+        for field in fields:
+            if isinstance(field, tuple):
+                field = field[0]
+            if (field != ""):
+                self.columns.append(field)
+        self.scales = [10 ** places for places in self.decimals]
+        self.previous = [0] * len(self.columns)
+
+        header = self.packHeader()
+        existing = b""
+        try:
+            f = open(self.FILENAME, "rb")
+            existing = f.read(len(header))
+            f.close()
+        except OSError:
+            pass
+        if (existing != header):
+            if (len(existing) > 0):
+                for name in (self.FILENAME, self.INDEXNAME):
+                    try:
+                        os.remove(name + ".old")
+                    except OSError:
+                        pass
+                    try:
+                        os.rename(name, name + ".old")
+                    except OSError:
+                        pass
+            f = open(self.FILENAME, "wb")
+            f.write(header)
+            f.close()
+            f = open(self.INDEXNAME, "wb")
+            f.close()
+        self.headerSize = len(header)
+        self.fileSize = None
+        self.sinceKeyframe = None
+        self.headings = True
+
+    # The file header: format details, project info and column names & decimal places
+    def packHeader(self):
+        info = ""
+        if self.projectInfo:
+            info = self.line1 + "\r\n" + self.line2 + "\r\n" + self.line3 + "\r\n"
+        info = info.encode()
+        header = struct.pack(self.HEADER_FORMAT, self.MAGIC, time.gmtime(0)[0], self.keyframeInterval, len(self.columns), ord(self.SEPARATOR), len(info)) + info
+        for i in range(len(self.columns)):
+            name = self.columns[i].encode()
+            header = header + struct.pack("<B", len(name)) + name + struct.pack("<B", self.decimals[i])
+        return header
+
+    # Store one entry - the values must be in the same order as the column headings, as numbers (or text which can be converted to a number)
+    def storeDataEntry(self, *fields):
+        if not self.headings:
+            raise ValueError("Name the columns with nameColumnHeadings() first")
+        if (len(fields) != len(self.columns)):
+            raise ValueError("Expected " + str(len(self.columns)) + " values")
+        now = int(time.time())
+        keyframe = (self.sinceKeyframe is None) or (self.sinceKeyframe + 1 >= self.keyframeInterval) or (now < self.previousTime)
+        if keyframe:
+            pos = self.writeVarint(0, (now << 1) | 1)
+            self.sinceKeyframe = 0
+        else:
+            pos = self.writeVarint(0, (now - self.previousTime) << 1)
+            self.sinceKeyframe = self.sinceKeyframe + 1
+        self.previousTime = now
+        for i in range(len(fields)):
+            value = fields[i]
+            if isinstance(value, str):
+                value = float(value)
+            if isinstance(value, float):
+                if (value >= 0):
+                    value = int((value * self.scales[i]) + 0.5)
+                else:
+                    value = int((value * self.scales[i]) - 0.5)
+            else:
+                value = value * self.scales[i]
+            if keyframe:
+                change = value
+            else:
+                change = value - self.previous[i]
+            self.previous[i] = value
+            pos = self.writeSigned(pos, change)
+        if (len(self.buffer) == 0):
+            self.bufferTime = now
+            self.bufferValues = list(self.previous)
+        self.writeEntry(bytes(self.rowView[:pos]))
+
+    # An entry with the full values (a keyframe)
+    def packKeyframe(self, now, values):
+        pos = self.writeVarint(0, (now << 1) | 1)
+        for value in values:
+            pos = self.writeSigned(pos, value)
+        return bytes(self.rowView[:pos])
+
+    # Write a whole number which may be negative into the row buffer as a zig-zag varint (0, -1, 1, -2, 2... are stored as 0, 1, 2, 3, 4...), returning the position after it
+    def writeSigned(self, pos, value):
+        if (value >= 0):
+            return self.writeVarint(pos, value << 1)
+        return self.writeVarint(pos, ((-value) << 1) - 1)
+
+    # Write a whole number into the row buffer 7 bits at a time (the top bit of each byte is set if more bytes follow), returning the position after it
+    def writeVarint(self, pos, value):
+        self.reserveRow(pos, 10)
+        row = self.row
+        while (value > 0x7F):
+            row[pos] = (value & 0x7F) | 0x80
+            value = value >> 7
+            pos = pos + 1
+            if (pos + 1 >= len(row)):
+                self.reserveRow(pos, 10)
+                row = self.row
+        row[pos] = value
+        return pos + 1
+
+    # Write the buffered entries to the file, and add any keyframes among them to the index
+    def flush(self):
+        self.lastFlush = time.ticks_ms()
+        if (len(self.buffer) == 0):
+            return
+        data = b"".join(self.buffer)
+        entries = self.buffer
+        self.buffer = []
+        self.bufferSize = 0
+        if (self.fileSize is None):
+            self.fileSize = self.checkFileSize()
+        if (self.fileSize + len(data) > self.MAX_FILE_SIZE):
+            # The entries before the first buffered one may be removed (or the whole file erased), so it is written as a keyframe
+            if not (entries[0][0] & 1):
+                entries[0] = self.packKeyframe(self.bufferTime, self.bufferValues)
+                data = b"".join(entries)
+            self.removeEntries(self.fileSize + len(data) - self.MAX_FILE_SIZE)
+            self.fileSize = self.checkFileSize()
+        keyframes = []
+        offset = self.fileSize
+        for entry in entries:
+            if (entry[0] & 1):
+                keyframes.append(struct.pack(self.INDEX_FORMAT, self.readVarint(entry) >> 1, offset))
+            offset = offset + len(entry)
+        self.writeFile(self.FILENAME, data)
+        if (len(keyframes) > 0):
+            f = open(self.INDEXNAME, "ab")
+            f.write(b"".join(keyframes))
+            f.close()
+
+    # The whole number at the start of an entry
+    def readVarint(self, data):
+        value = 0
+        shift = 0
+        for byte in data:
+            value = value | ((byte & 0x7F) << shift)
+            if (byte < 0x80):
+                break
+            shift = shift + 7
+        return value
+
+    # The keyframes in the index, as (time, offset)
+    def readIndex(self):
+        keyframes = []
+        try:
+            f = open(self.INDEXNAME, "rb")
+        except OSError:
+            return keyframes
+        record = f.read(self.INDEX_RECORD_SIZE)
+        while (len(record) == self.INDEX_RECORD_SIZE):
+            keyframes.append(struct.unpack(self.INDEX_FORMAT, record))
+            record = f.read(self.INDEX_RECORD_SIZE)
+        f.close()
+        return keyframes
+
+    # Remove the earliest entries, at least 'size' bytes worth, keeping the header - the file is cut at a keyframe, so it still starts with full values
+    def removeEntries(self, size):
+        keyframes = self.readIndex()
+        cut = None
+        for keyframeTime, offset in keyframes:
+            if (offset >= self.headerSize + size):
+                cut = offset
+                break
+        if (cut is None):
+            self.eraseAllData()
+            return
+        tempName = self.FILENAME + ".bak"
+        readFrom = open(self.FILENAME, "rb")
+        writeTo = open(tempName, "wb")
+        writeTo.write(readFrom.read(self.headerSize))
+        readFrom.seek(cut)
+        block = readFrom.read(512)
+        while block:
+            writeTo.write(block)
+            block = readFrom.read(512)
+        readFrom.close()
+        writeTo.close()
+        os.remove(self.FILENAME)
+        os.rename(tempName, self.FILENAME)
+        f = open(self.INDEXNAME, "wb")
+        for keyframeTime, offset in keyframes:
+            if (offset >= cut):
+                f.write(struct.pack(self.INDEX_FORMAT, keyframeTime, offset - cut + self.headerSize))
+        f.close()
+        self.fileSize = None
+
+    # Deletes all the entries from the file (the header is kept)
+    def eraseAllData(self):
+        self.buffer = []
+        self.bufferSize = 0
+        f = open(self.FILENAME, "wb")
+        if self.headings:
+            f.write(self.packHeader())
+        f.close()
+        f = open(self.INDEXNAME, "wb")
+        f.close()
+        self.fileSize = None
+        self.sinceKeyframe = None
+
+    # Deletes the file and its index from the Pico file system
+    def deleteDataFile(self):
+        KitronikDataLogger.deleteDataFile(self)
+        try:
+            os.remove(self.INDEXNAME)
+        except OSError:
+            pass
+        self.sinceKeyframe = None
+
+    # This returns the size of the file, or 0 if the file does not exist
+    def checkFileSize(self):
+        try:
+            f = open(self.FILENAME, "rb")
+            f.seek(0, 2)
+            size = f.tell()
+            f.close()
+            return size
+        except OSError:
+            return 0
+
+# The KitronikLoggerGroup class writes the entries for several loggers (eg: one file per sensor or room) together, rather than each logger opening, writing and closing its file for every entry
+# The group keeps each log file open, and writes all the buffered entries of every logger in one flush cycle when the group's flush policy says it is time to
+# Each logger still keeps its own MAX_FILE_SIZE, with the log kept in two files: when a file would go over half of MAX_FILE_SIZE, it is closed and moved to '<file>.old' (replacing the one before),
+# and the file is started again with its project info and headings - so the oldest entries are removed in one go without copying any, and the two files together stay within MAX_FILE_SIZE
+# Write the project info and headings before adding a logger to the group, and call close() (or removeLogger()) before erasing or deleting its file
+# Loggers which store their entries differently (eg: KitronikRingLogger, KitronikSegmentedLogger) can be added too - their own flush() is called in the group's flush cycle
+# WARNING: Entries which have not been written yet are lost if the Pico is reset or loses power - call flush() or close() before stopping the program
+class KitronikLoggerGroup:
+    # The flush policy is the same as KitronikDataLogger.setFlushPolicy(), but counts the entries of all the loggers together
+    def __init__(self, entries=0, size=0, interval=0):
+        self.loggers = []
+        self.handles = []    # The open file for each logger (None until it is first written, or if the logger writes its own file)
+        self.flushEntries = entries
+        self.flushSize = size
+        self.flushInterval = interval
+        self.lastFlush = time.ticks_ms()
+        self.flushes = 0
+
+    # Add a logger to the group, with its own maximum file size if 'maxFileSize' is given
+    # The logger's entries are then only written by the group
+    def addLogger(self, logger, maxFileSize=None):
+        logger.setFlushPolicy(0, 0, 0)
+        if (maxFileSize is not None):
+            logger.MAX_FILE_SIZE = maxFileSize
+        self.loggers.append(logger)
+        self.handles.append(None)
+        return logger
+
+    # Write a logger's entries and close its file, and take it out of the group (its flush policy is set back to writing every entry)
+    def removeLogger(self, logger):
+        i = self.loggers.index(logger)
+        self.flushLogger(i)
+        self.closeHandle(i)
+        self.loggers.pop(i)
+        self.handles.pop(i)
+        logger.setFlushPolicy(1)
+
+    # Write everything if the group's flush policy says it is time to - call this once each time round the main loop, after storing the entries
+    def update(self):
+        if (self.flushInterval and (time.ticks_diff(time.ticks_ms(), self.lastFlush) >= self.flushInterval)):
+            self.flush()
+            return
+        if (self.flushEntries == 0) and (self.flushSize == 0):
+            return
+        entries = 0
+        size = 0
+        for logger in self.loggers:
+            entries = entries + len(logger.buffer)
+            size = size + logger.bufferSize
+        if (self.flushEntries and (entries >= self.flushEntries)) or (self.flushSize and (size >= self.flushSize)):
+            self.flush()
+
+    # Write the buffered entries of every logger to its file, in one flush cycle
+    def flush(self):
+        self.lastFlush = time.ticks_ms()
+        self.flushes = self.flushes + 1
+        for i in range(len(self.loggers)):
+            self.flushLogger(i)
+
+    def flushLogger(self, i):
+        logger = self.loggers[i]
+        if (len(logger.buffer) == 0):
+            return
+        if (type(logger).flush is not KitronikDataLogger.flush):
+            logger.flush()
+            return
+        limit = logger.MAX_FILE_SIZE // 2
+        while (logger.bufferSize > limit) and (len(logger.buffer) > 1):   # More than a whole file of entries waiting - keep the newest
+            logger.bufferSize = logger.bufferSize - len(logger.buffer.pop(0))
+        if (logger.fileSize is None):
+            logger.fileSize = logger.checkFileSize()
+        if (logger.fileSize + logger.bufferSize > limit):
+            self.closeHandle(i)
+            logger.rotateFile()
+        if (len(logger.buffer) == 1):
+            data = logger.buffer[0]
+        else:
+            data = logger.buffer[0][:0].join(logger.buffer)
+        if isinstance(data, str):
+            data = data.encode()
+        logger.buffer = []
+        logger.bufferSize = 0
+        f = self.handles[i]
+        if (f is None):
+            f = open(logger.FILENAME, "ab")
+            self.handles[i] = f
+        f.write(data)
+        f.flush()
+        logger.lastFlush = self.lastFlush
+        logger.fileSize = logger.fileSize + len(data)
+
+    def closeHandle(self, i):
+        if (self.handles[i] is not None):
+            self.handles[i].close()
+            self.handles[i] = None
+
+    # Write everything and close all the files (the loggers stay in the group, and their files are opened again when next written)
+    def close(self):
+        self.flush()
+        for i in range(len(self.handles)):
+            self.closeHandle(i)
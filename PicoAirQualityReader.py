@@ -0,0 +1,311 @@
+# Read back logs written by KitronikDataLogger (PicoAirQuality.py), KitronikSegmentedLogger and KitronikDeltaLogger (PicoAirQualityLogging.py), one entry at a time
+# Only one line of the log is held in memory at once, so any size of log can be read on the Pico
+# This file does not use any of the board hardware, so it also runs unchanged on a PC (CPython 3) to read logs copied off the Pico
+# Save this file onto the Pico alongside PicoAirQuality.py
+
+SEPARATORS = {"comma": ",", "semicolon": ";", "tab": "\t"}
+
+# Seconds since 1970-01-01 00:00:00 for a date and time (the same on the Pico and a PC, whatever the time zone)
+def timestamp(year, month, day, hour=0, minute=0, second=0):
+    if (month <= 2):
+        year = year - 1
+        month = month + 12
+    days = (365 * year) + (year // 4) - (year // 100) + (year // 400) + (((153 * (month - 3)) + 2) // 5) + day - 719469
+    return (days * 86400) + (hour * 3600) + (minute * 60) + second
+
+# Turn a logged value back into a number if it is one, otherwise it is left as text
+def convertValue(text):
+    if not isinstance(text, str):
+        return text
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+# The time of an entry from its "Date" (DD/MM/YYYY) and "Time" (HH:MM:SS) columns (as written using KitronikRTC.readDateString() and readTimeString())
+def dateTimeToTimestamp(date, clock):
+    try:
+        return timestamp(int(date[6:10]), int(date[3:5]), int(date[0:2]), int(clock[0:2]), int(clock[3:5]), int(clock[6:8]))
+    except ValueError:
+        return None
+
+# The time of an entry from a "Timestamp" column: either seconds, or "YYYY-MM-DD HH:MM:SS" (as written by 'Host Code/binary_log_decoder.py')
+def timestampColumnToTimestamp(text):
+    try:
+        if (len(text) == 19) and (text[4] == "-"):
+            return timestamp(int(text[0:4]), int(text[5:7]), int(text[8:10]), int(text[11:13]), int(text[14:16]), int(text[17:19]))
+        return int(text)
+    except ValueError:
+        return None
+
+# The KitronikLogReader class reads the entries in a log back as numbers
+# 'file' is either a text log, the name given to a KitronikSegmentedLogger (the segments are found through its '.idx' index file), or a KitronikDeltaLogger file
+# The time of each entry comes from its "Date" and "Time" columns, or a "Timestamp" column - entries must be in time order to select a time range
+# The column headings line is the first line which ends with the separator (the project info lines before it are skipped)
+# A KitronikDeltaLogger file is found by the "KDL1" at its start - its entries have a "Timestamp" column then the logged columns, and its '.keys' index is used to start reading at the right place for a time range
+class KitronikLogReader:
+    INDEX_MAGIC = b"KSI1"
+    INDEX_HEADER_SIZE = 6
+    SEGMENT_RECORD_SIZE = 20
+    DELTA_MAGIC = b"KDL1"
+    DELTA_HEADER_SIZE = 12
+    KEYFRAME_RECORD_SIZE = 8
+    BLOCK_SIZE = 512
+
+    def __init__(self, file="data_log.txt", separator="semicolon"):
+        self.FILENAME = file
+        self.SEPARATOR = SEPARATORS[separator]
+
+    # The files to read (oldest first) for entries between 'start' and 'end'
+    # For a segmented log, the index is used to skip the segments which are outside the time range
+    def files(self, start=None, end=None):
+        try:
+            f = open(self.FILENAME + ".idx", "rb")
+        except OSError:
+            return [self.FILENAME]
+        names = []
+        try:
+            header = f.read(self.INDEX_HEADER_SIZE)
+            if (header[0:4] != self.INDEX_MAGIC):
+                return [self.FILENAME]
+            epochOffset = timestamp(header[4] | (header[5] << 8), 1, 1)    # The index times are time.time() on the Pico, which may not count from 1970
+            record = f.read(self.SEGMENT_RECORD_SIZE)
+            while (len(record) == self.SEGMENT_RECORD_SIZE):
+                number = record[0] | (record[1] << 8)
+                entries = self.readUint32(record, 4)
+                first = self.readUint32(record, 8) + epochOffset
+                last = self.readUint32(record, 12) + epochOffset
+                if (entries > 0) and ((start is None) or (last >= start)) and ((end is None) or (first <= end)):
+                    names.append(self.FILENAME + "." + ("%03d" % number))
+                record = f.read(self.SEGMENT_RECORD_SIZE)
+        finally:
+            f.close()
+        return names
+
+    def readUint32(self, data, offset):
+        return data[offset] | (data[offset + 1] << 8) | (data[offset + 2] << 16) | (data[offset + 3] << 24)
+
+    # Generator: yields the column headings and then every entry of one file, as lists of text
+    def readLines(self, name):
+        f = open(name, "rb")
+        try:
+            separator = self.SEPARATOR.encode()
+            line = f.readline()
+            while line and not line.rstrip(b"\r\n").endswith(separator):    # Skip the project info
+                line = f.readline()
+            while line:
+                line = line.rstrip(b"\r\n")
+                if line:
+                    yield line.decode().split(self.SEPARATOR)[:-1]
+                line = f.readline()
+        finally:
+            f.close()
+
+    # True if the file was written by KitronikDeltaLogger
+    def isDeltaLog(self, name):
+        f = open(name, "rb")
+        magic = f.read(4)
+        f.close()
+        return (magic == self.DELTA_MAGIC)
+
+    # Generator: yields the column headings and then every entry of a KitronikDeltaLogger file, as lists of numbers (the first is the time)
+    # If 'start' is given, reading starts at the last keyframe before it
+    # A damaged or part written entry at the end of the file (eg: if the power was cut while writing it) ends the log
+    def readDeltaEntries(self, name, start=None):
+        f = open(name, "rb")
+        try:
+            header = f.read(self.DELTA_HEADER_SIZE)
+            epochOffset = timestamp(header[4] | (header[5] << 8), 1, 1)    # The times are time.time() on the Pico, which may not count from 1970
+            count = header[8]
+            f.read(header[10] | (header[11] << 8))    # Skip the project info
+            headings = ["Timestamp"]
+            scales = []
+            for i in range(count):
+                length = f.read(1)[0]
+                headings.append(f.read(length).decode())
+                scales.append(10 ** f.read(1)[0])
+            yield headings
+            if (start is not None):
+                offset = self.findKeyframe(name + ".keys", start - epochOffset)
+                if (offset is not None):
+                    f.seek(offset)
+            values = [0] * (count + 1)
+            maxEntrySize = 10 * (count + 1)
+            data = b""
+            pos = 0
+            while True:
+                if (len(data) - pos < maxEntrySize):
+                    data = data[pos:] + f.read(self.BLOCK_SIZE)
+                    pos = 0
+                    if (len(data) == 0):
+                        return
+                try:
+                    value, pos = self.readVarint(data, pos)
+                    keyframe = value & 1
+                    if keyframe:
+                        values[0] = value >> 1
+                    else:
+                        values[0] = values[0] + (value >> 1)
+                    for i in range(1, count + 1):
+                        value, pos = self.readVarint(data, pos)
+                        value = (value >> 1) ^ -(value & 1)
+                        if keyframe:
+                            values[i] = value
+                        else:
+                            values[i] = values[i] + value
+                except IndexError:
+                    return    # The last entry was not completely written
+                fields = [values[0] + epochOffset]
+                for i in range(count):
+                    if (scales[i] == 1):
+                        fields.append(values[i + 1])
+                    else:
+                        fields.append(values[i + 1] / scales[i])
+                yield fields
+        finally:
+            f.close()
+
+    # A whole number stored 7 bits at a time (the top bit of each byte is set if more bytes follow): returns (value, position after it)
+    def readVarint(self, data, pos):
+        value = 0
+        shift = 0
+        while True:
+            byte = data[pos]
+            pos = pos + 1
+            value = value | ((byte & 0x7F) << shift)
+            if (byte < 0x80):
+                return value, pos
+            shift = shift + 7
+
+    # The offset of the last keyframe at or before 'start' (Pico time), found by a binary search of the keyframe index - None if there is no index or no keyframe that early
+    def findKeyframe(self, name, start):
+        try:
+            f = open(name, "rb")
+        except OSError:
+            return None
+        try:
+            f.seek(0, 2)
+            low = 0
+            high = f.tell() // self.KEYFRAME_RECORD_SIZE
+            offset = None
+            while (low < high):
+                middle = (low + high) // 2
+                f.seek(middle * self.KEYFRAME_RECORD_SIZE)
+                record = f.read(self.KEYFRAME_RECORD_SIZE)
+                if (self.readUint32(record, 0) <= start):
+                    offset = self.readUint32(record, 4)
+                    low = middle + 1
+                else:
+                    high = middle
+            return offset
+        finally:
+            f.close()
+
+    # Generator: yields one tuple for each entry, oldest first: (time, value1, value2...)
+    # columns - the names of the columns to include, in the order wanted (None for all of them) - a column missing from the log gives None
+    # start, end - only include entries from 'start' to 'end' (seconds since 1970, see timestamp()) - None for no limit
+    # every - only include every Nth entry (after the time range is applied)
+    # The time is seconds since 1970, or None if the log has no "Date" and "Time" or "Timestamp" columns
+    def readRecords(self, columns=None, start=None, end=None, every=1):
+        count = 0
+        for name in self.files(start, end):
+            if self.isDeltaLog(name):
+                lines = self.readDeltaEntries(name, start)
+            else:
+                lines = self.readLines(name)
+            for headings in lines:
+                break
+            else:
+                continue
+            positions = self.columnPositions(headings, columns)
+            timeColumns = self.timeColumns(headings)
+            if (timeColumns is None) and ((start is not None) or (end is not None)):
+                raise ValueError("The log has no Date and Time or Timestamp columns")
+            for fields in lines:
+                entryTime = self.entryTime(fields, timeColumns)
+                if (start is not None) and ((entryTime is None) or (entryTime < start)):
+                    continue
+                if (end is not None) and (entryTime is not None) and (entryTime > end):
+                    lines.close()
+                    return
+                if (count % every == 0):
+                    record = [entryTime]
+                    for position in positions:
+                        if (position is None) or (position >= len(fields)):
+                            record.append(None)
+                        else:
+                            record.append(convertValue(fields[position]))
+                    yield tuple(record)
+                count = count + 1
+
+    # Generator: summarise the entries over each 'period' seconds (eg: 60 for every minute, 3600 for every hour)
+    # Yields (period start time, number of entries, ((min, mean, max) for each column)) - a column with no numbers in the period gives (None, None, None)
+    # Only the running totals for the current period are kept, so this works on logs of any length
+    def readSummaries(self, columns, period=60, start=None, end=None):
+        periodStart = None
+        count = 0
+        for record in self.readRecords(columns, start, end):
+            if (record[0] is None):
+                raise ValueError("The log has no Date and Time or Timestamp columns")
+            recordPeriod = record[0] - (record[0] % period)
+            if (recordPeriod != periodStart):
+                if (count > 0):
+                    yield self.summary(periodStart, count, totals)
+                periodStart = recordPeriod
+                count = 0
+                totals = [[None, 0, 0, None] for column in columns]    # min, total, number of values, max
+            count = count + 1
+            for i in range(len(columns)):
+                value = record[i + 1]
+                if isinstance(value, (int, float)):
+                    total = totals[i]
+                    if (total[0] is None) or (value < total[0]):
+                        total[0] = value
+                    if (total[3] is None) or (value > total[3]):
+                        total[3] = value
+                    total[1] = total[1] + value
+                    total[2] = total[2] + 1
+        if (count > 0):
+            yield self.summary(periodStart, count, totals)
+
+    def summary(self, periodStart, count, totals):
+        values = []
+        for minimum, total, number, maximum in totals:
+            if (number == 0):
+                values.append((None, None, None))
+            else:
+                values.append((minimum, total / number, maximum))
+        return (periodStart, count, tuple(values))
+
+    # Where each of the wanted columns is in an entry (None if the log does not have it)
+    def columnPositions(self, headings, columns):
+        if (columns is None):
+            return list(range(len(headings)))
+        positions = []
+        for column in columns:
+            if (column in headings):
+                positions.append(headings.index(column))
+            else:
+                positions.append(None)
+        return positions
+
+    # The positions of the columns which give the time of each entry: (date, time), (timestamp,) or None
+    def timeColumns(self, headings):
+        if ("Date" in headings) and ("Time" in headings):
+            return (headings.index("Date"), headings.index("Time"))
+        if ("Timestamp" in headings):
+            return (headings.index("Timestamp"),)
+        return None
+
+    def entryTime(self, fields, timeColumns):
+        if (timeColumns is None) or (max(timeColumns) >= len(fields)):
+            return None
+        if not isinstance(fields[timeColumns[0]], str):
+            return fields[timeColumns[0]]
+        if (len(timeColumns) == 2):
+            return dateTimeToTimestamp(fields[timeColumns[0]], fields[timeColumns[1]])
+        return timestampColumnToTimestamp(fields[timeColumns[0]])